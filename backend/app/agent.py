@@ -1,27 +1,20 @@
 # app/agent.py
 from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from supabase import create_client
-import os, json, base64, httpx, time
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+import asyncio, itertools, json, time, httpx
+import numpy as np
 from datetime import date, timedelta
-from app.metrics import summary, burn_runway, WS
-from app.vector_db import vector_db
+from app.snapshot import load_snapshot
+from app import db, categorizer, jobs, rollups
+from app import anomalies as anomaly_engine
+from app.gateway import gateway, GatewayError
+from app import embedding_cache, llm_cache, runway
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 
-# Supabase client
-sb = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE"])
-
-def lava_token():
-    payload = {
-        "secret_key": os.environ["LAVA_API_KEY"],
-        "connection_secret": os.environ["LAVA_SELF_CONNECTION_SECRET"],
-        "product_secret": os.environ["LAVA_SELF_PRODUCT_SECRET"],
-    }
-    return base64.b64encode(json.dumps(payload).encode()).decode()
-
-def get_lava_url():
-    return os.environ["LAVA_FORWARD_URL"] + os.environ["AI_CHAT_URL"]
+MAX_PATHS = 100_000
+MAX_HORIZON = 120
 
 # Request Models
 class InsightReq(BaseModel):
@@ -31,38 +24,110 @@ class InsightReq(BaseModel):
 class CategorizeReq(BaseModel):
     workspace_id: str
     limit: int = 40
+    batch: bool = False     # process the whole backlog instead of one prompt
+    chunk_size: int = Field(20, ge=1, le=200)   # transactions per LLM prompt
+    concurrency: int = Field(4, ge=1, le=16)    # chunks in flight at once (batch mode)
+    background: bool = True  # batch mode: run as a job; False = hold the request until done
 
 class AnomaliesReq(BaseModel):
     workspace_id: str
+    limit: int = 5          # flagged expenses to report/explain
 
 class WhatIfReq(BaseModel):
     workspace_id: str
     raise_amount: float | None = None
     cuts: list[dict] | None = None  # [{"category": "SaaS", "delta_pct": -30}]
     revenue_growth_pct: float | None = None
+    simulate: bool = False          # Monte Carlo runway percentiles from per-category history
+    paths: int = Field(10000, ge=100, le=MAX_PATHS)
+    horizon_months: int = Field(36, ge=1, le=MAX_HORIZON)
+    seed: int | None = 0            # fixed by default so repeated scenarios hit the LLM cache
 
-# 1. CFO Agent - Insights (Updated with JSON format)
-@router.post("/insights")
-async def insights(req: InsightReq):
-    """CFO Agent: Financial insights with structured JSON output"""
-    s = summary(WS(workspace_id=req.workspace_id))
-    b = burn_runway(WS(workspace_id=req.workspace_id))
-    
+class ScenarioReq(BaseModel):
+    name: str | None = None
+    raise_amount: float | None = None
+    cuts: list[dict] | None = None
+    revenue_growth_pct: float | None = None
+
+class ScenarioGridReq(BaseModel):
+    workspace_id: str
+    scenarios: list[ScenarioReq] | None = None      # explicit scenarios, and/or
+    raise_amounts: list[float] | None = None        # grid axes: every combination is evaluated
+    cut_options: list[list[dict]] | None = None
+    revenue_growth_pcts: list[float] | None = None
+    simulate: bool = False
+    paths: int = Field(2000, ge=100, le=MAX_PATHS)
+    horizon_months: int = Field(36, ge=1, le=MAX_HORIZON)
+    seed: int | None = 0
+    commentary: bool = False        # one LLM commentary for the whole grid
+
+def _insights_body(s: dict, b: dict) -> dict:
+    """Chat request for the CFO insights agent"""
     messages = [
         {"role":"system","content":"You are an experienced startup CFO with 15+ years at high-growth companies. Analyze financial metrics and provide executive-level insights. Respond as JSON with keys: summary_bullets (array of 3-4 strategic insights), risks (array of 2-3 critical financial risks with severity), suggested_actions (array of 3-4 specific, actionable recommendations with expected impact). Be direct, data-driven, and focus on runway extension and growth."},
         {"role":"user","content": f"Financial Snapshot:\n- Monthly Burn: ${b['burn_avg_3m']:,.0f}\n- Cash Balance: ${b['cash']:,.0f}\n- Runway: {b['runway_months']} months\n- MTD Revenue: ${s['mtd']['revenue']:,.0f}\n- MTD Expenses: ${s['mtd']['expense']:,.0f}\n- YTD Net: ${s['ytd']['net']:,.0f}\n\nProvide strategic CFO analysis focusing on: 1) Financial health assessment, 2) Critical risks to runway, 3) Immediate actions to extend runway or accelerate growth."},
     ]
 
-    headers = {"Content-Type":"application/json","Authorization":f"Bearer {lava_token()}"}
-    body = {
+    return {
         "model":"llama-3.1-8b-instant",
         "messages":messages,
         "response_format": {"type": "json_object"}
     }
 
+def _parse_insights(content: str) -> dict:
+    try:
+        return json.loads(content)
+    except:
+        return {"summary_bullets": [content], "risks": [], "suggested_actions": []}
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _stream_agent(body: dict, workspace_id: str, agent_name: str, log_input: dict, finish) -> StreamingResponse:
+    """
+    Forward gateway tokens to the client as server-sent events
+    
+    Emits `token` events while the LLM generates, then one `done` event with
+    finish(text) merged in. The agent_calls row is written once the stream
+    completes; ttfb_ms (first token) is recorded separately from latency_ms.
+    """
+    async def events():
+        t0 = time.perf_counter()
+        ttfb_ms, parts = None, []
+        try:
+            async for token in gateway.stream_chat(body):
+                if ttfb_ms is None:
+                    ttfb_ms = int((time.perf_counter()-t0)*1000)
+                parts.append(token)
+                yield _sse("token", {"token": token})
+        except (GatewayError, httpx.HTTPError) as e:
+            yield _sse("error", {"error": str(e)})
+            return
+        
+        latency_ms = int((time.perf_counter()-t0)*1000)
+        result = finish("".join(parts))
+        await db.execute(db.table("agent_calls").insert({
+            "workspace_id": workspace_id,
+            "agent_name": agent_name,
+            "input": log_input,
+            "output": {**result["log"], "latency_ms": latency_ms, "ttfb_ms": ttfb_ms, "streamed": True}
+        }))
+        yield _sse("done", {**result["response"], "latency_ms": latency_ms, "ttfb_ms": ttfb_ms})
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# 1. CFO Agent - Insights (Updated with JSON format)
+@router.post("/insights")
+async def insights(req: InsightReq):
+    """CFO Agent: Financial insights with structured JSON output"""
+    snap = await load_snapshot(req.workspace_id)
+    s, b = snap.summary(), snap.burn()
+    
+    body = _insights_body(s, b)
+
     t0 = time.perf_counter()
-    async with httpx.AsyncClient(timeout=60) as c:
-        r = await c.post(get_lava_url(), headers=headers, json=body)
+    r = await llm_cache.chat(body)
     if r.status_code >= 400:
         raise HTTPException(500, r.text)
     
@@ -70,208 +135,231 @@ async def insights(req: InsightReq):
     latency_ms = int((time.perf_counter()-t0)*1000)
     content = data.get("choices",[{}])[0].get("message",{}).get("content","")
     
-    try:
-        parsed = json.loads(content)
-    except:
-        parsed = {"summary_bullets": [content], "risks": [], "suggested_actions": []}
+    parsed = _parse_insights(content)
     
     # Log to agent_calls
-    sb.table("agent_calls").insert({
+    await db.execute(db.table("agent_calls").insert({
         "workspace_id": req.workspace_id,
         "agent_name": "cfo_insights",
         "input": {"question": req.question},
-        "output": {"result": parsed, "latency_ms": latency_ms}
-    }).execute()
+        "output": {"result": parsed, "latency_ms": latency_ms, "cache_hit": r.cached}
+    }))
     
-    return {**parsed, "latency_ms": latency_ms}
+    return {**parsed, "latency_ms": latency_ms, "cache_hit": r.cached}
+
+@router.post("/insights/stream")
+async def insights_stream(req: InsightReq):
+    """CFO Agent: same as /insights, streamed as SSE (token events, then a done event with the parsed JSON)"""
+    snap = await load_snapshot(req.workspace_id)
+    body = _insights_body(snap.summary(), snap.burn())
+    
+    def finish(text):
+        parsed = _parse_insights(text)
+        return {"log": {"result": parsed}, "response": parsed}
+    
+    return _stream_agent(body, req.workspace_id, "cfo_insights", {"question": req.question}, finish)
 
 # 2. Accountant Agent - Categorize
+async def _run_categorize_backlog(job: jobs.Job, req: CategorizeReq) -> dict:
+    job.enter("categorize")
+    report = await categorizer.run_backlog(req.workspace_id, req.chunk_size, req.concurrency,
+                                           lambda p: job.progress(p["analyzed"], p))
+    await db.execute(db.table("agent_calls").insert({
+        "workspace_id": req.workspace_id,
+        "agent_name": "accountant_categorize",
+        "input": {"batch": True, "chunk_size": req.chunk_size, "concurrency": req.concurrency},
+        "output": report
+    }))
+    return report
+
 @router.post("/categorize")
 async def categorize(req: CategorizeReq):
-    """Accountant Agent: Auto-categorize transactions"""
+    """
+    Accountant Agent: Auto-categorize transactions
+    
+    batch=true works through the whole uncategorized backlog in chunk_size
+    chunks, `concurrency` LLM calls at a time, one bulk upsert per chunk. It
+    runs as a background job by default; poll GET /agent/jobs/{job_id}, whose
+    `progress` carries the running counts.
+    """
+    if req.batch:
+        return await jobs.dispatch("agent.categorize", req.workspace_id, req.background,
+                                   lambda job: _run_categorize_backlog(job, req))
     
     # Get uncategorized or "Other" transactions
-    rows = sb.table("transactions").select("id,merchant,amount,category") \
-        .eq("workspace_id", req.workspace_id) \
-        .in_("category", ["Other", "Uncategorized", ""]) \
-        .limit(req.limit).execute().data
+    rows = await categorizer.fetch_backlog(req.workspace_id, req.limit)
     
     if not rows:
         return {"categorized": 0, "message": "No transactions need categorization"}
     
-    # Build prompt
-    txn_list = "\n".join([f"{t['id'][:8]}: {t['merchant']} ${t['amount']}" for t in rows[:20]])
-    
-    messages = [
-        {"role":"system","content":"You are a senior accountant specializing in startup expense categorization. Analyze merchant names and amounts to categorize accurately. Use these categories: SaaS (software subscriptions), Payroll (salaries, benefits), Marketing (ads, campaigns, tools), Travel (flights, hotels, meals), Office (rent, utilities, supplies), Equipment (computers, furniture), Legal (attorneys, compliance), Meals (team meals, entertainment), Other (miscellaneous). Be consistent: recurring charges to tech companies are usually SaaS, one-time large purchases are Equipment. Respond as JSON: {categories: [{id: string (first 8 chars), category: string, confidence: string (high/medium/low)}]}"},
-        {"role":"user","content": f"Categorize these {len(rows)} transactions. For each, provide the transaction ID (first 8 characters), most likely category, and confidence level:\n\n{txn_list}\n\nExamples:\n- 'Stripe' or 'AWS' = SaaS\n- 'Gusto' or 'ADP' = Payroll\n- 'Google Ads' = Marketing\n- 'United Airlines' = Travel\n- 'Dell' or 'Apple Store' (high $) = Equipment"}
-    ]
-
-    headers = {"Content-Type":"application/json","Authorization":f"Bearer {lava_token()}"}
-    body = {
-        "model":"llama-3.1-8b-instant",
-        "messages":messages,
-        "response_format": {"type": "json_object"}
-    }
-
-    t0 = time.perf_counter()
-    async with httpx.AsyncClient(timeout=60) as c:
-        r = await c.post(get_lava_url(), headers=headers, json=body)
-    
-    latency_ms = int((time.perf_counter()-t0)*1000)
-    
-    if r.status_code >= 400:
-        raise HTTPException(500, r.text)
-    
-    content = r.json().get("choices",[{}])[0].get("message",{}).get("content","")
-    
-    try:
-        result = json.loads(content)
-        categories_map = {item["id"]: item["category"] for item in result.get("categories", [])}
-    except:
-        categories_map = {}
-    
-    # Update transactions
-    updated = 0
-    for txn in rows:
-        txn_id_short = txn["id"][:8]
-        if txn_id_short in categories_map:
-            cat = categories_map[txn_id_short]
-            sb.table("transactions").update({"category": cat}).eq("id", txn["id"]).execute()
-            updated += 1
+    res = await categorizer.categorize_chunk(req.workspace_id, rows[:req.chunk_size])
+    if res["error"]:
+        raise HTTPException(500, res["error"])
+    updated, latency_ms = len(res["changed"]), res["latency_ms"]
+    analyzed = min(len(rows), req.chunk_size)
+    memo_hit_rate = round(res["memo_hits"] / analyzed, 3) if analyzed else 0.0
     
     # Log
-    sb.table("agent_calls").insert({
+    await db.execute(db.table("agent_calls").insert({
         "workspace_id": req.workspace_id,
         "agent_name": "accountant_categorize",
         "input": {"limit": req.limit, "found": len(rows)},
-        "output": {"categorized": updated, "latency_ms": latency_ms}
-    }).execute()
+        "output": {"categorized": updated, "latency_ms": latency_ms, "memo_hits": res["memo_hits"]}
+    }))
     
     return {
         "categorized": updated,
         "analyzed": len(rows),
+        "memo_hits": res["memo_hits"],
+        "memo_hit_rate": memo_hit_rate,
         "latency_ms": latency_ms
     }
 
 # 3. Accountant Agent - Detect Anomalies
 @router.post("/anomalies")
 async def anomalies(req: AnomaliesReq):
-    """Accountant Agent: Detect spending anomalies"""
+    """
+    Accountant Agent: Detect spending anomalies
     
-    # Get last 90 days of transactions
-    start_date = (date.today() - timedelta(days=90)).isoformat()
-    rows = sb.table("transactions").select("ts,amount,category,merchant") \
-        .eq("workspace_id", req.workspace_id) \
-        .gte("ts", start_date) \
-        .order("ts", desc=True).execute().data
-    
-    if len(rows) < 10:
-        return {"alerts": [], "explanation": "Need more transaction history"}
-    
-    # Calculate category spending
-    cat_spend = {}
-    for r in rows:
-        if float(r["amount"]) < 0:  # Only expenses
-            cat = r.get("category") or "Other"
-            cat_spend[cat] = cat_spend.get(cat, 0) + abs(float(r["amount"]))
-    
-    # Calculate overall stats
-    amounts = [abs(float(r["amount"])) for r in rows if float(r["amount"]) < 0]
-    if not amounts:
-        return {"alerts": [], "explanation": "No expenses found"}
-    
-    avg = sum(amounts) / len(amounts)
-    
-    # Find top outliers (>2x average)
-    outliers = [
-        {
-            "title": f"Large {r['category'] or 'Other'} expense",
-            "entity": r["merchant"],
-            "delta": f"${abs(float(r['amount'])):.2f}",
-            "why": f"{abs(float(r['amount']))/avg:.1f}x average transaction",
-            "urgency": "high" if abs(float(r["amount"])) > avg * 3 else "medium"
-        }
-        for r in rows 
-        if float(r["amount"]) < 0 and abs(float(r["amount"])) > avg * 2
-    ][:3]
+    Expenses are scored against per-merchant / per-category rolling baselines
+    when they are ingested (app/anomalies.py); this reads back what was flagged
+    in the last 90 days and asks the LLM to explain only those items.
+    """
+    
+    # Workspaces ingested before baselines existed are backfilled once
+    if not await anomaly_engine.has_baselines(req.workspace_id):
+        async with rollups.workspace_lock(req.workspace_id):
+            if not await anomaly_engine.has_baselines(req.workspace_id):
+                await anomaly_engine.rebuild(req.workspace_id)
     
-    # Ask AI for analysis
-    outliers_str = ', '.join([f'${abs(float(o.get("delta", 0)))}' for o in outliers[:3]])
+    start_date = (date.today() - timedelta(days=90)).isoformat()
+    flagged = await anomaly_engine.recent(req.workspace_id, start_date, limit=req.limit)
+    if not flagged:
+        return {"alerts": [], "explanation": "No expenses outside their category or merchant baselines"}
+    
+    alerts = []
+    for a in flagged:
+        amt = -float(a["amount"])
+        baseline = a["baseline_key"].split(":", 1)
+        alerts.append({
+            "title": f"Large {a['category'] or 'Other'} expense",
+            "entity": a["merchant"],
+            "delta": f"${amt:.2f}",
+            "why": f"{amt / float(a['baseline_mean']):.1f}x the usual {baseline[1]} {baseline[0]} charge "
+                   f"(${float(a['baseline_mean']):.2f}, {a['score']:.1f} std-devs)",
+            "urgency": "high" if a["score"] >= 2 * anomaly_engine.Z_THRESHOLD else "medium",
+            "transaction_id": a["transaction_id"],
+            "ts": a["ts"]
+        })
+    
+    # Ask AI to explain only the flagged items
+    items_str = "\n".join(
+        f"- {a['ts']} {a['merchant'] or 'Unknown'} ({a['category'] or 'Other'}): ${-float(a['amount']):.2f} "
+        f"vs usual ${float(a['baseline_mean']):.2f} for this {a['baseline_key'].split(':', 1)[0]}"
+        for a in flagged
+    )
     messages = [
         {"role":"system","content":"You are a financial risk analyst specializing in spend management. Identify unusual patterns and assess their impact on runway and budget. Provide concise risk assessment in <100 words focusing on: 1) Whether anomalies are concerning or expected (one-time equipment purchases vs recurring waste), 2) Potential impact on monthly burn rate, 3) Specific recommendation to investigate or optimize."},
-        {"role":"user","content": f"Anomaly Analysis:\n- Found {len(outliers)} outlier transactions (>2x average)\n- Average transaction: ${avg:.2f}\n- Total monthly spend by category: {json.dumps(cat_spend)}\n- Largest outliers: {outliers_str}\n\nAssess: Are these anomalies concerning (recurring waste, fraud) or expected (one-time investments)? What's the risk to runway?"}
+        {"role":"user","content": f"Anomaly Analysis:\n{len(flagged)} expenses were far above their own merchant or category baseline in the last 90 days:\n{items_str}\n\nAssess: Are these anomalies concerning (recurring waste, fraud) or expected (one-time investments)? What's the risk to runway?"}
     ]
 
-    headers = {"Content-Type":"application/json","Authorization":f"Bearer {lava_token()}"}
     body = {"model":"llama-3.1-8b-instant","messages":messages}
 
     t0 = time.perf_counter()
-    async with httpx.AsyncClient(timeout=60) as c:
-        r = await c.post(get_lava_url(), headers=headers, json=body)
+    r = await gateway.chat(body)
     
     latency_ms = int((time.perf_counter()-t0)*1000)
     explanation = r.json().get("choices",[{}])[0].get("message",{}).get("content","") if r.status_code < 400 else "Analysis unavailable"
     
     # Log
-    sb.table("agent_calls").insert({
+    await db.execute(db.table("agent_calls").insert({
         "workspace_id": req.workspace_id,
         "agent_name": "accountant_anomalies",
-        "input": {"transactions": len(rows)},
-        "output": {"alerts": len(outliers), "latency_ms": latency_ms}
-    }).execute()
+        "input": {"flagged": len(flagged)},
+        "output": {"alerts": len(alerts), "latency_ms": latency_ms}
+    }))
     
     return {
-        "alerts": outliers,
+        "alerts": alerts,
         "explanation": explanation,
         "latency_ms": latency_ms
     }
 
+@router.post("/anomalies/rebuild")
+async def rebuild_anomalies(req: AnomaliesReq):
+    """Recompute anomaly baselines from the full transaction history (backfill/repair)"""
+    async with rollups.workspace_lock(req.workspace_id):
+        rebuilt = await anomaly_engine.rebuild(req.workspace_id)
+    return {"workspace_id": req.workspace_id, **rebuilt}
+
 # 4. CFO Agent - What-If Scenarios
+
+def _months(runway_months: float) -> str:
+    return f"{runway_months:.1f} months" if runway_months < float("inf") else "unlimited (not burning cash)"
+
+def _runway_value(runway_months) -> float:
+    """compute_burn's runway ("∞" when not burning) as a float"""
+    return float(runway_months) if isinstance(runway_months, (int, float)) else float("inf")
+
+def _scenario_text(spec, unmatched: list) -> str:
+    """Human-readable scenario: raise, cuts and growth (spec is a WhatIfReq or ScenarioReq)"""
+    desc = []
+    if spec.raise_amount:
+        desc.append(f"Raise ${spec.raise_amount:,.0f}")
+    for cut in spec.cuts or []:
+        category = cut.get("category") or "all expenses"
+        missing = " (no matching spend)" if cut.get("category") in unmatched else ""
+        desc.append(f"Cut {category} by {abs(cut.get('delta_pct', 0))}%{missing}")
+    if spec.revenue_growth_pct:
+        desc.append(f"Add {spec.revenue_growth_pct}% revenue growth")
+    return ", ".join(desc) if desc else "No changes"
+
 @router.post("/what_if")
 async def what_if(req: WhatIfReq):
     """CFO Agent: Scenario planning and projections"""
     
-    # Get current metrics
-    b = burn_runway(WS(workspace_id=req.workspace_id))
+    # Get current metrics and committed recurring spend
+    snap = await load_snapshot(req.workspace_id, with_recurring=True)
+    b = snap.burn()
+    rec = snap.recurring
     current_burn = b["burn_avg_3m"]
     current_cash = b["cash"]
     current_runway = b["runway_months"]
     
-    # Apply scenario changes
-    new_burn = current_burn
-    new_cash = current_cash
-    scenario_desc = []
-    
-    if req.raise_amount:
-        new_cash += req.raise_amount
-        scenario_desc.append(f"Raise ${req.raise_amount:,.0f}")
-    
-    if req.cuts:
-        for cut in req.cuts:
-            reduction = current_burn * (abs(cut.get("delta_pct", 0)) / 100)
-            new_burn -= reduction
-            scenario_desc.append(f"Cut {cut.get('category', 'expenses')} by {abs(cut.get('delta_pct', 0))}%")
-    
-    if req.revenue_growth_pct:
-        revenue_impact = current_burn * (req.revenue_growth_pct / 100)
-        new_burn -= revenue_impact
-        scenario_desc.append(f"Add {req.revenue_growth_pct}% revenue growth")
-    
-    new_runway = (new_cash / new_burn) if new_burn > 0.01 else 999
-    scenario_text = ", ".join(scenario_desc) if scenario_desc else "No changes"
+    # Apply scenario changes: each cut only reduces the category it names
+    model = runway.SpendModel.from_rollups(snap.rollups)
+    factors, unmatched = model.cut_factors(req.cuts)
+    revenue_factor = 1 + (req.revenue_growth_pct or 0) / 100
+    proj = runway.project(current_burn, current_cash, *model.recent(snap.rollups),
+                          [req.raise_amount or 0], [factors], [revenue_factor])
+    new_cash, new_burn, new_runway = (float(proj[k][0]) for k in ("cash", "burn", "runway"))
+    current_months = _runway_value(current_runway)
+    scenario_text = _scenario_text(req, unmatched)
     
     # Calculate runway change
-    runway_change = new_runway - current_runway if new_runway < 999 else 999
+    runway_change = new_runway - current_months if max(new_runway, current_months) < float("inf") else None
+    
+    # Optional Monte Carlo over per-category monthly spend/revenue history
+    simulation = None
+    if req.simulate:
+        sim = await asyncio.to_thread(runway.simulate, model, new_cash, factors, revenue_factor,
+                                      req.paths, req.horizon_months, req.seed)
+        simulation = {**runway.percentiles(sim, req.horizon_months), "history_months": len(model)}
+    sim_text = (f"\n- Simulated runway ({simulation['paths']:,} paths, {simulation['history_months']} months of history): "
+                f"p10 {simulation['p10']}, p50 {simulation['p50']}, p90 {simulation['p90']} months; "
+                f"{simulation['prob_out_of_cash']:.0%} chance of running out within {simulation['horizon_months']} months"
+                if simulation else "")
     
     # Ask AI for strategic analysis
-    runway_change_desc = f"+{runway_change:.1f}" if runway_change > 0 else f"{runway_change:.1f}"
+    if runway_change is None:
+        runway_change_desc = "n/a (not burning cash)"
+    else:
+        runway_change_desc = f"+{runway_change:.1f}" if runway_change > 0 else f"{runway_change:.1f}"
     messages = [
         {"role":"system","content":"You are a strategic CFO advisor. Analyze financial scenarios and provide executive-level guidance. Respond as JSON with keys: summary (2-3 sentence overview of impact), risks (array of 2-3 potential risks or downsides), recommendations (array of 2-3 specific next steps to maximize scenario success). Focus on practicality and execution. Be direct about trade-offs."},
-        {"role":"user","content": f"Scenario Analysis: {scenario_text}\n\nCurrent State:\n- Cash: ${current_cash:,.0f}\n- Monthly Burn: ${current_burn:,.0f}\n- Runway: {current_runway:.1f} months\n\nProjected State:\n- Cash: ${new_cash:,.0f}\n- Monthly Burn: ${new_burn:,.0f}\n- Runway: {new_runway:.1f} months\n- Runway Change: {runway_change_desc} months\n\nProvide strategic analysis: 1) Is this scenario realistic and achievable? 2) What are the key risks or trade-offs? 3) What specific actions should leadership take to execute this successfully? Be honest about difficulty and timeline."}
+        {"role":"user","content": f"Scenario Analysis: {scenario_text}\n\nCurrent State:\n- Cash: ${current_cash:,.0f}\n- Monthly Burn: ${current_burn:,.0f}\n- Runway: {_months(current_months)}\n{_committed_spend(rec, 5)}\n\nProjected State:\n- Cash: ${new_cash:,.0f}\n- Monthly Burn: ${new_burn:,.0f}\n- Runway: {_months(new_runway)}\n- Runway Change: {runway_change_desc} months{sim_text}\n\nProvide strategic analysis: 1) Is this scenario realistic and achievable? 2) What are the key risks or trade-offs? 3) What specific actions should leadership take to execute this successfully? Be honest about difficulty and timeline."}
     ]
 
-    headers = {"Content-Type":"application/json","Authorization":f"Bearer {lava_token()}"}
     body = {
         "model":"llama-3.1-8b-instant",
         "messages":messages,
@@ -279,8 +367,7 @@ async def what_if(req: WhatIfReq):
     }
 
     t0 = time.perf_counter()
-    async with httpx.AsyncClient(timeout=60) as c:
-        r = await c.post(get_lava_url(), headers=headers, json=body)
+    r = await llm_cache.chat(body)
     
     latency_ms = int((time.perf_counter()-t0)*1000)
     
@@ -292,49 +379,166 @@ async def what_if(req: WhatIfReq):
         explanation = "Analysis unavailable"
     
     # Log
-    sb.table("agent_calls").insert({
+    await db.execute(db.table("agent_calls").insert({
         "workspace_id": req.workspace_id,
         "agent_name": "cfo_scenario",
         "input": {"scenario": scenario_text},
         "output": {
-            "new_runway": round(new_runway, 1),
-            "change_months": round(new_runway - current_runway, 1),
-            "latency_ms": latency_ms
+            "new_runway": round(new_runway, 1) if new_runway < float("inf") else None,
+            "change_months": round(runway_change, 1) if runway_change is not None else None,
+            "simulation": simulation,
+            "latency_ms": latency_ms,
+            "cache_hit": r.cached
         }
-    }).execute()
+    }))
     
     return {
         "scenario": scenario_text,
         "new_burn": round(new_burn, 2),
         "new_cash": round(new_cash, 2),
-        "runway_months": round(new_runway, 1) if new_runway < 999 else "∞",
-        "runway_change": round(new_runway - current_runway, 1),
+        "runway_months": round(new_runway, 1) if new_runway < float("inf") else "∞",
+        "runway_change": round(runway_change, 1) if runway_change is not None else None,
+        "recurring_monthly": rec["monthly_total"] if rec else None,
+        "unmatched_cuts": unmatched,
+        "simulation": simulation,
         "explanation": explanation,
-        "latency_ms": latency_ms
+        "latency_ms": latency_ms,
+        "cache_hit": r.cached
     }
 
-# 5. Accounting Agent - Comprehensive Insights
-class AccountingReq(BaseModel):
-    workspace_id: str
-
-@router.post("/accounting-insights")
-async def accounting_insights(req: AccountingReq):
-    """
-    Accounting Agent: Analyze transactions, categories, P&L, and provide 
-    CFO-level insights on spending patterns, anomalies, and optimization opportunities.
+MAX_SCENARIOS = 500
+MAX_GRID_CELLS = 200_000_000    # scenarios x paths x horizon months simulated per request (~5 s of CPU)
+MAX_COMMENTARY_LINES = 40
+
+def _expand_grid(req: ScenarioGridReq) -> list:
+    """Explicit scenarios followed by the cartesian product of the grid axes"""
+    specs = list(req.scenarios or [])
+    if req.raise_amounts or req.cut_options or req.revenue_growth_pcts:
+        specs += [ScenarioReq(raise_amount=a, cuts=c, revenue_growth_pct=g)
+                  for a, c, g in itertools.product(req.raise_amounts or [None], req.cut_options or [None],
+                                                   req.revenue_growth_pcts or [None])]
+    return specs
+
+@router.post("/what_if/grid")
+async def what_if_grid(req: ScenarioGridReq):
     """
-    print(f"[Accounting Agent] Generating insights for workspace {req.workspace_id}")
+    CFO Agent: Evaluate a grid of scenarios in one pass
     
-    # Get metrics
-    s = summary(WS(workspace_id=req.workspace_id))
-    b = burn_runway(WS(workspace_id=req.workspace_id))
+    One snapshot fetch; every scenario's burn/runway (and optional Monte Carlo
+    percentiles, all scenarios on the same draws) is computed as arrays. With
+    commentary=true a single LLM call compares the whole grid.
+    """
+    specs = _expand_grid(req)
+    if not specs:
+        raise HTTPException(400, "No scenarios: pass `scenarios` or at least one grid axis")
+    if len(specs) > MAX_SCENARIOS:
+        raise HTTPException(400, f"{len(specs)} scenarios requested, max is {MAX_SCENARIOS}")
+    cells = len(specs) * req.paths * req.horizon_months
+    if req.simulate and cells > MAX_GRID_CELLS:
+        raise HTTPException(422, f"{len(specs)} scenarios x {req.paths} paths x {req.horizon_months} months "
+                                 f"is {cells:,} simulated cells, max is {MAX_GRID_CELLS:,}: "
+                                 f"reduce scenarios, paths or horizon_months")
+    
+    snap = await load_snapshot(req.workspace_id, with_recurring=req.commentary)
+    b = snap.burn()
+    current_months = _runway_value(b["runway_months"])
+    model = runway.SpendModel.from_rollups(snap.rollups)
+    cut_results = [model.cut_factors(spec.cuts) for spec in specs]
+    factors = np.array([f for f, _ in cut_results]).reshape(len(specs), len(model.categories))
+    revenue_factor = np.array([1 + (spec.revenue_growth_pct or 0) / 100 for spec in specs])
+    proj = runway.project(b["burn_avg_3m"], b["cash"], *model.recent(snap.rollups),
+                          [spec.raise_amount or 0 for spec in specs], factors, revenue_factor)
+    
+    sims, horizon = None, req.horizon_months
+    if req.simulate:
+        sims = await asyncio.to_thread(runway.simulate_grid, model, proj["cash"], factors, revenue_factor,
+                                       req.paths, horizon, req.seed)
+    
+    results = []
+    for i, spec in enumerate(specs):
+        new_runway = float(proj["runway"][i])
+        change = new_runway - current_months if max(new_runway, current_months) < float("inf") else None
+        results.append({
+            "name": spec.name or f"#{i + 1}",
+            "scenario": _scenario_text(spec, cut_results[i][1]),
+            "new_cash": round(float(proj["cash"][i]), 2),
+            "new_burn": round(float(proj["burn"][i]), 2),
+            "runway_months": round(new_runway, 1) if new_runway < float("inf") else "∞",
+            "runway_change": round(change, 1) if change is not None else None,
+            "unmatched_cuts": cut_results[i][1],
+            "simulation": runway.percentiles(sims[i], horizon) if sims is not None else None,
+        })
+    # Best: highest median simulated runway, ties (paths past the horizon) broken by projected runway
+    rank = np.lexsort((proj["runway"], np.median(sims, axis=1))) if sims is not None else np.argsort(proj["runway"], kind="stable")
+    best = results[int(rank[-1])]["name"]
+    
+    commentary, latency_ms, cache_hit = None, 0, False
+    if req.commentary:
+        ranked = sorted(results, key=lambda x: -_runway_value(x["runway_months"]))[:MAX_COMMENTARY_LINES]
+        lines = "\n".join(
+            f"- {x['name']}: {x['scenario']} -> burn ${x['new_burn']:,.0f}/month, runway {x['runway_months']} months"
+            + (f" (p10 {x['simulation']['p10']}, p50 {x['simulation']['p50']}, p90 {x['simulation']['p90']})" if x["simulation"] else "")
+            for x in ranked)
+        rec = snap.recurring
+        messages = [
+            {"role":"system","content":"You are a strategic CFO advisor comparing alternative plans. Respond as JSON with keys: summary (2-3 sentences on which scenarios stand out and why), tradeoffs (array of 2-4 key trade-offs between the scenarios), recommendation (the scenario name you would pick and a one-sentence rationale). Be direct and quantitative."},
+            {"role":"user","content": f"Current State:\n- Cash: ${b['cash']:,.0f}\n- Monthly Burn: ${b['burn_avg_3m']:,.0f}\n- Runway: {_months(current_months)}\n{_committed_spend(rec)}\n\nScenarios ({len(results)} evaluated, best runway first):\n{lines}\n\nCompare these scenarios and recommend one."}
+        ]
+        body = {
+            "model":"llama-3.1-8b-instant",
+            "messages":messages,
+            "response_format": {"type": "json_object"}
+        }
+        t0 = time.perf_counter()
+        r = await llm_cache.chat(body)
+        latency_ms, cache_hit = int((time.perf_counter()-t0)*1000), r.cached
+        try:
+            content = r.json().get("choices",[{}])[0].get("message",{}).get("content","")
+            commentary = json.loads(content)
+        except:
+            commentary = {"summary": "Analysis unavailable"}
     
-    # Get recent transactions
-    txns = sb.table("transactions").select("*")\
-        .eq("workspace_id", req.workspace_id)\
-        .order("ts", desc=True)\
-        .limit(100).execute().data or []
+    # Log
+    await db.execute(db.table("agent_calls").insert({
+        "workspace_id": req.workspace_id,
+        "agent_name": "cfo_scenario_grid",
+        "input": {"scenarios": len(results), "simulate": req.simulate},
+        "output": {"best": best, "latency_ms": latency_ms, "cache_hit": cache_hit}
+    }))
     
+    return {
+        "baseline": {"cash": b["cash"], "burn": b["burn_avg_3m"], "runway_months": b["runway_months"]},
+        "scenarios": results,
+        "best": best,
+        "commentary": commentary,
+        "latency_ms": latency_ms,
+        "cache_hit": cache_hit
+    }
+
+# 5. Accounting Agent - Comprehensive Insights
+class AccountingReq(BaseModel):
+    workspace_id: str
+
+def _recurring_lines(rec: dict | None, n: int = 8) -> str:
+    """Active recurring charges as prompt lines"""
+    active = [r for r in (rec or {}).get("recurring", []) if r["active"]][:n]
+    lines = []
+    for r in active:
+        change = f" (price {'up' if r['drift_pct'] > 0 else 'down'} {abs(r['drift_pct']):.0f}%)" if r["price_change"] else ""
+        lines.append(f"- {r['merchant']} [{r['category']}], {r['cadence']}: ${r['monthly_cost']:,.2f}/month{change}")
+    return "\n".join(lines) or "- none detected"
+
+def _committed_spend(rec: dict | None, n: int = 0) -> str:
+    """Prompt line for committed recurring spend, with the top n charges"""
+    if rec is None:
+        return "- Committed recurring spend: not analyzed yet"
+    line = f"- Committed recurring spend: ${rec['monthly_total']:,.0f}/month"
+    if n:
+        line += f" across {rec['active_count']} recurring charges:\n{_recurring_lines(rec, n)}"
+    return line
+
+def _accounting_body(s: dict, b: dict, txns: list, rec: dict | None = None) -> tuple:
+    """Chat request for the accounting agent, plus the top categories it cites"""
     # Calculate category breakdown
     cat_totals = {}
     for t in txns:
@@ -342,6 +546,11 @@ async def accounting_insights(req: AccountingReq):
         cat_totals[cat] = cat_totals.get(cat, 0) + abs(t.get("amount", 0))
     
     top_cats = sorted(cat_totals.items(), key=lambda x: x[1], reverse=True)[:5]
+    if rec is None:
+        recurring_text = "RECURRING CHARGES: not analyzed yet"
+    else:
+        recurring_text = (f"RECURRING CHARGES ({rec['active_count']} active, ${rec['monthly_total']:,.2f}/month):\n"
+                          f"{_recurring_lines(rec)}")
     
     # Build context for AI
     context = f"""
@@ -363,6 +572,8 @@ PROFIT & LOSS (YTD):
 TOP 5 EXPENSE CATEGORIES:
 {chr(10).join([f"- {cat}: ${amt:,.2f}" for cat, amt in top_cats])}
 
+{recurring_text}
+
 RECENT TRANSACTIONS: {len(txns)} transactions analyzed
 """
 
@@ -392,54 +603,101 @@ Style:
         }
     ]
     
+    return {
+        "model": "llama-3.1-8b-instant",
+        "messages": messages,
+        "temperature": 0.7,
+        "max_tokens": 1000
+    }, top_cats
+
+def _accounting_summary(s: dict, b: dict, txns: list, top_cats: list, rec: dict | None = None) -> dict:
+    return {
+        "total_transactions": len(txns),
+        "cash": b.get("cash", 0),
+        "burn_rate": b.get("burn_avg_3m", 0),
+        "runway_months": b.get("runway_months", "∞"),
+        "mtd_revenue": s.get("mtd", {}).get("revenue", 0),
+        "mtd_expense": s.get("mtd", {}).get("expense", 0),
+        "mtd_net": s.get("mtd", {}).get("net", 0),
+        "top_categories": [{"category": c, "amount": a} for c, a in top_cats],
+        "recurring_monthly": rec["monthly_total"] if rec else None,
+        "recurring_active": rec["active_count"] if rec else None,
+        "price_changes": (rec or {}).get("price_changes", [])
+    }
+
+@router.post("/accounting-insights")
+async def accounting_insights(req: AccountingReq):
+    """
+    Accounting Agent: Analyze transactions, categories, P&L, and provide 
+    CFO-level insights on spending patterns, anomalies, and optimization opportunities.
+    """
+    print(f"[Accounting Agent] Generating insights for workspace {req.workspace_id}")
+    
+    # Get metrics, recent transactions and recurring charges in one concurrent fetch
+    snap = await load_snapshot(req.workspace_id, recent=100, with_recurring=True)
+    s, b = snap.summary(), snap.burn()
+    txns = snap.transactions
+    
+    body, top_cats = _accounting_body(s, b, txns, snap.recurring)
+    
     start_time = time.time()
     
-    async with httpx.AsyncClient(timeout=60) as c:
-        r = await c.post(
-            get_lava_url(),
-            headers={
-                "Authorization": f"Bearer {lava_token()}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.1-8b-instant",
-                "messages": messages,
-                "temperature": 0.7,
-                "max_tokens": 1000
-            }
-        )
-        
-        if r.status_code >= 400:
-            raise HTTPException(500, f"Lava error: {r.text}")
-        
-        data = r.json()
-        answer = data["choices"][0]["message"]["content"].strip()
+    r = await llm_cache.chat(body)
+    
+    if r.status_code >= 400:
+        raise HTTPException(500, f"Lava error: {r.text}")
+    
+    data = r.json()
+    answer = data["choices"][0]["message"]["content"].strip()
     
     latency_ms = int((time.time() - start_time) * 1000)
     
     # Log to agent_calls
-    sb.table("agent_calls").insert({
+    await db.execute(db.table("agent_calls").insert({
         "workspace_id": req.workspace_id,
         "agent_name": "accounting_insights",
         "input": {"metrics": {"cash": b.get("cash"), "burn": b.get("burn_avg_3m"), "runway": b.get("runway_months")}},
-        "output": {"answer": answer[:500], "latency_ms": latency_ms}
-    }).execute()
+        "output": {"answer": answer[:500], "latency_ms": latency_ms, "cache_hit": r.cached}
+    }))
     
     return {
         "insights": answer,
-        "summary": {
-            "total_transactions": len(txns),
-            "cash": b.get("cash", 0),
-            "burn_rate": b.get("burn_avg_3m", 0),
-            "runway_months": b.get("runway_months", "∞"),
-            "mtd_revenue": s.get("mtd", {}).get("revenue", 0),
-            "mtd_expense": s.get("mtd", {}).get("expense", 0),
-            "mtd_net": s.get("mtd", {}).get("net", 0),
-            "top_categories": [{"category": c, "amount": a} for c, a in top_cats]
-        },
-        "latency_ms": latency_ms
+        "summary": _accounting_summary(s, b, txns, top_cats, snap.recurring),
+        "latency_ms": latency_ms,
+        "cache_hit": r.cached
     }
 
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status of a background batch categorization job (same payload as /plaid/jobs/{job_id})"""
+    return await jobs.status(job_id)
+
+@router.get("/llm-cache")
+async def llm_cache_stats():
+    """Hit/miss counters for the completion cache (in-memory tier)"""
+    return llm_cache.stats()
+
+@router.get("/embedding-cache")
+async def embedding_cache_stats():
+    """Hit rates for the embedding cache (memory and Redis tiers)"""
+    return embedding_cache.stats()
+
+@router.post("/accounting-insights/stream")
+async def accounting_insights_stream(req: AccountingReq):
+    """Accounting Agent: same as /accounting-insights, streamed as SSE"""
+    snap = await load_snapshot(req.workspace_id, recent=100, with_recurring=True)
+    s, b = snap.summary(), snap.burn()
+    body, top_cats = _accounting_body(s, b, snap.transactions, snap.recurring)
+    summary = _accounting_summary(s, b, snap.transactions, top_cats, snap.recurring)
+    
+    def finish(text):
+        answer = text.strip()
+        return {"log": {"answer": answer[:500]}, "response": {"insights": answer, "summary": summary}}
+    
+    return _stream_agent(body, req.workspace_id, "accounting_insights",
+                         {"metrics": {"cash": b.get("cash"), "burn": b.get("burn_avg_3m"), "runway": b.get("runway_months")}},
+                         finish)
+
 # 6. Activity Feed
 @router.get("/activity")
 async def activity(
@@ -448,10 +706,10 @@ async def activity(
 ):
     """Get recent agent activity log"""
     
-    calls = sb.table("agent_calls").select("*") \
-        .eq("workspace_id", workspace_id) \
-        .order("created_at", desc=True) \
-        .limit(limit).execute().data
+    calls = (await db.execute(db.table("agent_calls").select("*")
+        .eq("workspace_id", workspace_id)
+        .order("created_at", desc=True)
+        .limit(limit))).data
     
     return {"activity": calls, "count": len(calls)}
 
@@ -0,0 +1,227 @@
+# app/anomalies.py
+"""
+Rolling-baseline anomaly engine
+Keeps an exponentially weighted mean/variance of expense size per category and
+per merchant. Baselines are updated as transactions are ingested, and every
+new expense is scored against its merchant baseline (or its category baseline
+while the merchant has too little history), so detection costs O(new rows)
+instead of rescanning a 90-day window. Flagged expenses are stored with the
+baseline they broke and read back by /agent/anomalies.
+
+EWMA rather than median/MAD: it updates in O(1) from the stored state without
+keeping any history per key.
+"""
+
+import math
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app import db
+from app.cache import LRUCache
+from app.merchant_memo import normalize_merchant
+
+BASELINE_TABLE = "spend_baselines"
+ANOMALY_TABLE = "spend_anomalies"
+PAGE_SIZE = 1000
+
+ALPHA = float(os.environ.get("ANOMALY_ALPHA", 0.1))        # EWMA weight of the newest expense
+Z_THRESHOLD = float(os.environ.get("ANOMALY_Z", 3.0))      # std-devs above the baseline mean
+MIN_RATIO = float(os.environ.get("ANOMALY_MIN_RATIO", 1.5))  # and at least this multiple of it
+MIN_OBS = int(os.environ.get("ANOMALY_MIN_OBS", 5))        # history needed before a key can flag
+CLIP_Z = 4.0   # outliers move the baseline as if they were this many std-devs out
+BACKFILL_KEY = "meta:backfilled"   # marker row written by rebuild(); never matched by a transaction
+
+
+def category_key(category: Optional[str]) -> str:
+    return f"category:{category or 'Other'}"
+
+
+def merchant_key(merchant: Optional[str]) -> Optional[str]:
+    key = normalize_merchant(merchant)
+    return f"merchant:{key}" if key else None
+
+
+def _std(b: Dict) -> float:
+    # Floor keeps near-constant charges (same subscription every month) from flagging on cents
+    return max(math.sqrt(b["var"]), 0.05 * b["mean"], 1.0)
+
+
+def score(b: Optional[Dict], amount: float) -> Optional[float]:
+    """Std-devs above the baseline mean, or None while the baseline is too young"""
+    if not b or b["count"] < MIN_OBS:
+        return None
+    return (amount - b["mean"]) / _std(b)
+
+
+def update(b: Optional[Dict], amount: float) -> Dict:
+    """Fold one expense into an EWMA baseline (Welford-style incremental variance)"""
+    if not b or not b["count"]:
+        return {"mean": amount, "var": 0.0, "count": 1}
+    if b["count"] >= MIN_OBS:
+        amount = min(amount, b["mean"] + CLIP_Z * _std(b))
+    count = b["count"] + 1
+    alpha = max(ALPHA, 1.0 / count)   # plain running mean until the EWMA has warmed up
+    diff = amount - b["mean"]
+    incr = alpha * diff
+    return {"mean": b["mean"] + incr, "var": (1 - alpha) * (b["var"] + diff * incr), "count": count}
+
+
+class Baselines:
+    """In-memory view of one workspace's baselines"""
+
+    def __init__(self, workspace_id: str, entries: Dict[str, Dict]):
+        self.workspace_id = workspace_id
+        self.entries = entries      # key -> {"mean", "var", "count"}
+
+    def observe(self, rows: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Score new transactions against the current baselines, then fold them in
+
+        Args:
+            rows: Transactions not seen before (id, ts, amount, category, merchant)
+
+        Returns:
+            (anomaly rows to store, baseline rows to persist)
+        """
+        flagged, touched = [], set()
+        for t in sorted(rows, key=lambda r: str(r.get("ts"))):
+            amount = -float(t.get("amount") or 0)
+            if amount <= 0:
+                continue    # revenue / refunds
+            keys = [category_key(t.get("category"))]
+            mkey = merchant_key(t.get("merchant"))
+            if mkey:
+                keys.insert(0, mkey)
+
+            # Merchant history first; fall back to the category while it is too short
+            for key in keys:
+                b = self.entries.get(key)
+                z = score(b, amount)
+                if z is None:
+                    continue
+                if z >= Z_THRESHOLD and amount >= MIN_RATIO * b["mean"]:
+                    flagged.append({
+                        "workspace_id": self.workspace_id,
+                        "transaction_id": t["id"],
+                        "ts": t["ts"],
+                        "amount": t["amount"],
+                        "category": t.get("category"),
+                        "merchant": t.get("merchant"),
+                        "baseline_key": key,
+                        "baseline_mean": round(b["mean"], 2),
+                        "score": round(z, 2),
+                    })
+                break
+
+            for key in keys:
+                self.entries[key] = update(self.entries.get(key), amount)
+                touched.add(key)
+
+        now = datetime.now(timezone.utc).isoformat()
+        changed = [{"workspace_id": self.workspace_id, "key": k, "updated_at": now, **self.entries[k]}
+                   for k in touched]
+        return flagged, changed
+
+
+_baselines = LRUCache(maxsize=int(os.environ.get("ANOMALY_WORKSPACES", 256)),
+                      ttl=float(os.environ.get("ANOMALY_BASELINE_TTL", 600)))
+
+
+async def load(workspace_id: str) -> Baselines:
+    """Workspace baselines, read from Supabase on first use"""
+    found = _baselines.get(workspace_id)
+    if found is not None:
+        return found
+    entries, offset = {}, 0
+    while True:
+        page = (await db.execute(db.table(BASELINE_TABLE).select("key,mean,var,count")
+            .eq("workspace_id", workspace_id)
+            .order("key").range(offset, offset + PAGE_SIZE - 1))).data or []
+        for e in page:
+            entries[e["key"]] = {"mean": float(e["mean"]), "var": float(e["var"]), "count": int(e["count"])}
+        if len(page) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    found = Baselines(workspace_id, entries)
+    _baselines.set(workspace_id, found)
+    return found
+
+
+async def _persist(flagged: List[Dict], changed: List[Dict]) -> None:
+    for i in range(0, len(changed), PAGE_SIZE):
+        await db.execute(db.table(BASELINE_TABLE).upsert(changed[i:i + PAGE_SIZE],
+                                                         on_conflict="workspace_id,key"))
+    for i in range(0, len(flagged), PAGE_SIZE):
+        await db.execute(db.table(ANOMALY_TABLE).upsert(flagged[i:i + PAGE_SIZE],
+                                                        on_conflict="workspace_id,transaction_id"))
+
+
+async def observe(workspace_id: str, rows: List[Dict]) -> int:
+    """
+    Check newly ingested transactions and update the baselines; returns anomalies flagged
+
+    Read-modify-write of the baselines: callers hold rollups.workspace_lock.
+    """
+    if not rows:
+        return 0
+    baselines = await load(workspace_id)
+    flagged, changed = baselines.observe(rows)
+    await _persist(flagged, changed)
+    if flagged:
+        print(f"[Anomalies] Flagged {len(flagged)} of {len(rows)} new transactions for workspace {workspace_id}")
+    return len(flagged)
+
+
+async def forget(workspace_id: str, transaction_ids: List[str]) -> None:
+    """Drop anomalies for transactions that no longer exist"""
+    for i in range(0, len(transaction_ids), 200):
+        await db.execute(db.table(ANOMALY_TABLE).delete()
+            .eq("workspace_id", workspace_id)
+            .in_("transaction_id", transaction_ids[i:i + 200]))
+
+
+async def rebuild(workspace_id: str) -> Dict:
+    """Recompute baselines and anomalies from the full history (backfill/repair; hold rollups.workspace_lock)"""
+    await db.execute(db.table(BASELINE_TABLE).delete().eq("workspace_id", workspace_id))
+    await db.execute(db.table(ANOMALY_TABLE).delete().eq("workspace_id", workspace_id))
+    baselines = Baselines(workspace_id, {})
+    _baselines.set(workspace_id, baselines)
+
+    scanned, flagged_total, offset = 0, 0, 0
+    while True:
+        page = (await db.execute(db.table("transactions").select("id,ts,amount,category,merchant")
+            .eq("workspace_id", workspace_id)
+            .order("ts").order("id").range(offset, offset + PAGE_SIZE - 1))).data or []
+        flagged, changed = baselines.observe(page)
+        await _persist(flagged, changed)
+        scanned += len(page)
+        flagged_total += len(flagged)
+        if len(page) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+
+    # Marks the backfill as done even when the history produced no baselines (no expenses yet)
+    marker = {"mean": 0.0, "var": 0.0, "count": 0}
+    await db.execute(db.table(BASELINE_TABLE).upsert(
+        {"workspace_id": workspace_id, "key": BACKFILL_KEY,
+         "updated_at": datetime.now(timezone.utc).isoformat(), **marker},
+        on_conflict="workspace_id,key"))
+    count = len(baselines.entries)
+    baselines.entries[BACKFILL_KEY] = marker
+    return {"transactions": scanned, "baselines": count, "anomalies": flagged_total}
+
+
+async def recent(workspace_id: str, since: str, limit: int = 10) -> List[Dict]:
+    """Stored anomalies on or after `since` (ISO date), highest score first"""
+    return (await db.execute(db.table(ANOMALY_TABLE)
+        .select("transaction_id,ts,amount,category,merchant,baseline_key,baseline_mean,score")
+        .eq("workspace_id", workspace_id)
+        .gte("ts", since)
+        .order("score", desc=True)
+        .limit(limit))).data or []
+
+
+async def has_baselines(workspace_id: str) -> bool:
+    """True once the workspace has baselines from ingestion or a backfill has run"""
+    return bool((await load(workspace_id)).entries)
@@ -0,0 +1,130 @@
+# app/cache.py
+"""
+In-process caches
+Bounded LRU cache plus a per-workspace data version. Write paths (Plaid
+ingestion, categorization, rollup rebuilds) bump the version, which makes every
+cached metrics response for that workspace unreachable without scanning the
+cache. The version lives in Redis (INCR dataver:<workspace>), so a write
+handled by one worker invalidates the entries of every other worker. Entries
+also expire after METRICS_CACHE_TTL, which bounds staleness while Redis is
+unreachable and versions fall back to a per-process counter.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.redis_clients import OptionalRedis
+
+
+class LRUCache:
+    """Thread-safe LRU cache with optional per-entry TTL"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[1] is not None and entry[1] < time.monotonic()):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# ---- workspace data versions ---------------------------------------------
+
+VERSION_PREFIX = "dataver:"
+
+_versions: Dict[str, int] = {}
+_versions_lock = threading.Lock()
+_redis = OptionalRedis("METRICS_VERSION_REDIS", "[Cache]", "using per-process versions")
+
+
+async def data_version(workspace_id: str) -> str:
+    """Shared version from Redis; the per-process counter while Redis is unavailable"""
+    r = _redis.get()
+    if r is not None:
+        try:
+            return f"r{int(await r.get(VERSION_PREFIX + workspace_id) or 0)}"
+        except Exception as e:
+            _redis.failed("version read", e)
+    return f"p{_versions.get(workspace_id, 0)}"
+
+
+async def bump_version(workspace_id: str) -> None:
+    """Call after any write that changes a workspace's transactions"""
+    with _versions_lock:
+        _versions[workspace_id] = _versions.get(workspace_id, 0) + 1
+    r = _redis.get()
+    if r is not None:
+        try:
+            await r.incr(VERSION_PREFIX + workspace_id)
+        except Exception as e:
+            _redis.failed("version bump", e)
+
+
+async def close() -> None:
+    await _redis.close()
+
+
+metrics_cache = LRUCache(maxsize=int(os.environ.get("METRICS_CACHE_SIZE", 2048)),
+                         ttl=float(os.environ.get("METRICS_CACHE_TTL", 300)))
+
+
+async def _metric_key(name: str, workspace_id: str) -> tuple:
+    # Includes today's date because summary/burn depend on it
+    return (name, workspace_id, await data_version(workspace_id), date.today().isoformat())
+
+
+async def cached_metric(name: str, workspace_id: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Return a cached metrics payload, computing it on a miss"""
+    key = await _metric_key(name, workspace_id)
+    value = metrics_cache.get(key)
+    if value is None:
+        value = await compute()
+        metrics_cache.set(key, value)
+    return value
+
+
+async def peek_metric(name: str, workspace_id: str) -> Optional[Any]:
+    """The cached payload for the current data version, or None; never computes"""
+    return metrics_cache.get(await _metric_key(name, workspace_id))
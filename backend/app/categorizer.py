@@ -0,0 +1,228 @@
+# app/categorizer.py
+"""
+Transaction categorization pipeline
+Resolves known merchants from the merchant memo, splits the rest into
+LLM-sized chunks, runs the chunks with bounded concurrency and writes each
+chunk back with a single bulk category update (set_categories).
+"""
+
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+from postgrest.exceptions import APIError
+
+from app import db, merchant_memo, rollups
+from app.cache import bump_version
+from app.gateway import gateway
+from app.merchant_memo import UNCATEGORIZED
+
+MODEL = "llama-3.1-8b-instant"
+PAGE_SIZE = 1000
+FALLBACK_CONCURRENCY = 16   # single-row updates in flight when the bulk RPC is missing
+
+SYSTEM_PROMPT = "You are a senior accountant specializing in startup expense categorization. Analyze merchant names and amounts to categorize accurately. Use these categories: SaaS (software subscriptions), Payroll (salaries, benefits), Marketing (ads, campaigns, tools), Travel (flights, hotels, meals), Office (rent, utilities, supplies), Equipment (computers, furniture), Legal (attorneys, compliance), Meals (team meals, entertainment), Other (miscellaneous). Be consistent: recurring charges to tech companies are usually SaaS, one-time large purchases are Equipment. Respond as JSON: {categories: [{id: string (first 8 chars), category: string, confidence: string (high/medium/low)}]}"
+
+def build_messages(rows: List[Dict]) -> List[Dict]:
+    txn_list = "\n".join([f"{t['id'][:8]}: {t['merchant']} ${t['amount']}" for t in rows])
+    return [
+        {"role":"system","content":SYSTEM_PROMPT},
+        {"role":"user","content": f"Categorize these {len(rows)} transactions. For each, provide the transaction ID (first 8 characters), most likely category, and confidence level:\n\n{txn_list}\n\nExamples:\n- 'Stripe' or 'AWS' = SaaS\n- 'Gusto' or 'ADP' = Payroll\n- 'Google Ads' = Marketing\n- 'United Airlines' = Travel\n- 'Dell' or 'Apple Store' (high $) = Equipment"}
+    ]
+
+
+def parse_categories(content: str) -> Dict[str, Dict]:
+    """LLM JSON -> {short_id: {"category", "confidence"}}"""
+    try:
+        result = json.loads(content)
+        return {item["id"]: item for item in result.get("categories", []) if item.get("category")}
+    except Exception:
+        return {}
+
+
+async def fetch_backlog(workspace_id: str, limit: Optional[int] = None) -> List[Dict]:
+    """Uncategorized transactions, paginated past the PostgREST row cap"""
+    rows, offset = [], 0
+    while limit is None or len(rows) < limit:
+        size = PAGE_SIZE if limit is None else min(PAGE_SIZE, limit - len(rows))
+        page = (await db.execute(db.table("transactions").select("id,ts,merchant,amount,category")
+            .eq("workspace_id", workspace_id)
+            .in_("category", UNCATEGORIZED)
+            .order("id").range(offset, offset + size - 1))).data or []
+        rows += page
+        if len(page) < size:
+            break
+        offset += size
+    return rows
+
+
+async def _update_rows(workspace_id: str, changed: List[tuple]) -> List[tuple]:
+    """Fallback without the RPC: one update per row, skipping rows that are gone"""
+    sem = asyncio.Semaphore(FALLBACK_CONCURRENCY)
+
+    async def one(old, new):
+        async with sem:
+            rows = (await db.execute(db.table("transactions").update({"category": new["category"]})
+                .eq("workspace_id", workspace_id).eq("id", new["id"]))).data or []
+        # The rollups hold the row as stored now; only the category moves
+        return [({**old, **row, "category": old.get("category")}, {**old, **row}) for row in rows]
+
+    return [pair for pairs in await asyncio.gather(*(one(old, new) for old, new in changed)) for pair in pairs]
+
+
+async def _write(workspace_id: str, changed: List[tuple]) -> List[tuple]:
+    """
+    Set the category of each (old_row, new_row) pair with one bulk update
+
+    Only `category` is written, and only on rows that still exist with a
+    different category, so a concurrent sync's amounts/dates and deletions are
+    never overwritten.
+
+    Returns:
+        (old_row, new_row) pairs as stored, for the rows actually changed
+    """
+    try:
+        res = await db.execute(db.get_client().rpc("set_transaction_categories", {
+            "ws": workspace_id,
+            "changes": [{"id": new["id"], "category": new["category"]} for _, new in changed],
+        }))
+    except APIError as e:
+        if e.code != "PGRST202":
+            raise
+        return await _update_rows(workspace_id, changed)
+    return [({"id": r["id"], "ts": r["ts"], "amount": r["amount"], "category": r["old_category"]},
+             {"id": r["id"], "ts": r["ts"], "amount": r["amount"], "category": r["category"]})
+            for r in res.data or []]
+
+
+async def set_categories(workspace_id: str, changed: List[tuple]) -> List[tuple]:
+    """
+    Write category changes and move their spend between categories in the rollups
+
+    The write and the rollup delta run under the workspace lock, and the delta
+    is computed from the rows the update actually changed. Pairs whose
+    category is unchanged are dropped.
+
+    Returns:
+        (old_row, new_row) pairs that were written
+    """
+    changed = [(old, new) for old, new in changed if new["category"] != old.get("category")]
+    if not changed:
+        return []
+    async with rollups.workspace_lock(workspace_id):
+        written = await _write(workspace_id, changed)
+        if written:
+            await db.run(rollups.apply, db.get_client(), workspace_id,
+                         [new for _, new in written], [old for old, _ in written])
+    if written:
+        await bump_version(workspace_id)
+    return written
+
+
+async def categorize_chunk(workspace_id: str, rows: List[Dict]) -> Dict:
+    """
+    Categorize one chunk: known merchants from the memo, the rest with a single
+    LLM call, then a single bulk update (set_categories)
+
+    Returns:
+        {"changed": [(old_row, new_row)], "latency_ms": int, "error": str | None,
+         "memo_hits": int, "llm_rows": int}
+    """
+    memo = await merchant_memo.load(workspace_id)
+    known, pending = memo.split(rows)
+    changed = [(t, {**t, "category": cat}) for t, cat in known]
+    result = {"changed": changed, "latency_ms": 0, "error": None,
+              "memo_hits": len(known), "llm_rows": len(pending)}
+
+    if pending:
+        t0 = time.perf_counter()
+        r = await gateway.chat({
+            "model": MODEL,
+            "messages": build_messages(pending),
+            "response_format": {"type": "json_object"}
+        })
+        result["latency_ms"] = int((time.perf_counter()-t0)*1000)
+        if r.status_code >= 400:
+            result["error"] = r.text
+        else:
+            content = r.json().get("choices",[{}])[0].get("message",{}).get("content","")
+            answers = parse_categories(content)
+            learned = []
+            for txn in pending:
+                item = answers.get(txn["id"][:8])
+                # "Other" and friends leave the row in the backlog; nothing to write or learn
+                if item and item["category"] not in UNCATEGORIZED:
+                    changed.append((txn, {**txn, "category": item["category"]}))
+                    if str(item.get("confidence", "")).lower() == "high":
+                        learned.append((txn.get("merchant"), item["category"]))
+            await merchant_memo.remember(workspace_id, learned, source="llm")
+
+    result["changed"] = await set_categories(workspace_id, changed)
+    return result
+
+
+async def run_backlog(
+    workspace_id: str,
+    chunk_size: int = 20,
+    concurrency: int = 4,
+    on_progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Categorize a workspace's whole uncategorized backlog
+
+    Known merchants are resolved from the memo up front; only the remaining
+    rows are chunked into LLM prompts.
+
+    Args:
+        chunk_size: Transactions per LLM prompt
+        concurrency: Chunks in flight at once
+        on_progress: Called with a progress dict after every chunk
+
+    Returns:
+        Totals, memo hit rate, per-chunk failures and throughput
+    """
+    t0 = time.perf_counter()
+    rows = await fetch_backlog(workspace_id)
+
+    memo = await merchant_memo.load(workspace_id)
+    known, pending = memo.split(rows)
+    local = [(t, {**t, "category": cat}) for t, cat in known]
+    written = 0
+    for i in range(0, len(local), PAGE_SIZE):
+        written += len(await set_categories(workspace_id, local[i:i + PAGE_SIZE]))
+
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    sem = asyncio.Semaphore(concurrency)
+    progress = {"chunks_total": len(chunks), "chunks_done": 0, "analyzed": len(known),
+                "categorized": written, "memo_hits": len(known), "llm_rows": 0,
+                "failed_chunks": 0}
+    if on_progress:
+        on_progress(dict(progress))
+
+    async def worker(chunk):
+        async with sem:
+            # Re-checks the memo, so merchants learned by earlier chunks skip the LLM
+            res = await categorize_chunk(workspace_id, chunk)
+        progress["chunks_done"] += 1
+        progress["analyzed"] += len(chunk)
+        progress["categorized"] += len(res["changed"])
+        progress["memo_hits"] += res["memo_hits"]
+        progress["llm_rows"] += res["llm_rows"]
+        progress["failed_chunks"] += 1 if res["error"] else 0
+        elapsed = time.perf_counter() - t0
+        print(f"[Categorize] {workspace_id}: chunk {progress['chunks_done']}/{len(chunks)} "
+              f"({progress['analyzed']}/{len(rows)} rows, {progress['analyzed']/elapsed:.1f} rows/s)")
+        if on_progress:
+            on_progress(dict(progress))
+
+    await asyncio.gather(*(worker(c) for c in chunks))
+
+    elapsed = time.perf_counter() - t0
+    return {
+        **progress,
+        "backlog": len(rows),
+        "memo_hit_rate": round(progress["memo_hits"] / len(rows), 3) if rows else 0.0,
+        "elapsed_ms": int(elapsed * 1000),
+        "rows_per_sec": round(progress["analyzed"] / elapsed, 1) if elapsed else 0.0,
+    }
@@ -0,0 +1,143 @@
+# app/context_index.py
+"""
+Transaction context indexing
+Incremental, idempotent indexing of ingested transactions into the vector
+store. Opt-in (VECTOR_INDEX_TRANSACTIONS=1): a Plaid sync then queues one
+context.index job for the transactions it touched, which runs after the sync
+instead of inside its page pipeline. A document id is the transaction id plus
+a hash of the indexed text and embedding model:
+
+  - a replayed or unchanged transaction maps to a stored document and is
+    skipped (no embedding call); only its expiry is pushed back
+  - a modified transaction gets a new document, and the one it supersedes
+    is deleted
+  - a removed transaction's document is deleted
+
+vectxn:<workspace> maps transaction id -> current document id. Documents
+expire VECTOR_CONTEXT_TTL after they were last indexed or seen, so the store
+grows with distinct data, not with the number of syncs. Indexing failures
+(no OpenAI key, Redis down) are logged and never fail ingestion.
+"""
+
+import hashlib
+import os
+from typing import Dict, List
+
+from app import db, vector_db
+from app.jobs import Job
+
+INDEX_TRANSACTIONS = os.environ.get("VECTOR_INDEX_TRANSACTIONS", "0") == "1"
+CONTEXT_TTL = int(os.environ.get("VECTOR_CONTEXT_TTL", 180 * 24 * 3600))   # 0 = never expire
+DOC_TYPE = "transaction"
+ID_CHUNK = 200      # ids per `in_` filter when re-reading synced rows
+
+
+def _map_key(workspace_id: str) -> str:
+    return f"vectxn:{workspace_id}"
+
+
+def describe(row: Dict) -> str:
+    """Indexed text for a transactions row"""
+    return (f"{row['ts']} {row.get('merchant') or 'Unknown merchant'} "
+            f"({row.get('category') or 'Other'}): {float(row['amount']):+,.2f}")
+
+
+def doc_id(workspace_id: str, transaction_id: str, text: str) -> str:
+    digest = hashlib.sha256(f"{vector_db.EMBEDDING_MODEL}\0{text}".encode()).hexdigest()[:16]
+    return f"{workspace_id}:txn:{transaction_id}:{digest}"
+
+
+def _metadata(row: Dict) -> Dict:
+    return {"type": DOC_TYPE, "transaction_id": row["id"], "date": str(row["ts"]),
+            "amount": float(row["amount"]), "category": row.get("category"), "merchant": row.get("merchant")}
+
+
+async def index_transactions(workspace_id: str, rows: List[Dict]) -> Dict[str, int]:
+    """
+    Index added/modified transactions rows
+
+    Returns:
+        {"indexed", "unchanged", "superseded"}
+    """
+    counts = {"indexed": 0, "unchanged": 0, "superseded": 0}
+    if not INDEX_TRANSACTIONS or not rows:
+        return counts
+    try:
+        return await _index(workspace_id, rows)
+    except Exception as e:
+        print(f"[Context Index] Indexing failed for workspace {workspace_id}: {e}")
+        return counts
+
+
+async def _index(workspace_id: str, rows: List[Dict]) -> Dict[str, int]:
+    latest = {r["id"]: r for r in rows}    # last write wins within a call
+    transaction_ids = list(latest)
+    texts = {t: describe(latest[t]) for t in transaction_ids}
+    ids = {t: doc_id(workspace_id, t, texts[t]) for t in transaction_ids}
+
+    r = vector_db.get_async_redis()
+    current = await r.hmget(_map_key(workspace_id), transaction_ids)
+    stored = await vector_db.vector_db.adocuments_exist([ids[t] for t in transaction_ids])
+    unchanged = [t for t, found in zip(transaction_ids, stored) if found]
+    changed = [t for t, found in zip(transaction_ids, stored) if not found]
+    superseded = [old for t, old in zip(transaction_ids, current) if old and old != ids[t]]
+
+    if changed:
+        await vector_db.vector_db.aadd_documents(
+            workspace_id,
+            [{"id": ids[t], "content": texts[t], "metadata": _metadata(latest[t])} for t in changed],
+            ttl=CONTEXT_TTL or None
+        )
+    remap = {t: ids[t] for t, old in zip(transaction_ids, current) if old != ids[t]}
+    pipe = r.pipeline(transaction=False)
+    if remap:
+        pipe.hset(_map_key(workspace_id), mapping=remap)
+    if CONTEXT_TTL:
+        # Documents expire at most one TTL after the last call, so the map never goes first
+        pipe.expire(_map_key(workspace_id), CONTEXT_TTL)
+    await pipe.execute()
+    if CONTEXT_TTL:
+        await vector_db.vector_db.aexpire_documents([ids[t] for t in unchanged], CONTEXT_TTL)
+    await vector_db.vector_db.adelete_documents(workspace_id, superseded)
+    return {"indexed": len(changed), "unchanged": len(unchanged), "superseded": len(superseded)}
+
+
+async def forget(workspace_id: str, transaction_ids: List[str]) -> int:
+    """Delete the documents of removed transactions; returns how many were stored"""
+    if not INDEX_TRANSACTIONS or not transaction_ids:
+        return 0
+    try:
+        r = vector_db.get_async_redis()
+        ids = [d for d in await r.hmget(_map_key(workspace_id), transaction_ids) if d]
+        await vector_db.vector_db.adelete_documents(workspace_id, ids)
+        await r.hdel(_map_key(workspace_id), *transaction_ids)
+        return len(ids)
+    except Exception as e:
+        print(f"[Context Index] Removing documents failed for workspace {workspace_id}: {e}")
+        return 0
+
+
+async def index_synced(job: Job, workspace_id: str, transaction_ids: List[str]) -> Dict[str, int]:
+    """
+    Job body: bring the documents of the transactions a sync touched up to date
+
+    Rows are re-read from Supabase: ids still stored are indexed, the rest were
+    removed and are forgotten. Jobs of consecutive syncs therefore converge on
+    the current state whatever order they run in.
+
+    Returns:
+        {"indexed", "unchanged", "superseded", "forgotten"}
+    """
+    job.enter("index")
+    totals = {"indexed": 0, "unchanged": 0, "superseded": 0, "forgotten": 0}
+    for i in range(0, len(transaction_ids), ID_CHUNK):
+        chunk = transaction_ids[i:i + ID_CHUNK]
+        rows = (await db.execute(db.table("transactions").select("id,ts,amount,category,merchant")
+            .eq("workspace_id", workspace_id)
+            .in_("id", chunk))).data or []
+        for k, v in (await index_transactions(workspace_id, rows)).items():
+            totals[k] += v
+        stored = {r["id"] for r in rows}
+        totals["forgotten"] += await forget(workspace_id, [t for t in chunk if t not in stored])
+        job.progress(i + len(chunk))
+    return totals
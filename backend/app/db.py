@@ -0,0 +1,50 @@
+# app/db.py
+"""
+Async Supabase access
+supabase-py is synchronous, so every query is executed on a bounded thread
+pool. Async route handlers await the result instead of blocking the event loop
+(and every other in-flight request) for the length of the round trip.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from supabase import Client, create_client
+
+DB_MAX_WORKERS = int(os.environ.get("DB_MAX_WORKERS", 16))
+
+_client: Client | None = None
+_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="supabase")
+
+
+def get_client() -> Client:
+    """Shared Supabase client, created on first use"""
+    global _client
+    if _client is None:
+        url = os.environ.get("SUPABASE_URL")
+        key = os.environ.get("SUPABASE_SERVICE_ROLE")
+        if not url or not key:
+            raise HTTPException(500, "Supabase credentials not configured")
+        _client = create_client(url, key)
+    return _client
+
+
+def table(name: str):
+    """Start a query builder on the shared client"""
+    return get_client().table(name)
+
+
+async def execute(query) -> Any:
+    """Run a built query (anything with .execute()) off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, query.execute)
+
+
+async def run(fn: Callable, *args, **kwargs) -> Any:
+    """Run a synchronous helper that issues its own queries off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
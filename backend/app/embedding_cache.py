@@ -0,0 +1,169 @@
+# app/embedding_cache.py
+"""
+Embedding cache
+Content-addressed cache in front of the OpenAI embeddings call. Key =
+sha256(model, text) and the value is the raw float32 vector bytes (6 KB at
+1536 dims), so repeated merchant descriptions and canned questions are
+embedded once instead of on every add/search.
+
+Two tiers, as in llm_cache: an in-process LRU sized by EMBED_CACHE_MB, backed
+by Redis. Redis entries expire after EMBED_CACHE_TTL, and every hit resets the
+expiry (GETEX), so vectors in use stay and unused ones age out. A Redis error
+skips the persistent tier for REDIS_RETRY_S; it never fails an embedding.
+
+aget_many/aput_many are the same lookups on an async Redis client, for
+callers on the event loop.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.cache import LRUCache
+from app.redis_clients import OptionalRedis
+
+EMBEDDING_DIM = 1536
+EMBED_CACHE_MB = float(os.environ.get("EMBED_CACHE_MB", 64))
+EMBED_CACHE_TTL = int(os.environ.get("EMBED_CACHE_TTL", 30 * 24 * 3600))
+KEY_PREFIX = "embcache:"
+
+memory = LRUCache(maxsize=max(int(EMBED_CACHE_MB * 2**20) // (EMBEDDING_DIM * 4), 1))
+# Blocking client for the sync VectorDB methods, async one for the a-prefixed ones
+_redis = OptionalRedis("EMBED_CACHE_REDIS", "[Embedding Cache]", "using the in-process tier only", sync=True)
+_aredis = OptionalRedis("EMBED_CACHE_REDIS", "[Embedding Cache]", "using the in-process tier only")
+_counts = {"redis_hits": 0, "embedded": 0}
+_lock = threading.Lock()
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+def _get_redis():
+    """Blocking client, or None while disabled or backing off"""
+    return _redis.get()
+
+
+def _get_aredis():
+    return _aredis.get()
+
+
+def _count(name: str, n: int) -> None:
+    with _lock:
+        _counts[name] += n
+
+
+def _lookup(model: str, texts: List[str]):
+    keys = [cache_key(model, t) for t in texts]
+    found = [memory.get(k) for k in keys]
+    return keys, found, [i for i, v in enumerate(found) if v is None]
+
+
+def _queue_reads(pipe, keys: List[str], missing: List[int]) -> None:
+    for i in missing:
+        pipe.getex(KEY_PREFIX + keys[i], ex=EMBED_CACHE_TTL)
+
+
+def _queue_writes(pipe, keys: List[str], vectors: np.ndarray) -> None:
+    for k, v in zip(keys, vectors):
+        pipe.set(KEY_PREFIX + k, np.asarray(v, dtype=np.float32).tobytes(), ex=EMBED_CACHE_TTL)
+
+
+def _remember(model: str, texts: List[str], vectors: np.ndarray) -> List[str]:
+    _count("embedded", len(texts))
+    keys = [cache_key(model, t) for t in texts]
+    for k, v in zip(keys, vectors):
+        memory.set(k, v)
+    return keys
+
+
+def _merge(keys: List[str], found: List, missing: List[int], raw: List) -> List[Optional[np.ndarray]]:
+    hits = 0
+    for i, blob in zip(missing, raw):
+        if blob:
+            found[i] = np.frombuffer(blob, dtype=np.float32)
+            memory.set(keys[i], found[i])
+            hits += 1
+    _count("redis_hits", hits)
+    return found
+
+
+def get_many(model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+    """Cached vectors for texts (None where missing): memory first, then one Redis round trip"""
+    keys, found, missing = _lookup(model, texts)
+    r = _get_redis()
+    if not missing or r is None:
+        return found
+    try:
+        pipe = r.pipeline(transaction=False)
+        _queue_reads(pipe, keys, missing)
+        raw = pipe.execute()
+    except Exception as e:
+        _redis.failed("read", e)
+        return found
+    return _merge(keys, found, missing, raw)
+
+
+async def aget_many(model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+    """get_many without blocking the event loop"""
+    keys, found, missing = _lookup(model, texts)
+    r = _get_aredis()
+    if not missing or r is None:
+        return found
+    try:
+        pipe = r.pipeline(transaction=False)
+        _queue_reads(pipe, keys, missing)
+        raw = await pipe.execute()
+    except Exception as e:
+        _aredis.failed("read", e)
+        return found
+    return _merge(keys, found, missing, raw)
+
+
+def put_many(model: str, texts: List[str], vectors: np.ndarray) -> None:
+    """Store freshly embedded vectors in both tiers"""
+    keys = _remember(model, texts, vectors)
+    r = _get_redis()
+    if r is None:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        _queue_writes(pipe, keys, vectors)
+        pipe.execute()
+    except Exception as e:
+        _redis.failed("write", e)
+
+
+async def aput_many(model: str, texts: List[str], vectors: np.ndarray) -> None:
+    keys = _remember(model, texts, vectors)
+    r = _get_aredis()
+    if r is None:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        _queue_writes(pipe, keys, vectors)
+        await pipe.execute()
+    except Exception as e:
+        _aredis.failed("write", e)
+
+
+async def close() -> None:
+    await _redis.close()
+    await _aredis.close()
+
+
+def stats() -> Dict:
+    """Hit rates per tier; `embedded` counts texts that had to go to the API"""
+    mem = memory.stats()
+    served = mem["hits"] + _counts["redis_hits"]
+    total = served + _counts["embedded"]
+    return {
+        "ttl_s": EMBED_CACHE_TTL,
+        "memory": mem,
+        "redis_hits": _counts["redis_hits"],
+        "embedded": _counts["embedded"],
+        "hit_rate": round(served / total, 3) if total else 0.0,
+    }
@@ -0,0 +1,115 @@
+# app/gateway.py
+"""
+Lava LLM gateway client
+One pooled httpx.AsyncClient shared by every agent call and TTS request, so
+connections to LAVA_FORWARD_URL are kept alive instead of paying a TCP+TLS
+handshake per call. Opened/closed by the app lifespan; created lazily if used
+outside of it (scripts, benchmarks).
+"""
+
+import base64
+import json
+import os
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+
+class GatewayError(Exception):
+    """Non-2xx answer from the gateway while streaming"""
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+class LavaGateway:
+    """Keep-alive connection pool + cached auth header for the Lava forward proxy"""
+
+    def __init__(self):
+        self.timeout = float(os.environ.get("LAVA_TIMEOUT", 60))
+        self.limits = httpx.Limits(
+            max_connections=int(os.environ.get("LAVA_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.environ.get("LAVA_MAX_KEEPALIVE", 20)),
+            keepalive_expiry=float(os.environ.get("LAVA_KEEPALIVE_EXPIRY", 30)),
+        )
+        self.http2 = _env_flag("LAVA_HTTP2")
+        self._client: Optional[httpx.AsyncClient] = None
+        self._auth: Optional[str] = None
+
+    @property
+    def auth_header(self) -> str:
+        """Bearer header, built once from the Lava secrets"""
+        if self._auth is None:
+            payload = {
+                "secret_key": os.environ["LAVA_API_KEY"],
+                "connection_secret": os.environ["LAVA_SELF_CONNECTION_SECRET"],
+                "product_secret": os.environ["LAVA_SELF_PRODUCT_SECRET"],
+            }
+            self._auth = f"Bearer {base64.b64encode(json.dumps(payload).encode()).decode()}"
+        return self._auth
+
+    @property
+    def chat_url(self) -> str:
+        return os.environ["LAVA_FORWARD_URL"] + os.environ["AI_CHAT_URL"]
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            http2 = self.http2
+            if http2:
+                try:
+                    import h2  # noqa: F401  (installed via httpx[http2])
+                except ImportError:
+                    print("[Gateway] LAVA_HTTP2 set but h2 is not installed; using HTTP/1.1")
+                    http2 = False
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=http2)
+        return self._client
+
+    async def start(self) -> None:
+        """Open the pool (called from the app lifespan)"""
+        _ = self.client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _headers(self, extra: Optional[Dict] = None) -> Dict:
+        return {"Content-Type": "application/json", "Authorization": self.auth_header, **(extra or {})}
+
+    async def post(self, url: str, json: Dict, headers: Optional[Dict] = None) -> httpx.Response:
+        """POST through the pool with the Lava auth header"""
+        return await self.client.post(url, json=json, headers=self._headers(headers))
+
+    async def chat(self, body: Dict) -> httpx.Response:
+        """POST a chat-completions body to the configured AI_CHAT_URL"""
+        return await self.post(self.chat_url, body)
+
+    async def stream_chat(self, body: Dict) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive
+
+        Raises:
+            GatewayError: if the gateway answers with an HTTP error
+        """
+        async with self.client.stream("POST", self.chat_url, json={**body, "stream": True},
+                                      headers=self._headers({"Accept": "text/event-stream"})) as r:
+            if r.status_code >= 400:
+                raise GatewayError((await r.aread()).decode(errors="replace"))
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                try:
+                    delta = json.loads(payload)["choices"][0].get("delta", {}).get("content")
+                except (ValueError, KeyError, IndexError):
+                    continue
+                if delta:
+                    yield delta
+
+
+# Global instance
+gateway = LavaGateway()
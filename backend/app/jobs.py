@@ -0,0 +1,246 @@
+# app/jobs.py
+"""
+Background ingestion jobs
+Long-running work (Plaid token exchange, webhook, paginated sync, Supabase
+writes; batch categorization) runs on a fixed pool of asyncio workers fed by a
+bounded queue, so request handlers return a job id immediately instead of
+holding the HTTP request open. Job state is kept in-process (LRU + TTL) and
+polled through a status endpoint. Snapshots are also written to Redis
+(ingestjob:<id>, expiring after INGEST_JOB_TTL) when the job is queued, every
+INGEST_JOB_HEARTBEAT seconds while it runs and when it finishes, so a poll
+that lands on another worker or instance still finds the job.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.cache import LRUCache
+from app.redis_clients import OptionalRedis
+
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", 4))
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", 100))
+JOB_HISTORY = int(os.environ.get("INGEST_JOB_HISTORY", 1000))
+JOB_TTL = float(os.environ.get("INGEST_JOB_TTL", 3600))
+JOB_HEARTBEAT_S = float(os.environ.get("INGEST_JOB_HEARTBEAT", 2))
+JOB_PREFIX = "ingestjob:"
+
+_redis = OptionalRedis("INGEST_JOB_REDIS", "[Jobs]", "job status is per-process")
+
+
+class Job:
+    """Status of one background job; stages are timed as the job moves through them"""
+
+    def __init__(self, kind: str, workspace_id: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.workspace_id = workspace_id
+        self.status = "queued"          # queued | running | succeeded | failed
+        self.rows_processed = 0
+        self.progress_detail: Optional[Dict] = None    # job-specific counters, e.g. chunks done
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.stages: List[Dict] = []    # [{"stage", "ms"}], last one still running until finish()
+        self._stage_t0 = time.perf_counter()
+        self.stage = "queued"
+
+    def enter(self, stage: str) -> None:
+        """Close the current stage's timer and start the next one"""
+        now = time.perf_counter()
+        self.stages.append({"stage": self.stage, "ms": int((now - self._stage_t0) * 1000)})
+        self.stage = stage
+        self._stage_t0 = now
+
+    def progress(self, rows: int, detail: Optional[Dict] = None) -> None:
+        self.rows_processed = rows
+        if detail is not None:
+            self.progress_detail = detail
+
+    def finish(self, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        self.enter("done" if error is None else "failed")
+        self.status = "succeeded" if error is None else "failed"
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+
+    def to_dict(self) -> Dict:
+        stages = list(self.stages)
+        if self.finished_at is None:
+            stages.append({"stage": self.stage, "ms": int((time.perf_counter() - self._stage_t0) * 1000),
+                           "running": True})
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "workspace_id": self.workspace_id,
+            "status": self.status,
+            "stage": self.stage,
+            "rows_processed": self.rows_processed,
+            "progress": self.progress_detail,
+            "stages": stages,
+            "elapsed_ms": int(((self.finished_at or time.time()) - self.created_at) * 1000),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+JobFn = Callable[[Job], Awaitable[Dict]]
+
+
+# ---- shared status ---------------------------------------------------------
+
+async def _save(job: Job) -> None:
+    """Write the job's current status to Redis (best effort)"""
+    r = _redis.get()
+    if r is None:
+        return
+    try:
+        await r.set(JOB_PREFIX + job.id, json.dumps(job.to_dict(), default=str), ex=max(int(JOB_TTL), 1))
+    except Exception as e:
+        _redis.failed("status write", e)
+
+
+async def _load(job_id: str) -> Optional[Dict]:
+    r = _redis.get()
+    if r is None:
+        return None
+    try:
+        raw = await r.get(JOB_PREFIX + job_id)
+    except Exception as e:
+        _redis.failed("status read", e)
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def _heartbeat(job: Job) -> None:
+    while True:
+        await _save(job)
+        await asyncio.sleep(JOB_HEARTBEAT_S)
+
+
+class JobRunner:
+    """Bounded queue + fixed number of worker tasks"""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.jobs = LRUCache(maxsize=JOB_HISTORY, ttl=JOB_TTL)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _spawn(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def start(self) -> None:
+        """Start the workers (called from the app lifespan; submit() also starts them lazily)"""
+        if not self._tasks:
+            self._spawn()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs no worker picked up would otherwise stay "queued" in Redis until JOB_TTL
+        dropped = 0
+        while self._queue is not None and not self._queue.empty():
+            job, _ = self._queue.get_nowait()
+            job.finish(error="cancelled (server shutting down)")
+            await _save(job)
+            dropped += 1
+        if dropped:
+            print(f"[Jobs] Marked {dropped} queued job(s) failed on shutdown")
+        self._queue = None
+        await _redis.close()
+
+    async def submit(self, kind: str, workspace_id: str, fn: JobFn) -> Job:
+        """
+        Queue a job
+
+        Raises:
+            HTTPException(503): if the queue is full
+        """
+        if not self._tasks:
+            self._spawn()
+        if self._queue.full():
+            raise HTTPException(503, "Ingestion queue is full, retry shortly")
+        job = Job(kind, workspace_id)
+        self.jobs.set(job.id, job)
+        # Saved before a worker can pick it up, so "queued" never overwrites a later state
+        await _save(job)
+        try:
+            self._queue.put_nowait((job, fn))
+        except asyncio.QueueFull:
+            job.finish(error="Ingestion queue is full")
+            await _save(job)
+            raise HTTPException(503, "Ingestion queue is full, retry shortly")
+        print(f"[Jobs] Queued {kind} job {job.id} for workspace {workspace_id} "
+              f"({self._queue.qsize()} waiting)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers, "queued": self._queue.qsize() if self._queue else 0,
+                "queue_size": self.queue_size}
+
+    async def _worker(self) -> None:
+        while True:
+            job, fn = await self._queue.get()
+            job.status = "running"
+            heartbeat = asyncio.create_task(_heartbeat(job))
+            try:
+                result = await fn(job)
+                job.finish(result)
+                print(f"[Jobs] {job.kind} job {job.id} succeeded in {job.to_dict()['elapsed_ms']}ms")
+            except asyncio.CancelledError:
+                job.finish(error="cancelled (server shutting down)")
+                raise
+            except HTTPException as e:
+                job.finish(error=str(e.detail))
+                print(f"[Jobs] {job.kind} job {job.id} failed: {e.detail}")
+            except Exception as e:
+                job.finish(error=str(e))
+                print(f"[Jobs] {job.kind} job {job.id} failed: {e}")
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+                await _save(job)
+                self._queue.task_done()
+
+
+# Global instance
+ingest = JobRunner(INGEST_WORKERS, INGEST_QUEUE_SIZE)
+
+
+async def dispatch(kind: str, workspace_id: str, background: bool, fn: JobFn) -> Dict:
+    """Queue `fn(job)` on the ingestion pool, or run it inline when background=False"""
+    if not background:
+        return await fn(Job(kind, workspace_id))
+    job = await ingest.submit(kind, workspace_id, fn)
+    return {"job_id": job.id, "status": job.status, "workspace_id": workspace_id}
+
+
+async def status(job_id: str) -> Dict:
+    """
+    Status payload of a job: this process's copy if it runs here, else the
+    last snapshot another worker wrote to Redis
+
+    Raises:
+        HTTPException(404): unknown or expired job
+    """
+    job = ingest.get(job_id)
+    if job is not None:
+        return job.to_dict()
+    stored = await _load(job_id)
+    if stored is None:
+        raise HTTPException(404, "Job not found (unknown or expired)")
+    return stored
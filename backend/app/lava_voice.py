@@ -4,12 +4,11 @@ Lava Voice Integration - TTS and STT
 Handles text-to-speech and speech-to-text using Lava API
 """
 
-import httpx
 import base64
-import json
 import os
 from typing import Optional, Dict, List
 from fastapi import HTTPException
+from app.gateway import gateway
 
 
 class LavaVoice:
@@ -27,15 +26,6 @@ class LavaVoice:
         # Lava STT endpoint (if available)
         self.stt_url = os.environ.get("LAVA_STT_URL", "")
     
-    def _get_lava_token(self) -> str:
-        """Generate Lava authentication token"""
-        payload = {
-            "secret_key": self.api_key,
-            "connection_secret": self.connection_secret,
-            "product_secret": self.product_secret,
-        }
-        return base64.b64encode(json.dumps(payload).encode()).decode()
-    
     async def text_to_speech(
         self,
         text: str,
@@ -64,39 +54,30 @@ class LavaVoice:
             "speed": speed
         }
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self._get_lava_token()}"
-        }
-        
         try:
-            async with httpx.AsyncClient(timeout=60) as client:
-                response = await client.post(
-                    self.tts_url,
-                    headers=headers,
-                    json=payload
-                )
-                
-                if response.status_code >= 400:
-                    raise HTTPException(500, f"TTS error: {response.text}")
-                
-                # Get audio bytes
-                audio_bytes = response.content
-                
-                # Store in temporary location or return as base64
-                audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-                
-                # Calculate duration (rough estimate: 4 chars per second)
-                duration = len(text) / (4 * speed)
-                
-                return {
-                    "audio_base64": audio_base64,
-                    "audio_url": f"data:audio/mp3;base64,{audio_base64}",
-                    "duration": duration,
-                    "text": text,
-                    "voice": voice,
-                    "speed": speed
-                }
+            # Pooled gateway client: keep-alive connection + cached auth header
+            response = await gateway.post(self.tts_url, json=payload)
+            
+            if response.status_code >= 400:
+                raise HTTPException(500, f"TTS error: {response.text}")
+            
+            # Get audio bytes
+            audio_bytes = response.content
+            
+            # Store in temporary location or return as base64
+            audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+            
+            # Calculate duration (rough estimate: 4 chars per second)
+            duration = len(text) / (4 * speed)
+            
+            return {
+                "audio_base64": audio_base64,
+                "audio_url": f"data:audio/mp3;base64,{audio_base64}",
+                "duration": duration,
+                "text": text,
+                "voice": voice,
+                "speed": speed
+            }
         
         except Exception as e:
             raise HTTPException(500, f"TTS generation failed: {str(e)}")
@@ -0,0 +1,138 @@
+# app/ledger.py
+"""
+Columnar transaction ledger
+Converts fetched transaction rows into NumPy arrays once (int64 cents, day,
+month ordinal, category code) and computes metrics with vectorized group-bys.
+"""
+
+import warnings
+import numpy as np
+from datetime import date
+from typing import Dict, List
+
+
+def month_ordinal(d: date) -> int:
+    """Months since 1970-01, the same scale as Ledger.month"""
+    return (d.year - 1970) * 12 + d.month - 1
+
+
+def month_label(ordinal: int) -> str:
+    """Ordinal -> 'YYYY-MM'"""
+    return f"{1970 + ordinal // 12}-{ordinal % 12 + 1:02d}"
+
+
+def parse_days(values: List) -> np.ndarray:
+    """ts values -> datetime64[D]; NumPy parses plain dates and naive timestamps itself"""
+    with warnings.catch_warnings():
+        # tz-aware strings would be shifted to UTC; slice those to their local date instead
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.array(values, dtype="datetime64[D]")
+        except (ValueError, TypeError, DeprecationWarning):
+            return np.array([str(v)[:10] for v in values], dtype="datetime64[D]")
+
+
+def _codes(values: List[str]):
+    """(sorted unique values, int64 code per value); a dict pass instead of np.unique's sort"""
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), np.int64, len(values))
+    names = sorted(index)
+    remap = np.empty(len(names), np.int64)
+    remap[[index[v] for v in names]] = np.arange(len(names))
+    return np.array(names), remap[codes]
+
+
+class Ledger:
+    """Immutable column view over a list of transaction rows"""
+
+    def __init__(
+        self,
+        cents: np.ndarray,
+        day: np.ndarray,
+        category_code: np.ndarray,
+        categories: np.ndarray
+    ):
+        self.cents = cents                  # int64, expenses negative
+        self.day = day                      # datetime64[D]
+        self.month = day.astype("datetime64[M]").astype(np.int64)
+        self.category_code = category_code  # int64 index into categories
+        self.categories = categories        # sorted unique category names
+        self.is_expense = cents < 0
+        self._month_index = None
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> "Ledger":
+        """
+        Build a ledger from Supabase rows (needs ts and amount; category is
+        used when present). Each field is parsed exactly once.
+        """
+        n = len(rows)
+        if not n:
+            return cls(np.zeros(0, np.int64), np.zeros(0, "datetime64[D]"),
+                       np.zeros(0, np.int64), np.array([], dtype=str))
+
+        amounts = np.asarray([t["amount"] for t in rows], dtype=np.float64)
+        cents = np.rint(amounts * 100).astype(np.int64)
+        day = parse_days([t["ts"] for t in rows])
+        categories, codes = _codes([t.get("category") or "Other" for t in rows])
+        return cls(cents, day, codes, categories)
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    # ---- group-bys -------------------------------------------------------
+
+    def _by(self, keys: np.ndarray, mask: np.ndarray, size: int, weights=None) -> np.ndarray:
+        w = None if weights is None else weights[mask]
+        out = np.bincount(keys[mask], weights=w, minlength=size)
+        return np.rint(out).astype(np.int64)
+
+    def _months(self):
+        """(sorted month ordinals present, index of each row's month); O(n) via the month span"""
+        if self._month_index is None:
+            if not len(self):
+                return np.zeros(0, np.int64), np.zeros(0, np.int64)
+            lo = int(self.month.min())
+            offset = self.month - lo
+            present = np.flatnonzero(np.bincount(offset))
+            remap = np.zeros(int(present[-1]) + 1, np.int64)
+            remap[present] = np.arange(len(present))
+            self._month_index = (present + lo, remap[offset])
+        return self._month_index
+
+    def monthly(self) -> Dict[str, np.ndarray]:
+        """Per-month revenue/expense cents and counts, keyed by month ordinal"""
+        months, idx = self._months()
+        size, rev = len(months), ~self.is_expense
+        return {
+            "month": months,
+            "revenue": self._by(idx, rev, size, self.cents),
+            "expense": -self._by(idx, self.is_expense, size, self.cents),
+            "count": self._by(idx, np.ones(len(self), bool), size),
+        }
+
+    def month_buckets(self, sign: int = 1) -> Dict[str, Dict]:
+        """Rollup-shaped buckets: {'YYYY-MM': {revenue, expense, txn_count, categories}}"""
+        if not len(self):
+            return {}
+        m = self.monthly()
+        months, idx = self._months()
+        ncat = len(self.categories)
+        key = idx * ncat + self.category_code
+        cat_exp = -self._by(key, self.is_expense, len(months) * ncat, self.cents).reshape(-1, ncat)
+        cat_cnt = self._by(key, self.is_expense, len(months) * ncat).reshape(-1, ncat)
+
+        buckets = {}
+        for i, mo in enumerate(m["month"]):
+            nz = np.flatnonzero(cat_cnt[i])
+            buckets[month_label(int(mo))] = {
+                "revenue": sign * int(m["revenue"][i]) / 100,
+                "expense": sign * int(m["expense"][i]) / 100,
+                "txn_count": sign * int(m["count"][i]),
+                "categories": {
+                    str(self.categories[c]): {"expense": sign * int(cat_exp[i, c]) / 100,
+                                              "count": sign * int(cat_cnt[i, c])}
+                    for c in nz
+                },
+            }
+        return buckets
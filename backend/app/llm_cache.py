@@ -0,0 +1,106 @@
+# app/llm_cache.py
+"""
+LLM completion cache
+Content-addressed cache in front of gateway.chat for prompts that are built
+purely from workspace data. Key = sha256(model, messages, response_format), so
+an unchanged workspace gets its previous answer back without an LLM round trip.
+
+Two tiers: an in-process LRU (with TTL) backed by Redis (SETEX with the same
+TTL), so answers survive restarts and are shared between instances. A Redis
+error skips the persistent tier for REDIS_RETRY_S; it never fails a request.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from app.cache import LRUCache
+from app.gateway import gateway
+from app.redis_clients import OptionalRedis
+
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 3600))
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", 512))
+KEY_PREFIX = "llmcache:"
+
+memory = LRUCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+_redis = OptionalRedis("LLM_CACHE_REDIS", "[LLM Cache]", "using the in-process tier only")
+
+
+class Completion:
+    """Gateway result with the subset of the httpx.Response interface callers use"""
+
+    def __init__(self, status_code: int, data: Optional[Dict], text: str, cached: bool):
+        self.status_code = status_code
+        self.data = data
+        self.text = text
+        self.cached = cached
+
+    def json(self) -> Dict:
+        return self.data if self.data is not None else json.loads(self.text)
+
+
+def cache_key(body: Dict) -> str:
+    """sha256 over the parts of a request that determine the answer"""
+    material = json.dumps({
+        "model": body.get("model"),
+        "messages": body.get("messages"),
+        "response_format": body.get("response_format"),
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+async def _persistent_get(key: str) -> Optional[Dict]:
+    r = _redis.get()
+    if r is None:
+        return None
+    try:
+        raw = await r.get(KEY_PREFIX + key)
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        _redis.failed("read", e)
+        return None
+
+
+async def _persistent_set(key: str, data: Dict) -> None:
+    r = _redis.get()
+    if r is None:
+        return
+    try:
+        await r.set(KEY_PREFIX + key, json.dumps(data), ex=LLM_CACHE_TTL)
+    except Exception as e:
+        _redis.failed("write", e)
+
+
+async def chat(body: Dict) -> Completion:
+    """
+    gateway.chat with caching
+
+    Returns:
+        Completion; `.cached` tells whether the gateway was skipped.
+        Error responses are returned but never cached.
+    """
+    key = cache_key(body)
+    data = memory.get(key)
+    if data is None:
+        data = await _persistent_get(key)
+        if data is not None:
+            memory.set(key, data)
+    if data is not None:
+        return Completion(200, data, json.dumps(data), cached=True)
+
+    r = await gateway.chat(body)
+    if r.status_code >= 400:
+        return Completion(r.status_code, None, r.text, cached=False)
+    data = r.json()
+    memory.set(key, data)
+    await _persistent_set(key, data)
+    return Completion(r.status_code, data, r.text, cached=False)
+
+
+async def close() -> None:
+    await _redis.close()
+
+
+def stats() -> Dict:
+    return {"ttl_s": LLM_CACHE_TTL, **memory.stats()}
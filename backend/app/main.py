@@ -1,44 +1,154 @@
+"""
+App factory
+create_app() builds the FastAPI app with only / and /health registered, so
+importing app.main pulls in FastAPI and nothing else. The routers (and with
+them Supabase, OpenAI, NumPy, Redis clients) are imported by a startup task
+in a worker thread, and the shared clients start once they are in. Health
+checks are answered immediately; other requests wait for that task instead
+of seeing a 404. With APP_WARMUP=1 (the default) the Supabase client and the
+vector index are warmed in the background after the routers are ready.
+"""
+
+import asyncio
+import importlib
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, List
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.plaid import router as plaid_router
-from app.metrics import router as metrics_router
-from app.agent import router as agent_router
-from app.waitlist import router as waitlist_router
-from app.transactions import router as transactions_router
-from app.voice import router as voice_router
-
-app = FastAPI(
-    title="Agent Finny API",
-    description="AI-powered financial assistant backend",
-    version="0.1.0"
-)
-
-# CORS middleware - allow all origins for development
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"]
-)
-
-# Include routers
-app.include_router(plaid_router)
-app.include_router(metrics_router)
-app.include_router(agent_router)
-app.include_router(waitlist_router)
-app.include_router(transactions_router)
-app.include_router(voice_router)
-
-@app.get("/")
-def root():
-    return {
-        "service": "Agent Finny API",
-        "status": "running",
-        "docs": "/docs"
-    }
-
-@app.get("/health")
-def health():
-    return {"ok": True}
 
+ROUTER_MODULES = ["app.plaid", "app.metrics", "app.agent", "app.waitlist", "app.transactions", "app.voice"]
+OPEN_PATHS = {"/", "/health"}    # served before the routers are loaded
+APP_WARMUP = os.environ.get("APP_WARMUP", "1") != "0"
+
+
+def _warm_supabase() -> None:
+    from app import db
+    db.get_client()
+
+
+def _warm_vector_index() -> None:
+    from app.vector_db import vector_db
+    vector_db.ensure_index()
+
+
+# Blocking callables run once in a worker thread after startup; failures are logged, never raised
+WARMUP_HOOKS: List[Callable[[], None]] = [_warm_supabase, _warm_vector_index]
+
+
+def _import_routers() -> list:
+    return [importlib.import_module(name).router for name in ROUTER_MODULES]
+
+
+async def _start(app: FastAPI) -> None:
+    """Import the routers off the event loop, mount them, and start the shared clients"""
+    t0 = time.perf_counter()
+    for router in await asyncio.to_thread(_import_routers):
+        app.include_router(router)
+    from app.gateway import gateway
+    from app.jobs import ingest
+    # Shared keep-alive pool for the Lava gateway
+    await gateway.start()
+    # Worker pool for background Plaid ingestion jobs
+    await ingest.start()
+    print(f"[Startup] Routers ready in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+
+async def _warmup() -> None:
+    for hook in WARMUP_HOOKS:
+        t0 = time.perf_counter()
+        try:
+            await asyncio.to_thread(hook)
+            print(f"[Startup] Warm-up {hook.__name__} done in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"[Startup] Warm-up {hook.__name__} failed: {e}")
+
+
+async def _stop() -> None:
+    from app import cache, embedding_cache, llm_cache, plaid, vector_db
+    from app.gateway import gateway
+    from app.jobs import ingest
+    await ingest.close()
+    await gateway.close()
+    await llm_cache.close()
+    await cache.close()
+    await embedding_cache.close()
+    await vector_db.close_async()
+    await plaid.close()
+
+
+def _started(app: FastAPI) -> asyncio.Task:
+    if getattr(app.state, "started", None) is None:
+        # No lifespan (e.g. a bare test client): load on the first request
+        app.state.started = asyncio.create_task(_start(app))
+    return app.state.started
+
+
+class WaitForStartup:
+    """ASGI middleware: hold requests outside OPEN_PATHS until the routers are mounted"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] not in OPEN_PATHS:
+            await asyncio.shield(_started(scope["app"]))
+        await self.app(scope, receive, send)
+
+
+def create_app(warmup: bool = APP_WARMUP) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        started = _started(app)
+        warming = None
+        if warmup:
+            async def warm_after_start():
+                await asyncio.wait([started])
+                if not started.exception():
+                    await _warmup()
+            warming = asyncio.create_task(warm_after_start())
+        yield
+        if warming is not None:
+            warming.cancel()
+        try:
+            await started
+        except Exception as e:
+            print(f"[Startup] Startup failed, nothing to close: {e}")
+            return
+        await _stop()
+
+    app = FastAPI(
+        title="Agent Finny API",
+        description="AI-powered financial assistant backend",
+        version="0.1.0",
+        lifespan=lifespan
+    )
+
+    # CORS middleware - allow all origins for development
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"]
+    )
+    app.add_middleware(WaitForStartup)
+
+    @app.get("/")
+    def root():
+        return {
+            "service": "Agent Finny API",
+            "status": "running",
+            "docs": "/docs"
+        }
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,120 @@
+# app/merchant_memo.py
+"""
+Merchant -> category memo
+Learns categories from high-confidence LLM answers and user corrections, keyed
+by a normalized merchant name, so recurring merchants (AWS, Gusto, Google Ads)
+are categorized locally with a dict lookup instead of another LLM prompt.
+
+Persisted in the `merchant_categories` table; each workspace's memo is loaded
+once into memory and kept in an LRU with a short TTL.
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app import db
+from app.cache import LRUCache
+
+MEMO_TABLE = "merchant_categories"
+PAGE_SIZE = 1000
+UNCATEGORIZED = ["Other", "Uncategorized", ""]   # categories that still count as the backlog
+
+# Words that vary between charges from the same merchant
+_NOISE = {
+    "inc", "llc", "ltd", "co", "corp", "com", "www", "the", "pos", "debit", "credit",
+    "purchase", "payment", "pmt", "ach", "card", "online", "recurring", "autopay",
+}
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+_HAS_DIGIT = re.compile(r"\d")
+
+
+def normalize_merchant(name: Optional[str]) -> str:
+    """'AWS *EC2 12345' -> 'aws ec2'; '' when nothing stable is left"""
+    if not name:
+        return ""
+    words = _NON_ALNUM.sub(" ", name.lower()).split()
+    return " ".join(w for w in words if w not in _NOISE and not _HAS_DIGIT.search(w))
+
+
+class MerchantMemo:
+    """In-memory view of one workspace's memo"""
+
+    def __init__(self, workspace_id: str, entries: Dict[str, Dict]):
+        self.workspace_id = workspace_id
+        self.entries = entries      # merchant_key -> {"category", "source"}
+
+    def lookup(self, merchant: Optional[str]) -> Optional[str]:
+        """Remembered category, or None; an uncategorized entry is never applied"""
+        entry = self.entries.get(normalize_merchant(merchant))
+        return entry["category"] if entry and entry["category"] not in UNCATEGORIZED else None
+
+    def split(self, rows: List[Dict]) -> Tuple[List[tuple], List[Dict]]:
+        """Rows -> ([(row, category)] resolved locally, [rows that still need the LLM])"""
+        known, pending = [], []
+        for t in rows:
+            cat = self.lookup(t.get("merchant"))
+            if cat:
+                known.append((t, cat))
+            else:
+                pending.append(t)
+        return known, pending
+
+    def learn(self, answers: List[Tuple[str, str]], source: str = "llm") -> List[Dict]:
+        """
+        Record (merchant, category) pairs; user corrections always win over LLM answers
+
+        Uncategorized answers are never learned from the LLM. A user setting a
+        merchant back to one is kept only so it overrides an earlier LLM entry;
+        lookup() never applies it.
+
+        Returns:
+            Rows to persist (new or changed entries only)
+        """
+        rows = []
+        for merchant, category in answers:
+            key = normalize_merchant(merchant)
+            if not key or category is None or (category in UNCATEGORIZED and source != "user"):
+                continue
+            current = self.entries.get(key)
+            if current and current["source"] == "user" and source != "user":
+                continue
+            if current and current["category"] == category and current["source"] == source:
+                continue
+            self.entries[key] = {"category": category, "source": source}
+            rows.append({"workspace_id": self.workspace_id, "merchant_key": key,
+                         "category": category, "source": source})
+        return rows
+
+
+_memos = LRUCache(maxsize=int(os.environ.get("MERCHANT_MEMO_WORKSPACES", 256)),
+                  ttl=float(os.environ.get("MERCHANT_MEMO_TTL", 600)))
+
+
+async def load(workspace_id: str) -> MerchantMemo:
+    """Workspace memo, read from Supabase on first use"""
+    memo = _memos.get(workspace_id)
+    if memo is not None:
+        return memo
+    entries, offset = {}, 0
+    while True:
+        page = (await db.execute(db.table(MEMO_TABLE).select("merchant_key,category,source")
+            .eq("workspace_id", workspace_id)
+            .order("merchant_key").range(offset, offset + PAGE_SIZE - 1))).data or []
+        for e in page:
+            entries[e["merchant_key"]] = {"category": e["category"], "source": e["source"]}
+        if len(page) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    memo = MerchantMemo(workspace_id, entries)
+    _memos.set(workspace_id, memo)
+    return memo
+
+
+async def remember(workspace_id: str, answers: List[Tuple[str, str]], source: str = "llm") -> int:
+    """Learn and persist (merchant, category) pairs; returns entries written"""
+    memo = await load(workspace_id)
+    rows = memo.learn(answers, source)
+    if rows:
+        await db.execute(db.table(MEMO_TABLE).upsert(rows, on_conflict="workspace_id,merchant_key"))
+    return len(rows)
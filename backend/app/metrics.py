@@ -2,41 +2,44 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from datetime import date, timedelta
-from supabase import create_client
-import os
+from postgrest.exceptions import APIError
+from app import db, recurring, rollups
+from app.cache import cached_metric, bump_version, metrics_cache
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
-sb = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE"])
 
 class WS(BaseModel):
     workspace_id: str
 
-@router.post("/summary")
-def summary(req: WS):
-    rows = sb.table("transactions").select("ts,amount,category") \
-        .eq("workspace_id", req.workspace_id) \
-        .gte("ts", (date.today()-timedelta(days=180)).isoformat()) \
-        .order("ts", desc=False).execute().data
+def summary_since() -> str:
+    """First rollup month summary needs: the 180-day window or January, whichever is earlier"""
+    today = date.today()
+    return min((today-timedelta(days=180)).strftime("%Y-%m"), f"{today.year}-01")
 
-    by_month, top_map = {}, {}
+def fetch_summary_rollups(workspace_id: str) -> list:
+    return rollups.fetch(db.get_client(), workspace_id, summary_since())
+
+def compute_summary(rows: list) -> dict:
+    """Summary payload from rollup rows (see fetch_summary_rollups)"""
     today = date.today()
+    start_month = (today-timedelta(days=180)).strftime("%Y-%m")
+    this_month, this_year = today.strftime("%Y-%m"), today.strftime("%Y")
+
+    by_month, top_map = {}, {}
     mtd = {"revenue":0.0,"expense":0.0,"net":0.0}
     ytd = {"revenue":0.0,"expense":0.0,"net":0.0}
 
-    for t in rows:
-        amt = float(t["amount"])
-        ym = str(t["ts"])[:7]
-        by_month.setdefault(ym, {"revenue":0.0,"expense":0.0})
-        if amt >= 0:
-            by_month[ym]["revenue"] += amt
-            if str(t["ts"])[:7] == today.strftime("%Y-%m"): mtd["revenue"] += amt
-            if str(t["ts"])[:4] == today.strftime("%Y"):   ytd["revenue"] += amt
-        else:
-            by_month[ym]["expense"] += -amt
-            cat = t.get("category") or "Other"
-            top_map[cat] = top_map.get(cat, 0.0) + (-amt)
-            if str(t["ts"])[:7] == today.strftime("%Y-%m"): mtd["expense"] += -amt
-            if str(t["ts"])[:4] == today.strftime("%Y"):   ytd["expense"] += -amt
+    for r in rows:
+        ym, rev, exp = r["month"], float(r["revenue"]), float(r["expense"])
+        if ym == this_month:
+            mtd["revenue"] += rev; mtd["expense"] += exp
+        if ym[:4] == this_year:
+            ytd["revenue"] += rev; ytd["expense"] += exp
+        if ym < start_month:
+            continue
+        by_month[ym] = {"revenue":rev,"expense":exp}
+        for cat, c in (r.get("categories") or {}).items():
+            top_map[cat] = top_map.get(cat, 0.0) + float(c["expense"])
 
     mtd["net"] = mtd["revenue"] - mtd["expense"]
     ytd["net"] = ytd["revenue"] - ytd["expense"]
@@ -51,30 +54,94 @@ def summary(req: WS):
         "ytd": {k: round(v,2) for k,v in ytd.items()},
     }
 
-@router.post("/burn_runway")
-def burn_runway(req: WS):
-    rows = sb.table("transactions").select("ts,amount") \
-        .eq("workspace_id", req.workspace_id).execute().data
-
-    month_map = {}
-    for t in rows:
-        ym = str(t["ts"])[:7]
-        month_map.setdefault(ym, {"rev":0.0,"exp":0.0})
-        amt = float(t["amount"])
-        if amt >= 0: month_map[ym]["rev"] += amt
-        else:        month_map[ym]["exp"] += -amt
-
-    last3 = sorted(month_map.keys())[-3:]
-    burns = [(month_map[m]["exp"] - month_map[m]["rev"]) for m in last3] or [0.0]
+async def ensure_rollups(workspace_id: str) -> bool:
+    """
+    Backfill a workspace's rollups from raw transactions if it has none yet
+
+    Workspaces ingested before rollups existed are rebuilt on their first read,
+    at most once: the rebuild leaves a marker row even when there is nothing to
+    roll up. Call when a rollup read came back empty.
+
+    Returns:
+        True if the backfill ran (re-read the rollups)
+    """
+    sb = db.get_client()
+    if await db.run(rollups.has_rows, sb, workspace_id):
+        return False
+    async with rollups.workspace_lock(workspace_id):
+        if await db.run(rollups.has_rows, sb, workspace_id):
+            return False
+        months = await db.run(rollups.rebuild, sb, workspace_id)
+    print(f"[Rollups] Backfilled {months} month(s) for workspace {workspace_id}")
+    await bump_version(workspace_id)
+    return True
+
+@router.post("/summary")
+async def summary(req: WS):
+    async def compute():
+        rows = await db.run(fetch_summary_rollups, req.workspace_id)
+        if not rows and await ensure_rollups(req.workspace_id):
+            rows = await db.run(fetch_summary_rollups, req.workspace_id)
+        return compute_summary(rows)
+    return await cached_metric("summary", req.workspace_id, compute)
+
+@router.post("/rollups/rebuild")
+async def rebuild_rollups(req: WS):
+    """Backfill/repair the monthly rollups for a workspace from raw transactions"""
+    async with rollups.workspace_lock(req.workspace_id):
+        months = await db.run(rollups.rebuild, db.get_client(), req.workspace_id)
+    await bump_version(req.workspace_id)
+    return {"months": months, "workspace_id": req.workspace_id}
+
+def fetch_burn_inputs(workspace_id: str) -> dict:
+    """Last three monthly rev/exp totals plus latest cash, in one round trip when the RPC exists"""
+    sb = db.get_client()
+    try:
+        return sb.rpc("burn_runway_inputs", {"ws": workspace_id}).execute().data or {}
+    except APIError as e:
+        if e.code != "PGRST202":
+            raise
+        # RPC not deployed yet: fall back to two bounded reads (3 rollup rows + 1 snapshot)
+        months = sb.table(rollups.ROLLUP_TABLE).select("month,revenue,expense") \
+            .eq("workspace_id", workspace_id) \
+            .order("month", desc=True).limit(3).execute().data
+        snap = sb.table("cash_snapshots").select("cash") \
+            .eq("workspace_id", workspace_id) \
+            .order("as_of", desc=True).limit(1).execute().data
+        return {"months": months, "cash": snap[0]["cash"] if snap else None}
+
+def has_months(inputs: dict) -> bool:
+    """Whether burn inputs hold any real rollup month (not just the backfill marker)"""
+    return any(m["month"] != rollups.BACKFILL_MONTH for m in inputs.get("months") or [])
+
+def compute_burn(inputs: dict) -> dict:
+    """Burn/runway payload from fetch_burn_inputs output"""
+    burns = [float(m["expense"]) - float(m["revenue"]) for m in inputs.get("months") or []
+             if m["month"] != rollups.BACKFILL_MONTH] or [0.0]
     burn_avg = max(sum(burns)/len(burns), 0.0)
 
-    snap = sb.table("cash_snapshots").select("cash") \
-        .eq("workspace_id", req.workspace_id) \
-        .order("as_of", desc=True).limit(1).execute().data
-    cash = float(snap[0]["cash"]) if snap else 25000.0
+    cash = float(inputs["cash"]) if inputs.get("cash") is not None else 25000.0
     runway = (cash / burn_avg) if burn_avg > 1e-6 else None
 
     return {"burn_avg_3m": round(burn_avg,2),
             "cash": round(cash,2),
             "runway_months": (round(runway,1) if runway else "∞")}
 
+@router.post("/burn_runway")
+async def burn_runway(req: WS):
+    async def compute():
+        inputs = await db.run(fetch_burn_inputs, req.workspace_id)
+        if not has_months(inputs) and await ensure_rollups(req.workspace_id):
+            inputs = await db.run(fetch_burn_inputs, req.workspace_id)
+        return compute_burn(inputs)
+    return await cached_metric("burn_runway", req.workspace_id, compute)
+
+@router.post("/recurring")
+async def recurring_charges(req: WS):
+    """Recurring charges / subscriptions with cadence, monthly cost and price drift"""
+    return await recurring.for_workspace(req.workspace_id)
+
+@router.get("/cache")
+def cache_stats():
+    """Hit/miss counters for the metrics response cache"""
+    return metrics_cache.stats()
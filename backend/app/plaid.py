@@ -1,10 +1,17 @@
 # app/plaid.py
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import httpx
-from supabase import create_client
 import os
 from dotenv import load_dotenv
+from app import anomalies, context_index, db, rollups
+from app.cache import bump_version
+from app import jobs
+from app.jobs import Job
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,6 +20,7 @@ router = APIRouter(prefix="/plaid", tags=["plaid"])
 
 class DemoItemRequest(BaseModel):
     workspace_id: str
+    background: bool = True  # False = run inline and return the result
 
 class LinkTokenRequest(BaseModel):
     workspace_id: str
@@ -20,50 +28,333 @@ class LinkTokenRequest(BaseModel):
 class ExchangeRequest(BaseModel):
     public_token: str
     workspace_id: str
+    background: bool = True
+
+class SyncRequest(BaseModel):
+    workspace_id: str
+    item_id: Optional[str] = None  # None = every item in the workspace
+    background: bool = True
+
+ITEMS_TABLE = "plaid_items"
+SYNC_PAGE_SIZE = 500   # max `count` accepted by /transactions/sync
+MUTATION_DURING_PAGINATION = "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"
+SYNC_MAX_RESTARTS = 3
+INGEST_BATCH_SIZE = int(os.environ.get("PLAID_INGEST_BATCH", 250))  # rows per Supabase upsert
+WRITE_AHEAD = max(int(os.environ.get("PLAID_WRITE_AHEAD", 2)), 1)   # pages whose writes may be in flight
+PLAID_RAW = os.environ.get("PLAID_RAW", "full")  # "full" | "compact"
+
+# Fields kept in `raw` when PLAID_RAW=compact (drops location, counterparties, payment_meta, ...)
+RAW_FIELDS = ("transaction_id", "account_id", "amount", "iso_currency_code", "date",
+              "authorized_date", "name", "merchant_name", "category",
+              "personal_finance_category", "payment_channel", "pending")
+
+class PlaidError(HTTPException):
+    """Plaid API error; keeps Plaid's error_code so callers can react to specific failures"""
+    def __init__(self, detail: str, error_code: Optional[str] = None):
+        super().__init__(500, detail)
+        self.error_code = error_code
 
 # Lazy initialization - only access env vars when endpoint is called
 def get_plaid_config():
     return {
-        "base": "https://sandbox.plaid.com",
+        "base": os.environ.get("PLAID_BASE_URL", "https://sandbox.plaid.com"),
         "client_id": os.environ.get("PLAID_CLIENT_ID"),
         "secret": os.environ.get("PLAID_SECRET")
     }
 
-def get_supabase_client():
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_SERVICE_ROLE")
-    if not url or not key:
-        raise HTTPException(500, "Supabase credentials not configured")
-    return create_client(url, key)
+_http: Optional[httpx.AsyncClient] = None
+
+def _client() -> httpx.AsyncClient:
+    """Keep-alive client reused across the pages of a sync"""
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(timeout=60)
+    return _http
+
+async def close() -> None:
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
 
 async def _post(path, payload, config):
-    async with httpx.AsyncClient(timeout=60) as c:
-        r = await c.post(f"{config['base']}{path}", json=payload)
+    r = await _client().post(f"{config['base']}{path}", json=payload)
     if r.status_code >= 400:
-        raise HTTPException(500, f"Plaid API error: {r.text}")
+        try:
+            code = r.json().get("error_code")
+        except ValueError:
+            code = None
+        raise PlaidError(f"Plaid API error: {r.text}", code)
     return r.json()
 
-@router.post("/demo-item")
-async def demo_item(request: DemoItemRequest):
+def _compact_raw(t: Dict) -> Dict:
+    return {k: t[k] for k in RAW_FIELDS if t.get(k) is not None}
+
+def _transform(t: Dict, workspace_id: str, note: str) -> Dict:
+    """Plaid transaction -> transactions row (expenses negative)"""
+    return {
+        "id": t["transaction_id"],
+        "workspace_id": workspace_id,
+        "ts": t["date"],
+        "amount": -float(t["amount"]),
+        "category": (t.get("category") or ["Other"])[0],
+        "merchant": t.get("name"),
+        "note": note,
+        "source": "plaid",
+        "raw": _compact_raw(t) if PLAID_RAW == "compact" else t
+    }
+
+def _store_transactions(sb, workspace_id, rows):
+    """Upsert one batch; returns the rows' previous stored state for the rollup delta"""
+    previous = rollups.previous_rows(sb, workspace_id, [r["id"] for r in rows])
+    sb.table("transactions").upsert(rows).execute()
+    print(f"[Supabase] Upserted {len(rows)} transactions")
+    return previous
+
+def _remove_transactions(sb, workspace_id, ids):
+    """Delete transactions Plaid reported as removed; returns what was stored"""
+    previous = rollups.previous_rows(sb, workspace_id, ids)
+    if not previous:
+        return []
+    for i in range(0, len(ids), rollups.ID_CHUNK):
+        sb.table("transactions").delete() \
+            .eq("workspace_id", workspace_id) \
+            .in_("id", ids[i:i + rollups.ID_CHUNK]).execute()
+    print(f"[Supabase] Removed {len(previous)} transactions")
+    return previous
+
+def _apply_rollups(sb, workspace_id, deltas):
+    """Fold a sync's accumulated rollup delta into monthly_rollups"""
+    months = rollups.apply_delta(sb, workspace_id, deltas)
+    print(f"[Rollups] Updated {months} month(s) for workspace {workspace_id}")
+
+async def _save_item(workspace_id: str, item_id: str, access_token: str) -> Dict:
+    """Register an item for incremental sync; an existing cursor is kept"""
+    item = {"item_id": item_id, "workspace_id": workspace_id, "access_token": access_token}
+    await db.execute(db.table(ITEMS_TABLE).upsert(item, on_conflict="item_id"))
+    stored = (await db.execute(db.table(ITEMS_TABLE).select("item_id,workspace_id,access_token,cursor")
+        .eq("item_id", item_id))).data or []
+    return stored[0] if stored else item
+
+def _transform_page(workspace_id: str, page: Dict, note: str) -> Dict:
+    """One sync page -> transactions rows in INGEST_BATCH_SIZE batches plus removed ids"""
+    changed = page.get("added", []) + page.get("modified", [])
+    batches = [[_transform(t, workspace_id, note) for t in changed[i:i + INGEST_BATCH_SIZE]]
+               for i in range(0, len(changed), INGEST_BATCH_SIZE)]
+    return {"batches": batches, "removed_ids": [r["transaction_id"] for r in page.get("removed", [])],
+            "added": len(page.get("added", [])), "modified": len(page.get("modified", []))}
+
+async def _write_page(workspace_id: str, page: Dict, deltas: Dict) -> Dict:
+    """Write a transformed page in fixed-size batches and fold the change into `deltas`"""
+    sb = db.get_client()
+    # Batches of one page hold distinct ids, so they can be written concurrently
+    previous = await asyncio.gather(*(db.run(_store_transactions, sb, workspace_id, rows)
+                                      for rows in page["batches"]))
+    new_rows = []
+    for rows, prev in zip(page["batches"], previous):
+        rollups.delta(rows, prev, into=deltas)
+        # Rows with no stored state are new; replayed pages find theirs and are not re-scored
+        seen = {r["id"] for r in prev}
+        new_rows += [r for r in rows if r["id"] not in seen]
+    removed = []
+    if page["removed_ids"]:
+        removed = await db.run(_remove_transactions, sb, workspace_id, page["removed_ids"])
+        rollups.delta([], removed, into=deltas)
+    return {"new_rows": new_rows, "changed": [r for rows in page["batches"] for r in rows],
+            "removed_ids": page["removed_ids"],
+            "counts": {"added": page["added"], "modified": page["modified"], "removed": len(removed)}}
+
+async def _after_page(workspace_id: str, written: Dict) -> Dict:
+    """Anomaly scoring of a written page, off the write path"""
+    flagged = await anomalies.observe(workspace_id, written["new_rows"])
+    if written["removed_ids"]:
+        await anomalies.forget(workspace_id, written["removed_ids"])
+    return {"anomalies": flagged}
+
+async def _queue_context_index(workspace_id: str, transaction_ids: List[str]) -> Optional[str]:
+    """Index a sync's transactions as a separate job; returns its job id (None if not queued)"""
+    try:
+        queued = await jobs.dispatch("context.index", workspace_id, True,
+                                     lambda job: context_index.index_synced(job, workspace_id, transaction_ids))
+    except HTTPException as e:
+        print(f"[Plaid] Context indexing for workspace {workspace_id} not queued: {e.detail}")
+        return None
+    return queued["job_id"]
+
+async def _sync_pages(
+    config: Dict,
+    item: Dict,
+    note: str,
+    on_progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
     """
-    Create a Plaid sandbox item and seed transactions into Supabase.
-    
-    This endpoint:
-    1. Creates a fake bank connection using Plaid sandbox
-    2. Exchanges public token for access token
-    3. Fetches mock transactions
-    4. Inserts transactions into Supabase
-    
-    Returns: {"inserted": count, "workspace_id": id}
+    Pull added/modified/removed transactions since the item's stored cursor,
+    apply them, then persist the new cursor
+
+    Streams as a pipeline: while the next page is fetched and transformed, up
+    to WRITE_AHEAD earlier pages are being written, and anomaly scoring runs
+    one page behind the writes. At most WRITE_AHEAD + 3
+    pages are held in memory regardless of how much history the item has.
+    Pages sharing a transaction id are never written concurrently. Rollup
+    changes are accumulated per month and applied once at the end (also when
+    the sync fails part-way, after the writes in flight have landed, so rows
+    that were written are never missing from the rollups). Writes are
+    idempotent upserts/deletes with deltas against the stored rows, so a
+    restart after Plaid reports a mutation during pagination can safely replay
+    pages from the old cursor. The cursor is only advanced once every page is
+    stored and scored. With context indexing enabled, the ids of every changed
+    or removed transaction are collected and indexed by a context.index job
+    queued once the cursor is saved.
+
+    Runs under the workspace lock (see _sync_item).
+
+    Args:
+        on_progress: Called with the running totals after every page
+
+    Returns:
+        {"item_id", "added", "modified", "removed", "anomalies", "pages", "index_job"}
+    """
+    workspace_id = item["workspace_id"]
+    print(f"[Plaid] Syncing item {item['item_id']} (cursor: {'initial' if not item.get('cursor') else 'stored'})...")
+
+    def fetch(cursor):
+        payload = {
+            "client_id": config["client_id"],
+            "secret": config["secret"],
+            "access_token": item["access_token"],
+            "count": SYNC_PAGE_SIZE
+        }
+        if cursor:
+            payload["cursor"] = cursor
+        return asyncio.create_task(_post("/transactions/sync", payload, config))
+
+    deltas = {}
+    writes = deque()    # (transaction ids, write task) per page, oldest first
+    after = None        # follow-up task of the newest written page
+    followups = {"anomalies": 0}
+    touched = set()     # transaction ids for the context.index job
+
+    async def settle_after():
+        nonlocal after
+        if after is not None:
+            task, after = after, None
+            for k, v in (await task).items():
+                followups[k] += v
+
+    async def finish_oldest(totals):
+        nonlocal after
+        _, task = writes.popleft()
+        written = await task
+        for k, v in written["counts"].items():
+            totals[k] += v
+        totals["pages"] += 1
+        if context_index.INDEX_TRANSACTIONS:
+            touched.update(r["id"] for r in written["changed"])
+            touched.update(written["removed_ids"])
+        # One follow-up in flight: page k is scored while page k+1 is written
+        await settle_after()
+        after = asyncio.create_task(_after_page(workspace_id, written))
+        if on_progress:
+            on_progress(dict(totals))
+
+    try:
+        for attempt in range(SYNC_MAX_RESTARTS + 1):
+            totals = {"added": 0, "modified": 0, "removed": 0, "pages": 0}
+            pending = fetch(item.get("cursor"))
+            try:
+                while pending is not None:
+                    page = await pending
+                    pending = fetch(page["next_cursor"]) if page.get("has_more") else None
+                    next_cursor = page["next_cursor"]
+                    transformed = _transform_page(workspace_id, page, note)
+                    del page
+                    ids = {r["id"] for rows in transformed["batches"] for r in rows}
+                    ids.update(transformed["removed_ids"])
+                    while writes and (len(writes) >= WRITE_AHEAD or any(ids & w for w, _ in writes)):
+                        await finish_oldest(totals)
+                    writes.append((ids, asyncio.create_task(_write_page(workspace_id, transformed, deltas))))
+                    del transformed
+                while writes:
+                    await finish_oldest(totals)
+                await settle_after()
+            except PlaidError as e:
+                if e.error_code != MUTATION_DURING_PAGINATION or attempt == SYNC_MAX_RESTARTS:
+                    raise
+                print(f"[Plaid] Item changed during pagination, restarting sync (attempt {attempt + 2})")
+                while writes:
+                    await finish_oldest(totals)
+                continue
+            finally:
+                if pending is not None and not pending.done():
+                    pending.cancel()
+            break
+    finally:
+        # Writes already sent must land (and be folded into `deltas`) before the rollups are applied
+        await asyncio.gather(*(task for _, task in writes), return_exceptions=True)
+        if after is not None:
+            await asyncio.gather(after, return_exceptions=True)
+        if deltas:
+            await db.run(_apply_rollups, db.get_client(), workspace_id, deltas)
+            await bump_version(workspace_id)
+
+    await db.execute(db.table(ITEMS_TABLE).update({
+        "cursor": next_cursor,
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }).eq("item_id", item["item_id"]))
+    print(f"[Plaid] Synced item {item['item_id']}: {totals['added']} added, "
+          f"{totals['modified']} modified, {totals['removed']} removed in {totals['pages']} page(s)")
+    index_job = await _queue_context_index(workspace_id, sorted(touched)) if touched else None
+    return {"item_id": item["item_id"], **totals, **followups, "index_job": index_job}
+
+
+async def _sync_item(
+    config: Dict,
+    item: Dict,
+    note: str,
+    on_progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Sync one item while holding the workspace lock
+
+    Syncs of the same workspace (webhooks, manual syncs, a link finishing)
+    queue here instead of interleaving their previous-row reads, rollup deltas
+    and anomaly baseline updates. A queued sync that starts from an older
+    cursor replays pages, which the idempotent writes make harmless.
     """
-    workspace_id = request.workspace_id
+    lock = rollups.workspace_lock(item["workspace_id"])
+    if lock.locked():
+        print(f"[Plaid] Waiting for another sync of workspace {item['workspace_id']} to finish...")
+    async with lock:
+        return await _sync_pages(config, item, note, on_progress)
+
+async def _fire_sandbox_webhook(config: Dict, access_token: str) -> None:
+    try:
+        await _post("/sandbox/item/fire_webhook", {
+            "client_id": config["client_id"],
+            "secret": config["secret"],
+            "access_token": access_token,
+            "webhook_code": "DEFAULT_UPDATE"
+        }, config)
+    except Exception:
+        pass  # Webhook may not be configured, that's okay
+
+def _sync_response(workspace_id: str, result: Dict) -> Dict:
+    return {"inserted": result["added"] + result["modified"], "workspace_id": workspace_id, **result}
+
+def _track_rows(job: Job, offset: int = 0) -> Callable[[Dict], None]:
+    return lambda totals: job.progress(offset + totals["added"] + totals["modified"] + totals["removed"])
+
+def _require_config() -> Dict:
     config = get_plaid_config()
     if not config["client_id"] or not config["secret"]:
         raise HTTPException(500, "Plaid credentials not configured. Set PLAID_CLIENT_ID and PLAID_SECRET in .env")
-    
-    sb = get_supabase_client()
-    
+    return config
+
+async def _run_demo_item(job: Job, config: Dict) -> Dict:
+    workspace_id = job.workspace_id
+
     # 1) make a fake bank connection (public_token) with custom user for instant transactions
+    job.enter("public_token")
     print(f"[Plaid] Creating sandbox public token for workspace {workspace_id}...")
     pub = await _post("/sandbox/public_token/create", {
         "client_id": config["client_id"],
@@ -75,62 +366,79 @@ async def demo_item(request: DemoItemRequest):
             "override_password": "pass_good"
         }
     }, config)
-    
-    # 2) exchange for access_token
+
+    # 2) exchange for access_token and remember the item for later syncs
+    job.enter("exchange")
     print("[Plaid] Exchanging public token for access token...")
     exch = await _post("/item/public_token/exchange", {
         "client_id": config["client_id"],
         "secret": config["secret"],
         "public_token": pub["public_token"]
     }, config)
-    access_token = exch["access_token"]
-    
+    item = await _save_item(workspace_id, exch["item_id"], exch["access_token"])
+
     # 3) Fire transactions to populate sandbox data
+    job.enter("webhook")
     print("[Plaid] Firing sandbox transactions webhook...")
-    try:
-        await _post("/sandbox/item/fire_webhook", {
-            "client_id": config["client_id"],
-            "secret": config["secret"],
-            "access_token": access_token,
-            "webhook_code": "DEFAULT_UPDATE"
-        }, config)
-    except:
-        pass  # Webhook may not be configured, that's okay
-    
-    # 4) fetch mock transactions (last ~120d)
-    print("[Plaid] Fetching transactions...")
-    tx = await _post("/transactions/get", {
+    await _fire_sandbox_webhook(config, exch["access_token"])
+
+    # 4) sync everything since the item's cursor → Supabase
+    job.enter("sync")
+    result = await _sync_item(config, item, "Plaid sandbox", _track_rows(job))
+    return _sync_response(workspace_id, result)
+
+async def _run_exchange(job: Job, config: Dict, public_token: str) -> Dict:
+    # 1) Exchange public token for access token
+    job.enter("exchange")
+    print(f"[Plaid] Exchanging public token for workspace {job.workspace_id}...")
+    exch = await _post("/item/public_token/exchange", {
         "client_id": config["client_id"],
         "secret": config["secret"],
-        "access_token": access_token,
-        "start_date": "2024-01-01",
-        "end_date": "2025-10-31",
-        "options": {"count": 500}
+        "public_token": public_token
     }, config)
+    item = await _save_item(job.workspace_id, exch["item_id"], exch["access_token"])
+
+    # 2) Fire webhook to populate sandbox data (if sandbox)
+    job.enter("webhook")
+    await _fire_sandbox_webhook(config, exch["access_token"])
+
+    # 3) Sync transactions
+    job.enter("sync")
+    result = await _sync_item(config, item, "Plaid Link", _track_rows(job))
+    return _sync_response(job.workspace_id, result)
+
+async def _run_sync(job: Job, config: Dict, items: List[Dict]) -> Dict:
+    job.enter("sync")
+    results = []
+    for item in items:
+        results.append(await _sync_item(config, item, "Plaid sync", _track_rows(job, job.rows_processed)))
+    return {
+        "workspace_id": job.workspace_id,
+        "added": sum(r["added"] for r in results),
+        "modified": sum(r["modified"] for r in results),
+        "removed": sum(r["removed"] for r in results),
+        "anomalies": sum(r["anomalies"] for r in results),
+        "items": results
+    }
+
+@router.post("/demo-item")
+async def demo_item(request: DemoItemRequest):
+    """
+    Create a Plaid sandbox item and seed transactions into Supabase.
     
-    # 5) transform → insert into Supabase
-    rows = []
-    for t in tx.get("transactions", []):
-        amt = -float(t["amount"])  # expenses negative
-        cat = (t.get("category") or ["Other"])[0]
-        rows.append({
-            "id": t["transaction_id"],
-            "workspace_id": workspace_id,
-            "ts": t["date"],
-            "amount": amt,
-            "category": cat,
-            "merchant": t.get("name"),
-            "note": "Plaid sandbox",
-            "source": "plaid",
-            "raw": t
-        })
-    
-    if rows:
-        print(f"[Supabase] Inserting {len(rows)} transactions...")
-        sb.table("transactions").upsert(rows).execute()
-        print(f"✓ Successfully inserted {len(rows)} transactions")
+    This endpoint:
+    1. Creates a fake bank connection using Plaid sandbox
+    2. Exchanges public token for access token
+    3. Syncs all transactions via /transactions/sync (paginated, cursor stored)
+    4. Inserts transactions into Supabase
     
-    return {"inserted": len(rows), "workspace_id": workspace_id}
+    Runs as a background job by default; poll GET /plaid/jobs/{job_id}.
+    Returns: {"job_id", "status", "workspace_id"}, or with background=false
+    {"inserted", "workspace_id", "item_id", "added", "modified", "removed"}
+    """
+    config = _require_config()
+    return await jobs.dispatch("plaid.demo_item", request.workspace_id, request.background,
+                           lambda job: _run_demo_item(job, config))
 
 @router.post("/link-token")
 async def link_token(request: LinkTokenRequest):
@@ -160,67 +468,40 @@ async def link_token(request: LinkTokenRequest):
 @router.post("/exchange")
 async def exchange(request: ExchangeRequest):
     """
-    Exchange Plaid public_token for access_token and fetch transactions.
+    Exchange Plaid public_token for access_token and sync transactions.
     Called after user successfully connects their bank via Plaid Link.
+    Runs as a background job by default; poll GET /plaid/jobs/{job_id}.
     """
-    config = get_plaid_config()
-    if not config["client_id"] or not config["secret"]:
-        raise HTTPException(500, "Plaid credentials not configured")
-    
-    sb = get_supabase_client()
-    
-    # 1) Exchange public token for access token
-    print(f"[Plaid] Exchanging public token for workspace {request.workspace_id}...")
-    exch = await _post("/item/public_token/exchange", {
-        "client_id": config["client_id"],
-        "secret": config["secret"],
-        "public_token": request.public_token
-    }, config)
-    access_token = exch["access_token"]
-    
-    # 2) Fire webhook to populate sandbox data (if sandbox)
-    try:
-        await _post("/sandbox/item/fire_webhook", {
-            "client_id": config["client_id"],
-            "secret": config["secret"],
-            "access_token": access_token,
-            "webhook_code": "DEFAULT_UPDATE"
-        }, config)
-    except:
-        pass
-    
-    # 3) Fetch transactions
-    print("[Plaid] Fetching transactions...")
-    tx = await _post("/transactions/get", {
-        "client_id": config["client_id"],
-        "secret": config["secret"],
-        "access_token": access_token,
-        "start_date": "2024-01-01",
-        "end_date": "2025-10-31",
-        "options": {"count": 500}
-    }, config)
-    
-    # 4) Transform and insert into Supabase
-    rows = []
-    for t in tx.get("transactions", []):
-        amt = -float(t["amount"])
-        cat = (t.get("category") or ["Other"])[0]
-        rows.append({
-            "id": t["transaction_id"],
-            "workspace_id": request.workspace_id,
-            "ts": t["date"],
-            "amount": amt,
-            "category": cat,
-            "merchant": t.get("name"),
-            "note": "Plaid Link",
-            "source": "plaid",
-            "raw": t
-        })
+    config = _require_config()
+    return await jobs.dispatch("plaid.exchange", request.workspace_id, request.background,
+                           lambda job: _run_exchange(job, config, request.public_token))
+
+@router.post("/sync")
+async def sync(request: SyncRequest):
+    """
+    Incremental refresh: pull only what changed since each item's stored cursor.
     
-    if rows:
-        print(f"[Supabase] Inserting {len(rows)} transactions...")
-        sb.table("transactions").upsert(rows).execute()
-        print(f"✓ Successfully inserted {len(rows)} transactions")
+    Returns: {"workspace_id", "added", "modified", "removed", "items": [...]}
+    (as the job result when run in the background)
+    """
+    config = _require_config()
+    query = db.table(ITEMS_TABLE).select("item_id,workspace_id,access_token,cursor") \
+        .eq("workspace_id", request.workspace_id)
+    if request.item_id:
+        query = query.eq("item_id", request.item_id)
+    items = (await db.execute(query)).data or []
+    if not items:
+        raise HTTPException(404, "No Plaid items connected for this workspace")
     
-    return {"inserted": len(rows), "workspace_id": request.workspace_id}
+    return await jobs.dispatch("plaid.sync", request.workspace_id, request.background,
+                           lambda job: _run_sync(job, config, items))
 
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """
+    Status of a background ingestion job
+    
+    Returns: {"job_id", "status", "stage", "rows_processed", "stages": [{"stage", "ms"}],
+              "elapsed_ms", "result", "error", ...}
+    """
+    return await jobs.status(job_id)
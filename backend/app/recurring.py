@@ -0,0 +1,235 @@
+# app/recurring.py
+"""
+Recurring charge / subscription detector
+Groups expenses by normalized merchant with one sort over their columns,
+then derives every per-merchant statistic (charge gaps, cadence, regularity,
+amount spread and drift) with segment-wise NumPy ops, so a million-row ledger
+is a handful of array passes rather than a Python loop per merchant.
+"""
+
+import asyncio
+import os
+from datetime import date, timedelta
+from itertools import compress
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app import db
+from app.cache import cached_metric, peek_metric
+from app.ledger import parse_days
+from app.merchant_memo import normalize_merchant
+
+PAGE_SIZE = 1000
+LOOKBACK_DAYS = int(os.environ.get("RECURRING_LOOKBACK_DAYS", 730))
+MIN_OCCURRENCES = 3
+MIN_REGULARITY = 0.7    # share of gaps that must sit on the detected cadence
+MAX_SPREAD = 0.25       # mean |amount - median| / median; tolerates a price change
+DRIFT_FLAG = 0.05       # |latest vs median| that counts as a price change
+
+_warming: Dict[str, asyncio.Task] = {}   # background detections in flight, per workspace
+
+# name, period in days, tolerance in days
+CADENCES = [
+    ("weekly", 7.0, 2.0),
+    ("biweekly", 14.0, 3.0),
+    ("monthly", 30.44, 5.0),
+    ("quarterly", 91.3, 12.0),
+    ("annual", 365.25, 25.0),
+]
+_PERIODS = np.array([c[1] for c in CADENCES])
+_TOLERANCES = np.array([c[2] for c in CADENCES])
+
+
+def merchant_codes(merchants: List[Optional[str]]) -> Tuple[List[str], np.ndarray]:
+    """
+    Factorize raw merchant names into normalized merchant codes
+
+    normalize_merchant runs once per distinct raw name, not once per row.
+
+    Returns:
+        (normalized keys, int64 code per row); rows without a stable name get -1
+    """
+    # dict.fromkeys/map keep the per-row work in C; Python only loops over distinct names
+    raw_codes: Dict[Optional[str], int] = dict.fromkeys(merchants)
+    keys: Dict[str, int] = {}
+    raw_to_key = np.empty(len(raw_codes), np.int64)
+    for i, name in enumerate(raw_codes):
+        raw_codes[name] = i
+        key = normalize_merchant(name)
+        raw_to_key[i] = keys.setdefault(key, len(keys)) if key else -1
+    raw_idx = np.fromiter(map(raw_codes.__getitem__, merchants), np.int64, len(merchants))
+    return list(keys), raw_to_key[raw_idx]
+
+
+def _segment_median(values: np.ndarray, group: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Lower median of `values` per group; groups are contiguous and sorted by id"""
+    order = np.lexsort((values, group))
+    return values[order][starts + (counts - 1) // 2]
+
+
+def detect(rows: List[Dict], as_of: Optional[date] = None) -> List[Dict]:
+    """
+    Find recurring expenses in fetched transaction rows
+
+    Only the expense rows' ts and merchant are read, one field at a time via
+    C-level maps, straight into the sorted arrays the detection works on.
+
+    Args:
+        rows: Rows with ts, amount, merchant and category (see fetch_history)
+        as_of: Reference day for `active`/`next_expected` (default today)
+
+    Returns:
+        One dict per recurring merchant, largest monthly cost first
+    """
+    as_of = as_of or date.today()
+    if not rows:
+        return []
+    cents = np.rint(np.fromiter(map(itemgetter("amount"), rows), np.float64, len(rows)) * -100).astype(np.int64)
+    expense = np.flatnonzero(cents > 0).tolist()
+    if not expense:
+        return []
+    picked = list(map(rows.__getitem__, expense))
+    keys, code = merchant_codes(list(map(itemgetter("merchant"), picked)))
+    named = code >= 0
+    if not named.any():
+        return []
+
+    src = np.array(expense, dtype=np.int64)[named]
+    code = code[named]
+    day = parse_days(list(map(itemgetter("ts"), compress(picked, named.tolist())))).astype(np.int64)
+    cents = cents[src]
+
+    # Sort by (merchant, day) and fold same-day charges into one
+    order = np.lexsort((day, code))
+    code, day, cents, src = code[order], day[order], cents[order], src[order]
+    first = np.r_[True, (code[1:] != code[:-1]) | (day[1:] != day[:-1])]
+    starts = np.flatnonzero(first)
+    cents = np.add.reduceat(cents, starts)
+    code, day, src = code[starts], day[starts], src[np.r_[starts[1:], len(first)] - 1]
+
+    # Merchant segments
+    g_start = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+    g_count = np.diff(np.r_[g_start, len(code)])
+    g_end = g_start + g_count - 1
+    group = np.repeat(np.arange(len(g_start)), g_count)
+
+    # Charge gaps within each merchant
+    same = code[1:] == code[:-1]
+    gaps = np.diff(day)[same].astype(np.float64)
+    gap_group = group[1:][same]
+    n_gaps = g_count - 1
+    has_gaps = n_gaps > 0
+    gap_start = np.r_[0, np.cumsum(n_gaps)[:-1]]
+    median_gap = np.zeros(len(g_start))
+    if len(gaps):
+        median_gap[has_gaps] = _segment_median(gaps, gap_group, gap_start[has_gaps], n_gaps[has_gaps])
+
+    # Nearest cadence to the median gap, if within its tolerance
+    dist = np.abs(median_gap[:, None] - _PERIODS[None, :])
+    cadence = np.argmin(dist, axis=1)
+    on_cadence = dist[np.arange(len(g_start)), cadence] <= _TOLERANCES[cadence]
+    period, tol = _PERIODS[cadence], _TOLERANCES[cadence]
+
+    # Regularity: share of this merchant's gaps that sit on its cadence
+    hits = np.abs(gaps - period[gap_group]) <= tol[gap_group]
+    regular = np.bincount(gap_group, weights=hits.astype(np.float64), minlength=len(g_start))
+    regularity = np.divide(regular, n_gaps, out=np.zeros(len(g_start)), where=has_gaps)
+
+    # Amount level, spread and drift of the latest charge
+    median_amt = _segment_median(cents, group, g_start, g_count).astype(np.float64)
+    abs_dev = np.abs(cents - median_amt[group])
+    spread = np.bincount(group, weights=abs_dev, minlength=len(g_start)) / g_count / np.maximum(median_amt, 1)
+    last_amt = cents[g_end].astype(np.float64)
+    drift = (last_amt - median_amt) / np.maximum(median_amt, 1)
+
+    recurring = (g_count >= MIN_OCCURRENCES) & on_cadence & (regularity >= MIN_REGULARITY) & (spread <= MAX_SPREAD)
+
+    today = np.datetime64(as_of, "D").astype(np.int64)
+    out = []
+    for g in np.flatnonzero(recurring):
+        last_day = int(day[g_end[g]])
+        last_row = rows[int(src[g_end[g]])]
+        per = float(period[g])
+        out.append({
+            "merchant": last_row["merchant"],
+            "merchant_key": keys[int(code[g_start[g]])],
+            "category": last_row.get("category") or "Other",
+            "cadence": CADENCES[int(cadence[g])][0],
+            "interval_days": float(median_gap[g]),
+            "occurrences": int(g_count[g]),
+            "regularity": round(float(regularity[g]), 2),
+            "amount": round(last_amt[g] / 100, 2),
+            "median_amount": round(median_amt[g] / 100, 2),
+            "drift_pct": round(float(drift[g]) * 100, 1),
+            "price_change": bool(abs(drift[g]) >= DRIFT_FLAG),
+            "monthly_cost": round(last_amt[g] / 100 * 30.44 / per, 2),
+            "first_charge": str(np.datetime64(int(day[g_start[g]]), "D")),
+            "last_charge": str(np.datetime64(last_day, "D")),
+            "next_expected": str(np.datetime64(last_day + int(round(per)), "D")),
+            "active": bool(today - last_day <= per + 2 * float(tol[g])),
+        })
+    out.sort(key=lambda r: -r["monthly_cost"])
+    return out
+
+
+def summarize(found: List[Dict], as_of: Optional[date] = None) -> Dict:
+    """Endpoint payload: active subscriptions plus totals"""
+    active = [r for r in found if r["active"]]
+    return {
+        "as_of": (as_of or date.today()).isoformat(),
+        "recurring": found,
+        "active_count": len(active),
+        "monthly_total": round(sum(r["monthly_cost"] for r in active), 2),
+        "price_changes": [r["merchant"] for r in active if r["price_change"]],
+    }
+
+
+def fetch_history(workspace_id: str, since: str) -> List[Dict]:
+    """Expense rows' columns since `since` (ISO date), paginated past the PostgREST cap"""
+    sb, rows, offset = db.get_client(), [], 0
+    while True:
+        page = sb.table("transactions").select("ts,amount,category,merchant") \
+            .eq("workspace_id", workspace_id) \
+            .gte("ts", since) \
+            .lt("amount", 0) \
+            .order("ts").order("id").range(offset, offset + PAGE_SIZE - 1).execute().data or []
+        rows += page
+        if len(page) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return rows
+
+
+async def for_workspace(workspace_id: str) -> Dict:
+    """Recurring charges for a workspace; cached until its transactions change"""
+    async def compute():
+        today = date.today()
+        since = (today - timedelta(days=LOOKBACK_DAYS)).isoformat()
+        rows = await db.run(fetch_history, workspace_id, since)
+        return summarize(detect(rows, today), today)
+    return await cached_metric("recurring", workspace_id, compute)
+
+
+async def _warm(workspace_id: str) -> None:
+    try:
+        await for_workspace(workspace_id)
+    except Exception as e:
+        print(f"[Recurring] Background detection failed for workspace {workspace_id}: {e}")
+
+
+async def cached(workspace_id: str) -> Optional[Dict]:
+    """
+    Recurring charges only if already cached for the current data version
+
+    On a miss the detection (a LOOKBACK_DAYS history scan) is started in the
+    background, at most once per workspace at a time, and None is returned,
+    so agent requests never wait for it.
+    """
+    found = await peek_metric("recurring", workspace_id)
+    if found is None and workspace_id not in _warming:
+        task = asyncio.create_task(_warm(workspace_id))
+        _warming[workspace_id] = task
+        task.add_done_callback(lambda _: _warming.pop(workspace_id, None))
+    return found
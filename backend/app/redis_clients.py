@@ -0,0 +1,74 @@
+# app/redis_clients.py
+"""
+Shared Redis connections
+Every Redis user builds its clients from REDIS_HOST/REDIS_PORT/REDIS_PASSWORD
+here. The optional ones (metrics versions, job snapshots, LLM and embedding
+caches) go through OptionalRedis: a lazily created client with short socket
+timeouts that an env flag can switch off, and that is skipped for
+REDIS_RETRY_S after a failure, so an unreachable Redis costs one timeout per
+30 s instead of one per request.
+"""
+
+import os
+import time
+from typing import Dict, Optional, Union
+
+import redis
+import redis.asyncio as aioredis
+
+REDIS_RETRY_S = 30.0        # skip Redis this long after a failure
+OPTIONAL_TIMEOUT_S = 0.5    # socket and connect timeout for optional clients
+
+
+def connection_options(**overrides) -> Dict:
+    """Connection kwargs for redis.Redis / redis.asyncio.Redis / their pools"""
+    return {
+        "host": os.environ.get("REDIS_HOST", "localhost"),
+        "port": int(os.environ.get("REDIS_PORT", 6379)),
+        "password": os.environ.get("REDIS_PASSWORD"),
+        **overrides,
+    }
+
+
+class OptionalRedis:
+    """
+    One lazily created client for a feature that works without Redis
+
+    Args:
+        flag: Env var that disables Redis for the feature when set to "0"
+        tag: Log prefix, e.g. "[Cache]"
+        fallback: What the feature does meanwhile, for the failure log line
+        sync: Blocking redis.Redis instead of redis.asyncio
+    """
+
+    def __init__(self, flag: str, tag: str, fallback: str, sync: bool = False):
+        self.flag = flag
+        self.tag = tag
+        self.fallback = fallback
+        self.sync = sync
+        self._client: Optional[Union[redis.Redis, aioredis.Redis]] = None
+        self._retry_at = 0.0
+
+    def get(self) -> Optional[Union[redis.Redis, aioredis.Redis]]:
+        """The client, or None while disabled or backing off after a failure"""
+        if os.environ.get(self.flag, "1") == "0" or time.monotonic() < self._retry_at:
+            return None
+        if self._client is None:
+            factory = redis.Redis if self.sync else aioredis.Redis
+            self._client = factory(**connection_options(socket_timeout=OPTIONAL_TIMEOUT_S,
+                                                        socket_connect_timeout=OPTIONAL_TIMEOUT_S))
+        return self._client
+
+    def failed(self, action: str, e: Exception) -> None:
+        """Record a failed call: skip Redis for REDIS_RETRY_S"""
+        self._retry_at = time.monotonic() + REDIS_RETRY_S
+        print(f"{self.tag} Redis {action} failed, {self.fallback} for {REDIS_RETRY_S:.0f}s: {e}")
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is None:
+            return
+        if self.sync:
+            client.close()
+        else:
+            await client.aclose()
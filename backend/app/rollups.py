@@ -0,0 +1,173 @@
+# app/rollups.py
+"""
+Per-month transaction rollups
+Keeps one aggregate row per (workspace, month) so metrics read a handful of
+rows instead of re-scanning raw transactions on every dashboard load.
+
+Deltas are added by the apply_rollup_deltas RPC (one atomic upsert that adds
+onto the stored values). Writers of a workspace's derived data (Plaid syncs,
+the categorizer, rebuilds) also serialize on workspace_lock, which covers
+the read-then-write steps around it (previous_rows -> upsert, anomaly
+baselines) and the read-modify-write fallback used until the RPC is deployed.
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+from weakref import WeakValueDictionary
+
+from postgrest.exceptions import APIError
+
+from app.ledger import Ledger
+
+ROLLUP_TABLE = "monthly_rollups"
+ID_CHUNK = 200      # ids per `in_` filter when looking up previous rows
+PAGE_SIZE = 1000    # PostgREST default max rows per request
+BACKFILL_MONTH = "0000-00"   # marker row written by rebuild(); sorts before every real month
+
+_locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+
+
+def workspace_lock(workspace_id: str) -> asyncio.Lock:
+    """Lock held while a workspace's transactions and derived data are rewritten (per process)"""
+    lock = _locks.get(workspace_id)
+    if lock is None:
+        lock = _locks[workspace_id] = asyncio.Lock()
+    return lock
+
+
+def _accumulate(buckets: Dict, rows: Iterable[Dict], sign: int = 1) -> Dict:
+    """Fold transaction rows into month buckets (sign=-1 removes their contribution)"""
+    for month, b in Ledger.from_rows(list(rows)).month_buckets(sign).items():
+        if month not in buckets:
+            buckets[month] = b
+            continue
+        acc = buckets[month]
+        acc["revenue"] += b["revenue"]
+        acc["expense"] += b["expense"]
+        acc["txn_count"] += b["txn_count"]
+        for cat, d in b["categories"].items():
+            c = acc["categories"].setdefault(cat, {"expense": 0.0, "count": 0})
+            c["expense"] += d["expense"]
+            c["count"] += d["count"]
+    return buckets
+
+
+def _merge(base: Dict, delta: Dict) -> Dict:
+    """Add a delta bucket onto a stored rollup row"""
+    out = {
+        "revenue": float(base.get("revenue") or 0) + delta["revenue"],
+        "expense": float(base.get("expense") or 0) + delta["expense"],
+        "txn_count": int(base.get("txn_count") or 0) + delta["txn_count"],
+        "categories": {k: dict(v) for k, v in (base.get("categories") or {}).items()},
+    }
+    for cat, d in delta["categories"].items():
+        c = out["categories"].setdefault(cat, {"expense": 0.0, "count": 0})
+        c["expense"] = float(c["expense"]) + d["expense"]
+        c["count"] = int(c["count"]) + d["count"]
+    out["categories"] = {
+        k: {"expense": round(v["expense"], 2), "count": v["count"]}
+        for k, v in out["categories"].items() if v["count"] > 0
+    }
+    out["revenue"] = round(out["revenue"], 2)
+    out["expense"] = round(out["expense"], 2)
+    return out
+
+
+def previous_rows(sb, workspace_id: str, ids: List[str]) -> List[Dict]:
+    """Fetch the stored state of transactions that are about to be overwritten"""
+    found = []
+    for i in range(0, len(ids), ID_CHUNK):
+        found += sb.table("transactions").select("id,ts,amount,category") \
+            .eq("workspace_id", workspace_id) \
+            .in_("id", ids[i:i + ID_CHUNK]).execute().data or []
+    return found
+
+
+def delta(new_rows: List[Dict], old_rows: List[Dict] = (), into: Optional[Dict] = None) -> Dict:
+    """
+    Month buckets for a write: +new_rows, -old_rows
+
+    Pass `into` to keep folding batches into one delta (its size is bounded by
+    months x categories, not by rows).
+    """
+    deltas = _accumulate({} if into is None else into, new_rows, 1)
+    return _accumulate(deltas, old_rows, -1)
+
+
+def apply_delta(sb, workspace_id: str, deltas: Dict) -> int:
+    """Add month deltas (from delta()) onto the stored rollup rows; returns months touched"""
+    if not deltas:
+        return 0
+    try:
+        sb.rpc("apply_rollup_deltas", {"ws": workspace_id, "deltas": deltas}).execute()
+        return len(deltas)
+    except APIError as e:
+        if e.code != "PGRST202":
+            raise
+        # RPC not deployed yet: read-modify-write, safe only under workspace_lock
+
+    existing = sb.table(ROLLUP_TABLE).select("*") \
+        .eq("workspace_id", workspace_id) \
+        .in_("month", list(deltas.keys())).execute().data or []
+    stored = {r["month"]: r for r in existing}
+
+    sb.table(ROLLUP_TABLE).upsert([
+        {"workspace_id": workspace_id, "month": month, **_merge(stored.get(month, {}), d)}
+        for month, d in deltas.items()
+    ], on_conflict="workspace_id,month").execute()
+    return len(deltas)
+
+
+def apply(sb, workspace_id: str, new_rows: List[Dict], old_rows: List[Dict] = ()) -> int:
+    """
+    Incrementally update rollups after transactions were written
+
+    Args:
+        new_rows: Rows as they are stored now
+        old_rows: Rows as they were stored before the write (from previous_rows)
+
+    Returns:
+        Number of month rows touched
+    """
+    return apply_delta(sb, workspace_id, delta(new_rows, old_rows))
+
+
+def has_rows(sb, workspace_id: str) -> bool:
+    """Whether the workspace has rollups (or the rebuild marker) at all"""
+    return bool(sb.table(ROLLUP_TABLE).select("month")
+                .eq("workspace_id", workspace_id).limit(1).execute().data)
+
+
+def rebuild(sb, workspace_id: str) -> int:
+    """
+    Recompute all rollups for a workspace from raw transactions (backfill/repair)
+
+    Also writes the BACKFILL_MONTH marker, so a workspace without transactions
+    is not backfilled again on every read.
+    """
+    buckets, offset = {}, 0
+    while True:
+        page = sb.table("transactions").select("ts,amount,category") \
+            .eq("workspace_id", workspace_id) \
+            .order("id").range(offset, offset + PAGE_SIZE - 1).execute().data or []
+        _accumulate(buckets, page)
+        if len(page) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+
+    sb.table(ROLLUP_TABLE).delete().eq("workspace_id", workspace_id).execute()
+    marker = {"workspace_id": workspace_id, "month": BACKFILL_MONTH,
+              "revenue": 0, "expense": 0, "txn_count": 0, "categories": {}}
+    sb.table(ROLLUP_TABLE).upsert([marker] + [
+        {"workspace_id": workspace_id, "month": month, **_merge({}, b)}
+        for month, b in buckets.items()
+    ], on_conflict="workspace_id,month").execute()
+    return len(buckets)
+
+
+def fetch(sb, workspace_id: str, since_month: str) -> List[Dict]:
+    """Read rollup rows for months >= since_month ('YYYY-MM'), oldest first"""
+    return sb.table(ROLLUP_TABLE).select("month,revenue,expense,txn_count,categories") \
+        .eq("workspace_id", workspace_id) \
+        .gte("month", since_month) \
+        .order("month", desc=False).execute().data or []
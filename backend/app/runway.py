@@ -0,0 +1,253 @@
+# app/runway.py
+"""
+Runway scenarios
+Fits a per-category model of monthly spend (and revenue) from the workspace's
+rollup rows, applies scenario cuts to the categories they name, and either
+projects deterministic burn or samples thousands of monthly paths with NumPy
+to give runway percentiles. Both work on a whole grid of scenarios at once:
+paths are a (scenarios x paths x months) array, so 10k paths over three years
+is a few array passes per category.
+"""
+
+from datetime import date
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.ledger import month_label, month_ordinal
+
+RECENT_MONTHS = 3               # same window as metrics.compute_burn
+ALL_EXPENSES = {"", "all", "expenses", "*"}
+
+# Inverse-CDF sampling: drawing uniform table indices is several times cheaper
+# than generating normals, and 4096 levels is far finer than the percentiles reported
+LEVELS = 4096
+_NORMAL_QUANTILES = np.array([NormalDist().inv_cdf((i + 0.5) / LEVELS) for i in range(LEVELS)])
+CHUNK_ELEMENTS = 4_000_000      # scenario x path x month cells simulated at once (~16 MB float32)
+
+
+class SpendModel:
+    """Monthly revenue and per-category expense history, one row per calendar month"""
+
+    def __init__(self, months: List[str], revenue: np.ndarray, categories: List[str], expense: np.ndarray):
+        self.months = months            # 'YYYY-MM', oldest first
+        self.revenue = revenue          # float64 (months,)
+        self.categories = categories
+        self.expense = expense          # float64 (months, categories)
+
+    @classmethod
+    def from_rollups(cls, rows: List[Dict], today: Optional[date] = None) -> "SpendModel":
+        """
+        Build from monthly_rollups rows (oldest first)
+
+        The current, still partial, month is left out unless it is all there is.
+        Months without a rollup row between the first and last one count as zero.
+        """
+        this_month = (today or date.today()).strftime("%Y-%m")
+        complete = [r for r in rows if r["month"] < this_month]
+        rows = complete or list(rows)
+        if not rows:
+            return cls([], np.zeros(0), [], np.zeros((0, 0)))
+
+        first, last = (month_ordinal(date.fromisoformat(f"{r['month']}-01")) for r in (rows[0], rows[-1]))
+        months = [month_label(m) for m in range(first, last + 1)]
+        index = {m: i for i, m in enumerate(months)}
+        categories = sorted({c for r in rows for c in (r.get("categories") or {})})
+        col = {c: j for j, c in enumerate(categories)}
+
+        revenue = np.zeros(len(months))
+        expense = np.zeros((len(months), len(categories)))
+        for r in rows:
+            i = index[r["month"]]
+            revenue[i] = float(r["revenue"] or 0)
+            for c, d in (r.get("categories") or {}).items():
+                expense[i, col[c]] = float(d["expense"])
+        return cls(months, revenue, categories, expense)
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def cut_factors(self, cuts: Optional[List[Dict]]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Per-category spend multipliers for scenario cuts
+
+        Each cut reduces only the category it names (case-insensitive); a cut
+        without a category, or with "all"/"expenses", applies to every category.
+
+        Returns:
+            (multiplier per category, cut categories that match no spend)
+        """
+        factors = np.ones(len(self.categories))
+        lookup = {c.lower(): j for j, c in enumerate(self.categories)}
+        unmatched = []
+        for cut in cuts or []:
+            keep = max(1 - abs(float(cut.get("delta_pct", 0))) / 100, 0.0)
+            name = str(cut.get("category") or "").strip().lower()
+            if name in ALL_EXPENSES:
+                factors *= keep
+            elif name in lookup:
+                factors[lookup[name]] *= keep
+            else:
+                unmatched.append(cut.get("category"))
+        return factors, unmatched
+
+    def recent(self, rows: List[Dict]) -> Tuple[float, np.ndarray]:
+        """Average monthly revenue and per-category expense over the last RECENT_MONTHS rollup rows"""
+        rows = rows[-RECENT_MONTHS:]
+        col = {c: j for j, c in enumerate(self.categories)}
+        revenue, expense = 0.0, np.zeros(len(self.categories))
+        for r in rows:
+            revenue += float(r["revenue"] or 0)
+            for c, d in (r.get("categories") or {}).items():
+                if c in col:
+                    expense[col[c]] += float(d["expense"])
+        n = max(len(rows), 1)
+        return revenue / n, expense / n
+
+
+def _lognormal_params(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Moment-matched lognormal (mu, sigma) per column; zero-mean columns stay at zero"""
+    if not len(values):
+        return np.full(values.shape[1], -np.inf), np.zeros(values.shape[1])
+    mean = values.mean(axis=0)
+    var = values.var(axis=0, ddof=1) if len(values) > 1 else np.zeros_like(mean)
+    safe = np.where(mean > 0, mean, 1.0)
+    sigma2 = np.log1p(var / safe ** 2)
+    mu = np.where(mean > 0, np.log(safe) - sigma2 / 2, -np.inf)
+    return mu, np.sqrt(sigma2)
+
+
+def _quantile_table(mu: float, sigma: float) -> np.ndarray:
+    """LEVELS equally likely lognormal values; sampling is one gather on uniform integers"""
+    if not np.isfinite(mu):
+        return np.zeros(LEVELS, np.float32)
+    return np.exp(mu + sigma * _NORMAL_QUANTILES).astype(np.float32)
+
+
+def project(
+    current_burn: float,
+    cash: float,
+    recent_revenue: float,
+    recent_expense: np.ndarray,
+    raise_amount: np.ndarray,
+    factors: np.ndarray,
+    revenue_factor: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Deterministic burn and runway for S scenarios at once
+
+    Args:
+        current_burn, cash: From metrics.compute_burn
+        recent_revenue, recent_expense: From SpendModel.recent
+        raise_amount: (S,) cash added
+        factors: (S, categories) spend multipliers from cut_factors
+        revenue_factor: (S,) revenue multipliers (1.2 = +20%)
+
+    Returns:
+        {"cash", "burn", "runway"} arrays of shape (S,); runway is inf when not burning
+    """
+    new_cash = cash + np.asarray(raise_amount, np.float64)
+    new_burn = current_burn - (1 - np.asarray(factors)) @ recent_expense \
+        - recent_revenue * (np.asarray(revenue_factor, np.float64) - 1)
+    runway = np.divide(new_cash, new_burn, out=np.full(len(new_cash), np.inf), where=new_burn > 0.01)
+    return {"cash": new_cash, "burn": new_burn, "runway": runway}
+
+
+def _runway_months(net: np.ndarray, cash: np.ndarray, horizon: int) -> np.ndarray:
+    """First month cumulative net burn exceeds cash, interpolated; `horizon` if never"""
+    balance = cash[:, None, None] - np.cumsum(net, axis=-1, dtype=np.float64)
+    broke = balance < 0
+    ran_out = broke.any(axis=-1)
+    first = broke.argmax(axis=-1)[..., None]
+    before = np.where(first > 0, np.take_along_axis(balance, np.maximum(first - 1, 0), -1), cash[:, None, None])
+    month_burn = np.maximum(np.take_along_axis(net, first, -1), 1e-9)
+    return np.where(ran_out, first[..., 0] + np.clip(before / month_burn, 0, 1)[..., 0], float(horizon))
+
+
+def _simulate_chunk(model, cash, factors, revenue_factor, paths, horizon, seed) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    shape = (paths, horizon)
+    net = np.zeros((len(cash),) + shape, np.float32)
+
+    # Every category with spend is drawn, cut or not, so the draws are identical across scenarios
+    mu, sigma = _lognormal_params(model.expense)
+    for j in np.flatnonzero(model.expense.sum(axis=0) > 0):
+        spend = _quantile_table(mu[j], sigma[j])[rng.integers(0, LEVELS, shape, dtype=np.uint16)]
+        for k in np.flatnonzero(factors[:, j] > 0):
+            net[k] += factors[k, j] * spend
+    rmu, rsigma = _lognormal_params(model.revenue[:, None])
+    if np.isfinite(rmu[0]):
+        revenue = _quantile_table(rmu[0], rsigma[0])[rng.integers(0, LEVELS, shape, dtype=np.uint16)]
+        for k in range(len(cash)):
+            net[k] -= revenue_factor[k] * revenue
+    return _runway_months(net, cash, horizon)
+
+
+def simulate_grid(
+    model: SpendModel,
+    cash: np.ndarray,
+    factors: np.ndarray,
+    revenue_factor: np.ndarray,
+    paths: int = 2_000,
+    horizon: int = 36,
+    seed: Optional[int] = 0
+) -> np.ndarray:
+    """
+    Monte Carlo runway in months for S scenarios, shape (S, paths)
+
+    Every month of every path draws revenue and each category's spend
+    independently from a moment-matched lognormal fitted to that category's
+    history, scaled by the scenario factors. Runway is when cumulative net
+    burn exhausts cash (interpolated within the month); paths that never run
+    out return `horizon`.
+
+    All scenarios see the same draws (common random numbers), so differences
+    between them come from the scenarios, not from sampling noise. Scenarios
+    are processed in chunks of about CHUNK_ELEMENTS path-months; each chunk
+    replays the same seed.
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy    # chunks must still share one stream
+    cash = np.asarray(cash, np.float64)
+    factors = np.asarray(factors, np.float64).reshape(len(cash), len(model.categories))
+    revenue_factor = np.asarray(revenue_factor, np.float64)
+    out = np.empty((len(cash), paths))
+    step = max(CHUNK_ELEMENTS // (paths * horizon), 1)
+    for lo in range(0, len(cash), step):
+        hi = lo + step
+        out[lo:hi] = _simulate_chunk(model, cash[lo:hi], factors[lo:hi], revenue_factor[lo:hi],
+                                     paths, horizon, seed)
+    return out
+
+
+def simulate(
+    model: SpendModel,
+    cash: float,
+    factors: Optional[np.ndarray] = None,
+    revenue_factor: float = 1.0,
+    paths: int = 10_000,
+    horizon: int = 36,
+    seed: Optional[int] = 0
+) -> np.ndarray:
+    """Monte Carlo runway in months for one scenario, one value per path (see simulate_grid)"""
+    if factors is None:
+        factors = np.ones(len(model.categories))
+    return simulate_grid(model, [cash], [factors], [revenue_factor], paths, horizon, seed)[0]
+
+
+def percentiles(runway: np.ndarray, horizon: int) -> Dict:
+    """p10/p50/p90 runway plus the share of paths that run out of cash within the horizon"""
+    p10, p50, p90 = np.percentile(runway, [10, 50, 90])
+
+    def fmt(v):
+        return round(float(v), 1) if v < horizon else f"{horizon}+"
+
+    return {
+        "p10": fmt(p10),
+        "p50": fmt(p50),
+        "p90": fmt(p90),
+        "prob_out_of_cash": round(float((runway < horizon).mean()), 3),
+        "paths": len(runway),
+        "horizon_months": horizon,
+    }
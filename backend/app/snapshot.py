@@ -0,0 +1,83 @@
+# app/snapshot.py
+"""
+Per-request workspace snapshot
+Fetches the data the agent endpoints need once, running the independent
+Supabase queries concurrently, and computes metrics from that shared copy.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from app import db, metrics, recurring
+
+
+class WorkspaceSnapshot:
+    """Everything an agent request reads about a workspace, fetched once"""
+
+    def __init__(
+        self,
+        workspace_id: str,
+        rollups: List[Dict],
+        burn_inputs: Dict,
+        transactions: Optional[List[Dict]] = None,
+        recurring: Optional[Dict] = None
+    ):
+        self.workspace_id = workspace_id
+        self.rollups = rollups              # monthly rollup rows since metrics.summary_since()
+        self.burn_inputs = burn_inputs      # last three months + latest cash
+        self.transactions = transactions or []  # most recent first
+        self.recurring = recurring          # recurring.for_workspace payload, if requested and cached
+        self._summary = None
+        self._burn = None
+
+    def summary(self) -> Dict:
+        """Same payload as /metrics/summary"""
+        if self._summary is None:
+            self._summary = metrics.compute_summary(self.rollups)
+        return self._summary
+
+    def burn(self) -> Dict:
+        """Same payload as /metrics/burn_runway"""
+        if self._burn is None:
+            self._burn = metrics.compute_burn(self.burn_inputs)
+        return self._burn
+
+
+async def _recent_transactions(workspace_id: str, limit: int) -> List[Dict]:
+    res = await db.execute(db.table("transactions").select("*")
+                           .eq("workspace_id", workspace_id)
+                           .order("ts", desc=True)
+                           .limit(limit))
+    return res.data or []
+
+
+async def load_snapshot(workspace_id: str, recent: int = 0, with_recurring: bool = False) -> WorkspaceSnapshot:
+    """
+    Load a workspace snapshot
+
+    Args:
+        workspace_id: Workspace identifier
+        recent: Also fetch this many most recent transactions (0 = skip)
+        with_recurring: Also attach recurring charges if they are already cached
+            (None otherwise; the detection is then warmed in the background)
+
+    Returns:
+        WorkspaceSnapshot with rollups, burn inputs and optional transactions/recurring
+    """
+    queries = [
+        db.run(metrics.fetch_summary_rollups, workspace_id),
+        db.run(metrics.fetch_burn_inputs, workspace_id),
+    ]
+    if recent:
+        queries.append(_recent_transactions(workspace_id, recent))
+    if with_recurring:
+        queries.append(recurring.cached(workspace_id))
+
+    results = await asyncio.gather(*queries)
+    if not results[0] and await metrics.ensure_rollups(workspace_id):
+        results[0], results[1] = await asyncio.gather(
+            db.run(metrics.fetch_summary_rollups, workspace_id),
+            db.run(metrics.fetch_burn_inputs, workspace_id))
+    return WorkspaceSnapshot(workspace_id, results[0], results[1],
+                             results[2] if recent else None,
+                             results[-1] if with_recurring else None)
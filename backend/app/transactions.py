@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Query
-from supabase import create_client
-import os
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+import asyncio
+from app import db, categorizer, merchant_memo
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
-sb = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE"])
 
 @router.get("/list")
 async def list_transactions(
@@ -20,7 +20,7 @@ async def list_transactions(
     
     try:
         # Build query
-        query = sb.table("transactions").select("*").eq("workspace_id", workspace_id)
+        query = db.table("transactions").select("*").eq("workspace_id", workspace_id)
         
         # Filter by category if provided
         if category and category.lower() != "all":
@@ -29,18 +29,18 @@ async def list_transactions(
         # Order by date descending and limit
         query = query.order("ts", desc=True).limit(limit)
         
-        response = query.execute()
-        transactions = response.data or []
-        
-        print(f"[Transactions] Found {len(transactions)} transactions")
-        
         # Get unique categories for filter dropdown
-        cat_query = sb.table("transactions")\
+        cat_query = db.table("transactions")\
             .select("category")\
             .eq("workspace_id", workspace_id)\
             .order("category")
         
-        cat_response = cat_query.execute()
+        # Both queries are independent - run them concurrently
+        response, cat_response = await asyncio.gather(db.execute(query), db.execute(cat_query))
+        transactions = response.data or []
+        
+        print(f"[Transactions] Found {len(transactions)} transactions")
+        
         categories = list(set([t["category"] for t in (cat_response.data or []) if t.get("category")]))
         categories.sort()
         
@@ -53,3 +53,30 @@ async def list_transactions(
         print(f"[Transactions] Error: {e}")
         return {"transactions": [], "count": 0, "categories": [], "error": str(e)}
 
+
+class CategoryCorrection(BaseModel):
+    workspace_id: str
+    transaction_id: str
+    category: str
+
+@router.post("/category")
+async def set_category(req: CategoryCorrection):
+    """
+    User correction: set a transaction's category.
+    Also teaches the merchant memo, so future charges from the same merchant
+    are categorized this way without asking the LLM.
+    """
+    rows = (await db.execute(db.table("transactions").select("id,ts,amount,category,merchant")
+        .eq("workspace_id", req.workspace_id)
+        .eq("id", req.transaction_id))).data
+    if not rows:
+        raise HTTPException(404, "Transaction not found")
+    
+    old = rows[0]
+    new = {**old, "category": req.category}
+    await categorizer.set_categories(req.workspace_id, [(old, new)])
+    learned = await merchant_memo.remember(req.workspace_id, [(old.get("merchant"), req.category)], source="user")
+    
+    print(f"[Transactions] {old['id']} -> {req.category} (memo updated: {bool(learned)})")
+    return {"transaction": new, "memo_updated": bool(learned),
+            "merchant_key": merchant_memo.normalize_merchant(old.get("merchant"))}
@@ -2,63 +2,275 @@
 """
 Redis Vector Database Integration
 Stores and searches embeddings for LLM context retrieval
+
+Search is a KNN query on the RediSearch vector index when the server has the
+search module, prefiltered by workspace (and optionally document type) tags.
+On plain Redis it falls back to an exact in-process index per workspace
+(app.vector_index), loaded from the workspace's id set and kept current
+through a per-workspace write counter.
+
+The a-prefixed methods (aadd_documents, asearch, ...) are the same operations
+for the event loop: a pooled redis.asyncio client (BlockingConnectionPool, so
+bursts wait for a connection instead of failing), AsyncOpenAI for embeddings,
+and one pipeline per multi-key step.
 """
 
 import redis
+import redis.asyncio as aioredis
 import openai
 import numpy as np
+import asyncio
+import base64
 import json
 import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from datetime import datetime
 
-# Redis client
-redis_client = redis.Redis(
-    host=os.environ.get("REDIS_HOST", "localhost"),
-    port=int(os.environ.get("REDIS_PORT", 6379)),
-    password=os.environ.get("REDIS_PASSWORD"),
-    decode_responses=True
-)
+from app import embedding_cache
+from app.cache import LRUCache
+from app.redis_clients import connection_options
+from app.vector_index import STORAGE_TYPES, LocalIndex, dequantize, quantize, rescore
+
+# Redis client (the vector store itself, so no fallback or backoff: errors reach the caller)
+redis_client = redis.Redis(**connection_options(decode_responses=True))
+# Same server, raw bytes: embeddings are read back for the in-process index
+redis_bytes = redis.Redis(**connection_options())
+
+VECTOR_INDEX = os.environ.get("VECTOR_INDEX", "auto")     # auto | redis | local
+LOCAL_INDEX_WORKSPACES = int(os.environ.get("VECTOR_LOCAL_WORKSPACES", 32))
+LOAD_CHUNK = 500    # hashes per pipeline when loading a local index
+VECTOR_STORAGE = os.environ.get("VECTOR_STORAGE", "float32")       # float32 | float16 | int8
+RESCORE_FACTOR = int(os.environ.get("VECTOR_RESCORE_FACTOR", 4))   # KNN candidates per result when quantized
+INLINE_SCORE_ELEMENTS = 1_000_000   # smaller local indexes are scored on the event loop (well under 1 ms)
+REDIS_POOL_SIZE = int(os.environ.get("VECTOR_REDIS_POOL", 32))                # async connections per client
+REDIS_POOL_TIMEOUT = float(os.environ.get("VECTOR_REDIS_POOL_TIMEOUT", 5))    # seconds to wait for a free one
+_aredis: Optional[aioredis.Redis] = None
+_aredis_bytes: Optional[aioredis.Redis] = None
 
 # OpenAI for embeddings
-openai.api_key = os.environ.get("OPENAI_API_KEY")
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "text-embedding-ada-002")
+EMBED_BATCH_SIZE = int(os.environ.get("VECTOR_EMBED_BATCH", 128))        # inputs per embeddings request
+EMBED_CONCURRENCY = int(os.environ.get("VECTOR_EMBED_CONCURRENCY", 4))   # requests in flight (add_documents)
+_openai: Optional[openai.OpenAI] = None
+_async_openai: Optional[openai.AsyncOpenAI] = None
+
+
+def get_openai() -> openai.OpenAI:
+    """Shared OpenAI client (keep-alive pool), created on first use"""
+    global _openai
+    if _openai is None:
+        _openai = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    return _openai
+
+
+def get_async_openai() -> openai.AsyncOpenAI:
+    global _async_openai
+    if _async_openai is None:
+        _async_openai = openai.AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    return _async_openai
+
+
+def get_async_redis(binary: bool = False) -> aioredis.Redis:
+    """Pooled async client, created on first use; binary=True returns raw bytes (embeddings)"""
+    global _aredis, _aredis_bytes
+    if (_aredis_bytes if binary else _aredis) is None:
+        pool = aioredis.BlockingConnectionPool(**connection_options(
+            max_connections=REDIS_POOL_SIZE,
+            timeout=REDIS_POOL_TIMEOUT,
+            decode_responses=not binary
+        ))
+        client = aioredis.Redis(connection_pool=pool)
+        if binary:
+            _aredis_bytes = client
+        else:
+            _aredis = client
+    return _aredis_bytes if binary else _aredis
+
+
+async def close_async() -> None:
+    """Release the async Redis pools and OpenAI client (app shutdown)"""
+    global _aredis, _aredis_bytes, _async_openai
+    for client in (_aredis, _aredis_bytes):
+        if client is not None:
+            await client.aclose()
+    _aredis = _aredis_bytes = None
+    if _async_openai is not None:
+        await _async_openai.close()
+        _async_openai = None
+
+
+_TAG_SPECIAL = re.compile(r"([,.<>{}\[\]\"':;!@#$%^&*()\-+=~|/\\ ])")
+
+
+def _tag(value: str) -> str:
+    """Escape a value for a TAG filter (workspace ids are UUIDs: '-' must be escaped)"""
+    return _TAG_SPECIAL.sub(r"\\\1", value)
+
+
+def _id_set(workspace_id: str) -> str:
+    return f"vecidx:{workspace_id}"
+
+
+def _version_key(workspace_id: str) -> str:
+    return f"vecver:{workspace_id}"
 
 
 class VectorDB:
     """Redis-based vector database for storing and searching embeddings"""
     
-    def __init__(self):
-        self.index_name = "financial_context"
+    def __init__(self, storage: str = VECTOR_STORAGE):
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"VECTOR_STORAGE must be one of {', '.join(STORAGE_TYPES)}, got {storage!r}")
+        self.storage = storage
+        # A vector field has one TYPE, so each storage mode gets its own index
+        self.index_name = "financial_context" if storage == "float32" else f"financial_context_{storage}"
         self.embedding_dim = 1536  # OpenAI ada-002 dimension
-        self._ensure_index()
-    
-    def _ensure_index(self):
-        """Create Redis search index if it doesn't exist"""
-        try:
-            # Check if index exists
-            redis_client.execute_command("FT.INFO", self.index_name)
-        except redis.ResponseError:
-            # Create index with vector field
-            redis_client.execute_command(
-                "FT.CREATE", self.index_name,
-                "ON", "HASH",
-                "PREFIX", "1", "vec:",
-                "SCHEMA",
-                "content", "TEXT",
-                "metadata", "JSON",
-                "workspace_id", "TAG",
-                "embedding", "VECTOR", "HNSW", "6",
-                "DIM", str(self.embedding_dim),
-                "DISTANCE_METRIC", "COSINE"
-            )
-    
-    def _get_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using OpenAI"""
-        response = openai.Embedding.create(
-            model="text-embedding-ada-002",
-            input=text
+        self.search_module = False  # True once the RediSearch index is usable
+        self._local = LRUCache(maxsize=LOCAL_INDEX_WORKSPACES)
+        self._local_lock = threading.Lock()
+        self._alocal_lock = asyncio.Lock()
+        self._index_checked = False  # no I/O here: the index is checked on first use
+    
+    def _create_index_command(self) -> tuple:
+        # Vector field plus the tags used as prefilters (metadata is stored but not indexed)
+        return (
+            "FT.CREATE", self.index_name,
+            "ON", "HASH",
+            "PREFIX", "1", "vec:",
+            "SCHEMA",
+            "content", "TEXT",
+            "workspace_id", "TAG",
+            "type", "TAG",
+            "embedding", "VECTOR", "HNSW", "6",
+            "TYPE", STORAGE_TYPES[self.storage],
+            "DIM", str(self.embedding_dim),
+            "DISTANCE_METRIC", "COSINE"
+        )
+    
+    def _create_failed(self, e: redis.ResponseError) -> None:
+        if "already exists" in str(e).lower():
+            # Another worker created it between our FT.INFO and FT.CREATE
+            self.search_module = True
+        elif VECTOR_INDEX == "redis":
+            raise e
+        else:
+            # Plain Redis without the search module: use the in-process index
+            print(f"[VectorDB] Search module unavailable, using in-process index: {e}")
+    
+    def ensure_index(self) -> None:
+        """Create Redis search index if it doesn't exist (once; connection errors retry on the next call)"""
+        if self._index_checked:
+            return
+        if VECTOR_INDEX != "local":
+            try:
+                # Check if index exists
+                redis_client.execute_command("FT.INFO", self.index_name)
+                self.search_module = True
+            except redis.ResponseError:
+                try:
+                    redis_client.execute_command(*self._create_index_command())
+                    self.search_module = True
+                except redis.ResponseError as e:
+                    self._create_failed(e)
+        self._index_checked = True
+    
+    async def aensure_index(self) -> None:
+        if self._index_checked:
+            return
+        if VECTOR_INDEX != "local":
+            r = get_async_redis()
+            try:
+                await r.execute_command("FT.INFO", self.index_name)
+                self.search_module = True
+            except redis.ResponseError:
+                try:
+                    await r.execute_command(*self._create_index_command())
+                    self.search_module = True
+                except redis.ResponseError as e:
+                    self._create_failed(e)
+        self._index_checked = True
+    
+    def _decode_embeddings(self, response, n: int) -> np.ndarray:
+        out = np.empty((n, self.embedding_dim), dtype=np.float32)
+        for item in response.data:
+            out[item.index] = np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32)
+        return out
+    
+    def _embed_api(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts in one OpenAI request; returns float32 (len(texts), dim)"""
+        response = get_openai().embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=texts,
+            encoding_format="base64"    # raw float32 bytes: no JSON float parsing, no list round trip
+        )
+        return self._decode_embeddings(response, len(texts))
+    
+    async def _aembed_api(self, texts: List[str]) -> np.ndarray:
+        response = await get_async_openai().embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=texts,
+            encoding_format="base64"
         )
-        return response['data'][0]['embedding']
+        return self._decode_embeddings(response, len(texts))
+    
+    def _split_cached(self, texts: List[str], cached: List[Optional[np.ndarray]]):
+        """Output array with cache hits filled in, plus {text: [positions]} still to embed"""
+        out = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        missing: Dict[str, List[int]] = {}
+        for i, (text, vector) in enumerate(zip(texts, cached)):
+            if vector is None:
+                missing.setdefault(text, []).append(i)
+            else:
+                out[i] = vector
+        return out, missing
+    
+    def _get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Embeddings for texts; cached ones are reused, the rest embedded once per distinct text"""
+        out, missing = self._split_cached(texts, embedding_cache.get_many(EMBEDDING_MODEL, texts))
+        if missing:
+            fresh_texts = list(missing)
+            fresh = self._embed_api(fresh_texts)
+            embedding_cache.put_many(EMBEDDING_MODEL, fresh_texts, fresh)
+            for text, vector in zip(fresh_texts, fresh):
+                out[missing[text]] = vector
+        return out
+    
+    async def _aget_embeddings(self, texts: List[str]) -> np.ndarray:
+        out, missing = self._split_cached(texts, await embedding_cache.aget_many(EMBEDDING_MODEL, texts))
+        if missing:
+            fresh_texts = list(missing)
+            fresh = await self._aembed_api(fresh_texts)
+            await embedding_cache.aput_many(EMBEDDING_MODEL, fresh_texts, fresh)
+            for text, vector in zip(fresh_texts, fresh):
+                out[missing[text]] = vector
+        return out
+    
+    def _get_embedding(self, text: str) -> np.ndarray:
+        """Generate embedding for text using OpenAI"""
+        return self._get_embeddings([text])[0]
+    
+    def _doc_fields(self, workspace_id: str, content: str, metadata: Dict, embedding: np.ndarray) -> Dict:
+        blob, scale = quantize(embedding, self.storage)
+        fields = {
+            "content": content,
+            "metadata": json.dumps(metadata),
+            "workspace_id": workspace_id,
+            "type": str(metadata.get("type", "")),
+            "embedding": blob
+        }
+        if scale is not None:
+            fields["scale"] = scale
+        return fields
+    
+    @staticmethod
+    def _track(pipe, workspace_id: str, ids: List[str]) -> None:
+        """Queue the id-set/version updates that keep in-process indexes current"""
+        pipe.sadd(_id_set(workspace_id), *ids)
+        pipe.incr(_version_key(workspace_id))
     
     def add_document(
         self,
@@ -79,32 +291,141 @@ class VectorDB:
         Returns:
             Document ID
         """
+        self.ensure_index()
         # Generate embedding
         embedding = self._get_embedding(content)
         
         # Generate document ID
         if not doc_id:
-            doc_id = f"{workspace_id}:{datetime.now().timestamp()}"
+            doc_id = f"{workspace_id}:{uuid.uuid4().hex}"
         
         # Store in Redis
-        redis_client.hset(
-            f"vec:{doc_id}",
-            mapping={
-                "content": content,
-                "metadata": json.dumps(metadata),
-                "workspace_id": workspace_id,
-                "embedding": np.array(embedding, dtype=np.float32).tobytes()
-            }
-        )
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(f"vec:{doc_id}", mapping=self._doc_fields(workspace_id, content, metadata, embedding))
+        self._track(pipe, workspace_id, [doc_id])
+        pipe.execute()
         
         return doc_id
     
+    async def aadd_document(
+        self,
+        workspace_id: str,
+        content: str,
+        metadata: Dict,
+        doc_id: Optional[str] = None
+    ) -> str:
+        """add_document without blocking the event loop"""
+        return (await self.aadd_documents(workspace_id, [{"content": content, "metadata": metadata, "id": doc_id}]))[0]
+    
+    def _batches(self, workspace_id: str, documents: List[Dict], batch_size: int):
+        ids = [d.get("id") or f"{workspace_id}:{uuid.uuid4().hex}" for d in documents]
+        return ids, [range(i, min(i + batch_size, len(documents))) for i in range(0, len(documents), batch_size)]
+    
+    def _queue_batch(self, pipe, workspace_id: str, documents: List[Dict], ids: List[str],
+                     batch: range, embeddings: np.ndarray, ttl: Optional[int]) -> None:
+        for i, embedding in zip(batch, embeddings):
+            doc = documents[i]
+            pipe.hset(f"vec:{ids[i]}", mapping=self._doc_fields(
+                workspace_id, doc["content"], doc.get("metadata") or {}, embedding))
+            if ttl:
+                pipe.expire(f"vec:{ids[i]}", ttl)
+        self._track(pipe, workspace_id, [ids[i] for i in batch])
+    
+    def add_documents(
+        self,
+        workspace_id: str,
+        documents: List[Dict],
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+        ttl: Optional[int] = None
+    ) -> List[str]:
+        """
+        Add many documents: one embeddings request and one pipelined Redis
+        write per batch, `concurrency` batches in flight
+        
+        Args:
+            workspace_id: Workspace identifier
+            documents: [{"content": str, "metadata": dict (optional), "id": str (optional)}]
+            batch_size: Inputs per embeddings request
+            concurrency: Batches embedded/written at once
+            ttl: Seconds until the documents expire (None = keep)
+        
+        Returns:
+            Document IDs, in input order
+        """
+        self.ensure_index()
+        ids, batches = self._batches(workspace_id, documents, batch_size)
+        
+        def index_batch(batch: range) -> int:
+            embeddings = self._get_embeddings([documents[i]["content"] for i in batch])
+            pipe = redis_client.pipeline(transaction=False)
+            self._queue_batch(pipe, workspace_id, documents, ids, batch, embeddings, ttl)
+            pipe.execute()
+            return len(batch)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batches)))) as pool:
+            written = sum(pool.map(index_batch, batches))
+        print(f"[VectorDB] Indexed {written} documents for workspace {workspace_id} in {len(batches)} batches")
+        return ids
+    
+    async def aadd_documents(
+        self,
+        workspace_id: str,
+        documents: List[Dict],
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+        ttl: Optional[int] = None
+    ) -> List[str]:
+        """add_documents on the event loop: batches run as tasks, `concurrency` at a time"""
+        await self.aensure_index()
+        ids, batches = self._batches(workspace_id, documents, batch_size)
+        slots = asyncio.Semaphore(max(1, concurrency))
+        
+        async def index_batch(batch: range) -> int:
+            async with slots:
+                embeddings = await self._aget_embeddings([documents[i]["content"] for i in batch])
+                pipe = get_async_redis().pipeline(transaction=False)
+                self._queue_batch(pipe, workspace_id, documents, ids, batch, embeddings, ttl)
+                await pipe.execute()
+            return len(batch)
+        
+        written = sum(await asyncio.gather(*(index_batch(b) for b in batches)))
+        print(f"[VectorDB] Indexed {written} documents for workspace {workspace_id} in {len(batches)} batches")
+        return ids
+    
+    async def adocuments_exist(self, doc_ids: List[str]) -> List[bool]:
+        """Whether each document is stored (not deleted or expired), in one round trip"""
+        pipe = get_async_redis().pipeline(transaction=False)
+        for doc_id in doc_ids:
+            pipe.exists(f"vec:{doc_id}")
+        return [bool(n) for n in await pipe.execute()] if doc_ids else []
+    
+    async def aexpire_documents(self, doc_ids: List[str], ttl: int) -> None:
+        """Reset the time to live of stored documents"""
+        if not doc_ids:
+            return
+        pipe = get_async_redis().pipeline(transaction=False)
+        for doc_id in doc_ids:
+            pipe.expire(f"vec:{doc_id}", ttl)
+        await pipe.execute()
+    
+    async def adelete_documents(self, workspace_id: str, doc_ids: List[str]) -> None:
+        """Delete documents and drop them from the workspace's in-process indexes"""
+        if not doc_ids:
+            return
+        pipe = get_async_redis().pipeline(transaction=False)
+        pipe.unlink(*[f"vec:{d}" for d in doc_ids])
+        pipe.srem(_id_set(workspace_id), *doc_ids)
+        pipe.incr(_version_key(workspace_id))
+        await pipe.execute()
+    
     def search(
         self,
         query: str,
         workspace_id: str,
         top_k: int = 5,
-        score_threshold: float = 0.7
+        score_threshold: float = 0.7,
+        doc_type: Optional[str] = None
     ) -> List[Dict]:
         """
         Search for similar documents using vector similarity
@@ -113,47 +434,212 @@ class VectorDB:
             query: Search query text
             workspace_id: Workspace to search within
             top_k: Number of results to return
-            score_threshold: Minimum similarity score
+            score_threshold: Minimum cosine similarity
+            doc_type: Only documents whose metadata type matches
         
         Returns:
-            List of matching documents with similarity scores
+            List of matching documents with similarity scores, best first
         """
+        self.ensure_index()
         # Generate query embedding
         query_embedding = self._get_embedding(query)
+        if self.search_module:
+            results = redis_bytes.execute_command(*self._knn_command(query_embedding, workspace_id, top_k, doc_type))
+            documents = self._parse_knn(results, query_embedding, top_k)
+        else:
+            documents = self._search_local(query_embedding, workspace_id, top_k, doc_type)
         
-        # Redis vector search
-        results = redis_client.execute_command(
+        # Only include results above threshold
+        return [d for d in documents if d["score"] >= score_threshold]
+    
+    async def asearch(
+        self,
+        query: str,
+        workspace_id: str,
+        top_k: int = 5,
+        score_threshold: float = 0.7,
+        doc_type: Optional[str] = None
+    ) -> List[Dict]:
+        """search() without blocking the event loop"""
+        await self.aensure_index()
+        query_embedding = (await self._aget_embeddings([query]))[0]
+        if self.search_module:
+            results = await get_async_redis(binary=True).execute_command(
+                *self._knn_command(query_embedding, workspace_id, top_k, doc_type))
+            documents = self._parse_knn(results, query_embedding, top_k)
+        else:
+            documents = await self._asearch_local(query_embedding, workspace_id, top_k, doc_type)
+        return [d for d in documents if d["score"] >= score_threshold]
+    
+    def _knn_command(self, query_embedding: np.ndarray, workspace_id: str, top_k: int,
+                     doc_type: Optional[str]) -> tuple:
+        """
+        Hybrid query: tag prefilter, then KNN on the HNSW vector field. With
+        quantized storage it over-fetches RESCORE_FACTOR x top_k candidates and
+        returns their stored vectors for the query-side rescoring in _parse_knn.
+        """
+        filters = f"@workspace_id:{{{_tag(workspace_id)}}}"
+        if doc_type:
+            filters += f" @type:{{{_tag(doc_type)}}}"
+        fields = ["content", "metadata", "distance"]
+        k = int(top_k)
+        if self.storage != "float32":
+            fields += ["embedding", "scale"]
+            k *= RESCORE_FACTOR
+        return (
             "FT.SEARCH", self.index_name,
-            f"@workspace_id:{{{workspace_id}}}",
-            "PARAMS", "2", "query_embedding", np.array(query_embedding, dtype=np.float32).tobytes(),
-            "DIALECT", "2",
-            "SORTBY", "__query_score", "DESC",
-            "LIMIT", "0", str(top_k)
+            f"({filters})=>[KNN {k} @embedding $vec AS distance]",
+            "PARAMS", "2", "vec", quantize(query_embedding, self.storage)[0],
+            "SORTBY", "distance", "ASC",
+            "RETURN", str(len(fields)), *fields,
+            "LIMIT", "0", str(k),
+            "DIALECT", "2"
         )
-        
-        # Parse results
-        documents = []
+    
+    def _parse_knn(self, results, query_embedding: np.ndarray, top_k: int) -> List[Dict]:
+        # Parse results: [total, key, [field, value, ...], key, ...] (raw bytes: vectors may be returned)
+        documents, vectors = [], []
         for i in range(1, len(results), 2):
-            doc_id = results[i]
-            fields = results[i + 1]
-            
-            doc_dict = {"id": doc_id}
-            for j in range(0, len(fields), 2):
-                key = fields[j]
-                value = fields[j + 1]
-                
-                if key == "content":
-                    doc_dict["content"] = value
-                elif key == "metadata":
-                    doc_dict["metadata"] = json.loads(value)
-                elif key == "__query_score":
-                    doc_dict["score"] = float(value)
-            
-            # Only include results above threshold
-            if doc_dict.get("score", 0) >= score_threshold:
-                documents.append(doc_dict)
-        
-        return documents
+            fields = dict(zip(results[i + 1][::2], results[i + 1][1::2]))
+            documents.append({
+                "id": results[i].decode().removeprefix("vec:"),
+                "content": fields.get(b"content", b"").decode(),
+                "metadata": json.loads(fields.get(b"metadata") or "{}"),
+                "score": 1.0 - float(fields.get(b"distance", 1.0)),   # cosine distance -> similarity
+            })
+            if b"embedding" in fields:
+                scale = fields.get(b"scale")
+                vectors.append(dequantize(fields[b"embedding"], self.embedding_dim, scale and float(scale)))
+        if not vectors or len(vectors) != len(documents):
+            return documents[:top_k]
+        # Full-precision query against the candidates' dequantized vectors, as the local index scores
+        order, scores = rescore(query_embedding, np.stack(vectors), top_k)
+        rescored = [documents[i] for i in order]
+        for doc, score in zip(rescored, scores):
+            doc["score"] = float(score)
+        return rescored
+    
+    def _local_index(self, workspace_id: str) -> LocalIndex:
+        """In-process index for a workspace, brought up to date with Redis when its version moved"""
+        version = redis_client.get(_version_key(workspace_id))
+        index = self._local.get(workspace_id)
+        if index is not None and index.version == version:
+            return index
+        with self._local_lock:
+            index = self._local.get(workspace_id) or LocalIndex(self.embedding_dim)
+            if index.version != version or not len(index):
+                # Load only what changed since this copy was built
+                new_ids = self._stale(index, redis_client.smembers(_id_set(workspace_id)))
+                gone = []
+                for chunk in self._chunks(new_ids):
+                    pipe = redis_bytes.pipeline(transaction=False)
+                    for doc_id in chunk:
+                        pipe.hmget(f"vec:{doc_id}", "embedding", "type", "scale")
+                    gone += self._load(index, chunk, pipe.execute())
+                if gone:
+                    # Hashes deleted or expired behind the id set
+                    redis_client.srem(_id_set(workspace_id), *gone)
+                index.version = version
+                self._local.set(workspace_id, index)
+        return index
+    
+    async def _alocal_index(self, workspace_id: str) -> LocalIndex:
+        r = get_async_redis()
+        version = await r.get(_version_key(workspace_id))
+        index = self._local.get(workspace_id)
+        if index is not None and index.version == version:
+            return index
+        async with self._alocal_lock:
+            index = self._local.get(workspace_id) or LocalIndex(self.embedding_dim)
+            if index.version != version or not len(index):
+                new_ids = self._stale(index, await r.smembers(_id_set(workspace_id)))
+                gone = []
+                for chunk in self._chunks(new_ids):
+                    pipe = get_async_redis(binary=True).pipeline(transaction=False)
+                    for doc_id in chunk:
+                        pipe.hmget(f"vec:{doc_id}", "embedding", "type", "scale")
+                    gone += self._load(index, chunk, await pipe.execute())
+                if gone:
+                    await r.srem(_id_set(workspace_id), *gone)
+                index.version = version
+                self._local.set(workspace_id, index)
+        return index
+    
+    @staticmethod
+    def _stale(index: LocalIndex, members) -> List[str]:
+        """Drop ids no longer in the workspace set; return the ids still to load"""
+        index.remove([d for d in index.ids if d not in members])
+        return [d for d in members if d not in index]
+    
+    @staticmethod
+    def _chunks(ids: List[str]):
+        return (ids[i:i + LOAD_CHUNK] for i in range(0, len(ids), LOAD_CHUNK))
+    
+    def _load(self, index: LocalIndex, chunk: List[str], rows: List) -> List[str]:
+        """Add fetched (embedding, type, scale) rows to the index; returns ids whose hash is missing"""
+        ids, vectors, types, gone = [], [], [], []
+        for doc_id, (blob, doc_type, scale) in zip(chunk, rows):
+            if blob is None:
+                gone.append(doc_id)
+                continue
+            ids.append(doc_id)
+            vectors.append(dequantize(blob, self.embedding_dim, scale and float(scale)))
+            types.append((doc_type or b"").decode())
+        if ids:
+            index.add(ids, np.stack(vectors), types)
+        return gone
+    
+    @staticmethod
+    def _hit_documents(hits, rows) -> List[Dict]:
+        return [
+            {"id": doc_id, "content": content, "metadata": json.loads(metadata or "{}"), "score": score}
+            for (doc_id, score), (content, metadata) in zip(hits, rows)
+            if content is not None
+        ]
+    
+    @staticmethod
+    def _expired(index: LocalIndex, hits, rows) -> List[str]:
+        """Hits whose hash has expired since the index was loaded; they leave the index now"""
+        gone = [doc_id for (doc_id, _), (content, _) in zip(hits, rows) if content is None]
+        index.remove(gone)
+        return gone
+    
+    def _search_local(self, query_embedding: np.ndarray, workspace_id: str, top_k: int,
+                      doc_type: Optional[str]) -> List[Dict]:
+        """Exact cosine top-k over the in-process index, then one round trip for the hits' fields"""
+        index = self._local_index(workspace_id)
+        hits = index.search(query_embedding, top_k, doc_type)
+        if not hits:
+            return []
+        pipe = redis_client.pipeline(transaction=False)
+        for doc_id, _ in hits:
+            pipe.hmget(f"vec:{doc_id}", "content", "metadata")
+        rows = pipe.execute()
+        gone = self._expired(index, hits, rows)
+        if gone:
+            redis_client.srem(_id_set(workspace_id), *gone)
+            return self._search_local(query_embedding, workspace_id, top_k, doc_type)
+        return self._hit_documents(hits, rows)
+    
+    async def _asearch_local(self, query_embedding: np.ndarray, workspace_id: str, top_k: int,
+                             doc_type: Optional[str]) -> List[Dict]:
+        index = await self._alocal_index(workspace_id)
+        if index.matrix.size > INLINE_SCORE_ELEMENTS:
+            # The matrix product releases the GIL; keep large ones off the event loop
+            hits = await asyncio.to_thread(index.search, query_embedding, top_k, doc_type)
+        else:
+            hits = index.search(query_embedding, top_k, doc_type)
+        if not hits:
+            return []
+        pipe = get_async_redis().pipeline(transaction=False)
+        for doc_id, _ in hits:
+            pipe.hmget(f"vec:{doc_id}", "content", "metadata")
+        rows = await pipe.execute()
+        gone = self._expired(index, hits, rows)
+        if gone:
+            await get_async_redis().srem(_id_set(workspace_id), *gone)
+            return await self._asearch_local(query_embedding, workspace_id, top_k, doc_type)
+        return self._hit_documents(hits, rows)
     
     def add_financial_context(
         self,
@@ -180,8 +666,18 @@ class VectorDB:
         top_k: int = 3
     ) -> str:
         """Get formatted context string for LLM from similar documents"""
-        results = self.search(query, workspace_id, top_k)
-        
+        return self._format_context(self.search(query, workspace_id, top_k))
+    
+    async def aget_context_for_query(
+        self,
+        workspace_id: str,
+        query: str,
+        top_k: int = 3
+    ) -> str:
+        return self._format_context(await self.asearch(query, workspace_id, top_k))
+    
+    @staticmethod
+    def _format_context(results: List[Dict]) -> str:
         if not results:
             return "No relevant context found."
         
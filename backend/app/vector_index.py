@@ -0,0 +1,136 @@
+# app/vector_index.py
+"""
+In-process vector index
+Exact (brute-force) cosine search over one workspace's embeddings held as a
+normalized float32 matrix: one matrix-vector product and an argpartition per
+query. Used by VectorDB when Redis has no search module. At 1536 dims, 50k
+documents are a 300 MB matrix and a few milliseconds per query, which covers
+per-workspace context stores.
+
+Stored vectors may be quantized (VECTOR_STORAGE): float16, or int8 with a
+per-vector scale (v ~= q * scale, q in [-127, 127]). Cosine similarity does
+not depend on the scale, so the KNN index can search the quantized bytes
+directly; the scale is kept so stored vectors decode to real magnitudes.
+Both search paths score the same way: the full-precision query against the
+dequantized stored vectors (rescore() on KNN candidates, LocalIndex.search
+over every row). Only the query side is exact; the stored side keeps its
+quantization error.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Storage mode -> RediSearch vector field TYPE
+STORAGE_TYPES = {"float32": "FLOAT32", "float16": "FLOAT16", "int8": "INT8"}
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize(vector: np.ndarray, storage: str) -> Tuple[bytes, Optional[float]]:
+    """Vector -> (stored bytes, int8 scale or None)"""
+    v = np.asarray(vector, dtype=np.float32)
+    if storage == "float16":
+        return v.astype(np.float16).tobytes(), None
+    if storage == "int8":
+        scale = float(np.abs(v).max()) / 127 or 1.0
+        return np.rint(v / scale).astype(np.int8).tobytes(), scale
+    return v.tobytes(), None
+
+
+def dequantize(blob: bytes, dim: int, scale: Optional[float] = None) -> np.ndarray:
+    """Stored bytes -> float32; the storage mode is told apart by the blob size"""
+    width = len(blob) // dim
+    if width == 4:
+        return np.frombuffer(blob, dtype=np.float32)
+    if width == 2:
+        return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+    return np.frombuffer(blob, dtype=np.int8).astype(np.float32) * np.float32(scale or 1.0)
+
+
+def rescore(query: np.ndarray, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Query-side rescoring: cosine of the full-precision query against candidates'
+    dequantized stored vectors, (top-k positions, their scores). Removes the
+    error of the quantized query the KNN index searched with, not that of the
+    stored vectors.
+    """
+    scores = normalize(vectors) @ normalize(query)
+    order = np.argsort(-scores, kind="stable")[:k]
+    return order, scores[order]
+
+
+class LocalIndex:
+    """
+    One workspace's vectors; rows line up with `ids` and `types`. Updates
+    build new arrays and swap them in as one tuple, so a search running in
+    another thread always sees a consistent snapshot.
+    """
+
+    def __init__(self, dim: int, version: Optional[str] = None):
+        self.dim = dim
+        self.version = version          # Redis write counter this copy reflects
+        self._state: Tuple[List[str], np.ndarray, np.ndarray] = (
+            [], np.zeros((0, dim), dtype=np.float32), np.zeros(0, dtype=object))
+        self._row = {}
+
+    @property
+    def ids(self) -> List[str]:
+        return self._state[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._state[1]
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._row
+
+    def add(self, ids: List[str], vectors: np.ndarray, types: List[str]) -> None:
+        """Append new rows; ids already present are overwritten"""
+        vectors = normalize(np.asarray(vectors).reshape(len(ids), self.dim))
+        current, matrix, current_types = self._state
+        fresh = [i for i, doc_id in enumerate(ids) if doc_id not in self._row]
+        overwrite = [i for i, doc_id in enumerate(ids) if doc_id in self._row]
+        if overwrite:
+            rows = [self._row[ids[i]] for i in overwrite]
+            matrix, current_types = matrix.copy(), current_types.copy()
+            matrix[rows] = vectors[overwrite]
+            current_types[rows] = [types[i] for i in overwrite]
+        if fresh:
+            current = current + [ids[i] for i in fresh]
+            matrix = np.concatenate([matrix, vectors[fresh]])
+            current_types = np.concatenate([current_types, np.array([types[i] for i in fresh], dtype=object)])
+        self._state = (current, matrix, current_types)
+        self._row = {d: i for i, d in enumerate(current)} if fresh else self._row
+
+    def remove(self, ids: List[str]) -> None:
+        drop = {self._row[d] for d in ids if d in self._row}
+        if not drop:
+            return
+        current, matrix, types = self._state
+        keep = np.ones(len(current), dtype=bool)
+        keep[list(drop)] = False
+        current = [d for d, k in zip(current, keep) if k]
+        self._state = (current, matrix[keep], types[keep])
+        self._row = {d: i for i, d in enumerate(current)}
+
+    def search(self, query: np.ndarray, k: int, doc_type: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity), best first; scored like rescore() on the KNN path"""
+        ids, matrix, types = self._state
+        if not ids or k <= 0:
+            return []
+        scores = matrix @ normalize(query)
+        if doc_type is not None:
+            scores = np.where(types == doc_type, scores, -np.inf)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
@@ -1,18 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from supabase import create_client
-import os
+from app import db
 
 router = APIRouter(prefix="/waitlist", tags=["waitlist"])
 
-# Lazy load Supabase client
-def get_supabase_client():
-    url = os.getenv("SUPABASE_URL")
-    key = os.getenv("SUPABASE_SERVICE_ROLE")
-    if not url or not key:
-        raise HTTPException(500, "Supabase credentials not configured")
-    return create_client(url, key)
-
 class WaitlistRequest(BaseModel):
     startup_name: str
     email: EmailStr
@@ -20,11 +11,9 @@ class WaitlistRequest(BaseModel):
 @router.post("/join")
 async def join_waitlist(req: WaitlistRequest):
     """Add a new entry to the waitlist"""
-    sb = get_supabase_client()
-    
     try:
         # Check if email already exists
-        existing = sb.table("waitlist").select("email").eq("email", req.email).execute()
+        existing = await db.execute(db.table("waitlist").select("email").eq("email", req.email))
         
         if existing.data:
             return {
@@ -34,10 +23,10 @@ async def join_waitlist(req: WaitlistRequest):
             }
         
         # Insert new waitlist entry
-        result = sb.table("waitlist").insert({
+        result = await db.execute(db.table("waitlist").insert({
             "startup_name": req.startup_name,
             "email": req.email
-        }).execute()
+        }))
         
         print(f"[Waitlist] Added: {req.startup_name} ({req.email})")
         
@@ -54,10 +43,8 @@ async def join_waitlist(req: WaitlistRequest):
 @router.get("/count")
 async def get_waitlist_count():
     """Get total number of waitlist signups"""
-    sb = get_supabase_client()
-    
     try:
-        result = sb.table("waitlist").select("id", count="exact").execute()
+        result = await db.execute(db.table("waitlist").select("id", count="exact"))
         return {"count": result.count}
     except Exception as e:
         raise HTTPException(500, f"Failed to get count: {str(e)}")
@@ -0,0 +1,94 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold start: import time and time-to-first-response of a fresh worker
+For each run, spawns a new interpreter and measures (medians over --runs):
+  - `import app.main`
+  - uvicorn app.main:app: process spawn -> first 200 from /health, and
+    spawn -> first 200 from /openapi.json (all routers mounted)
+both with Redis reachable and with REDIS_PORT pointing at a closed port.
+--app-dir runs the same measurements against another checkout (e.g. a
+`git worktree` of an older commit) for a before/after comparison.
+
+Usage (from backend/):
+    python -m benchmarks.bench_cold_start [--runs 5] [--app-dir PATH]
+"""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_import(app_dir, env):
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=app_dir, env=env,
+                         capture_output=True, text=True, timeout=60)
+    return float(out.stdout.strip().splitlines()[-1]) if out.returncode == 0 else None
+
+
+def time_serve(app_dir, env, timeout=30.0):
+    """(spawn -> /health 200, spawn -> /openapi.json 200); None where never reached"""
+    port = free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "error"],
+                            cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    health = ready = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while time.perf_counter() - t0 < timeout and proc.poll() is None:
+                try:
+                    if client.get("/health").status_code == 200:
+                        health = time.perf_counter() - t0
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.002)
+            if health is not None and client.get("/openapi.json").status_code == 200:
+                ready = time.perf_counter() - t0
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return health, ready
+
+
+def median_ms(values):
+    values = [v for v in values if v is not None]
+    return f"{statistics.median(values) * 1000:7.0f} ms" if values else "   failed"
+
+
+def main(runs, app_dir):
+    base_env = {**os.environ, "PYTHONPATH": app_dir}
+    cases = [("redis up", base_env), ("redis down", {**base_env, "REDIS_PORT": str(free_port())})]
+    print(f"{app_dir}: medians of {runs} fresh processes")
+    for name, env in cases:
+        imports = [time_import(app_dir, env) for _ in range(runs)]
+        served = [time_serve(app_dir, env) for _ in range(runs)]
+        print(f"{name:>10}: import app.main {median_ms(imports)}   "
+              f"spawn->/health {median_ms([h for h, _ in served])}   "
+              f"spawn->routers ready {median_ms([r for _, r in served])}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name not in args:
+            return default
+        i = args.index(name)
+        value = args[i + 1]
+        del args[i:i + 2]
+        return value
+
+    runs = int(option("--runs", 5))
+    app_dir = os.path.abspath(option("--app-dir", os.getcwd()))
+    main(runs, app_dir)
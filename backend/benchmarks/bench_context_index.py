@@ -0,0 +1,133 @@
+# benchmarks/bench_context_index.py
+"""
+Transaction context indexing: naive re-indexing vs context_index
+Replays R refreshes of a workspace's transactions (each refresh re-sends
+every transaction, a few modified, a few removed) into a real Redis two ways:
+aadd_documents with fresh ids every time (what timestamp/uuid ids do) and
+context_index.index_transactions/forget. Each approach starts with a cold
+in-memory embedding cache. Reports stored documents, texts sent to the
+embeddings stand-in, time, and how many distinct transactions fill a top-10
+search for live transactions. Benchmark keys are removed afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_context_index [transactions] [--refreshes 5] [--embed-ms 100]
+"""
+
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from app import context_index, embedding_cache, vector_db as vdb
+from benchmarks.embedding_standin import EmbeddingStandin
+
+NAIVE, DEDUP = "bench-context-naive", "bench-context-dedup"
+
+
+def refreshes(n, rounds, seed=5):
+    """Transaction rows as each refresh sees them, plus the ids removed before it"""
+    rnd = np.random.default_rng(seed)
+    merchants = ["Amazon Web Services", "Gusto Payroll", "Notion Labs", "Delta Air Lines", "WeWork",
+                 "Google Ads", "Uber", "Slack", "Stripe Payout", "Figma", "Linear", "Datadog"]
+    categories = ["SaaS", "Payroll", "Travel", "Rent", "Marketing", "Revenue", "Meals", "Infrastructure"]
+    rows = {f"tx{i}": {"id": f"tx{i}", "ts": f"2026-{rnd.integers(1, 13):02d}-{rnd.integers(1, 29):02d}",
+                       "merchant": merchants[rnd.integers(len(merchants))],
+                       "category": categories[rnd.integers(len(categories))],
+                       "amount": -round(float(rnd.uniform(5, 20000)), 2)}
+            for i in range(n)}
+    for r in range(rounds):
+        removed = []
+        if r:
+            ids = list(rows)
+            for t in rnd.choice(ids, len(ids) // 20, replace=False):        # 5% modified
+                rows[t] = {**rows[t], "amount": round(rows[t]["amount"] * 1.1, 2)}
+            removed = [str(t) for t in rnd.choice(ids, len(ids) // 50, replace=False)]   # 2% removed
+            for t in removed:
+                del rows[t]
+        yield list(rows.values()), removed
+
+
+async def cleanup():
+    r = vdb.get_async_redis()
+    for ws in (NAIVE, DEDUP):
+        keys = [f"vec:{d}" for d in await r.smembers(vdb._id_set(ws))]
+        keys += [vdb._id_set(ws), vdb._version_key(ws), context_index._map_key(ws)]
+        for i in range(0, len(keys), 1000):
+            await r.unlink(*keys[i:i + 1000])
+
+
+async def top10_distinct(ws, queries):
+    counts = []
+    for q in queries:
+        found = await vdb.vector_db.asearch(q, ws, top_k=10, score_threshold=-1)
+        counts.append(len({d["metadata"]["transaction_id"] for d in found}))
+    return np.mean(counts)
+
+
+async def naive(rows, removed):
+    """Every refresh re-adds every row under a fresh id; removals are never deleted"""
+    await vdb.vector_db.aadd_documents(NAIVE, [
+        {"content": context_index.describe(row), "metadata": context_index._metadata(row)} for row in rows])
+
+
+async def incremental(rows, removed):
+    await context_index.forget(DEDUP, removed)
+    await context_index.index_transactions(DEDUP, rows)
+
+
+async def run(ws, step, n, rounds, standin):
+    """Replay the refreshes through step; embedding cache is cold for each approach"""
+    embedding_cache.memory.clear()
+    standin.inputs = 0
+    elapsed = 0.0
+    for rows, removed in refreshes(n, rounds):
+        t0 = time.perf_counter()
+        await step(rows, removed)
+        elapsed += time.perf_counter() - t0
+    queries = [context_index.describe(row) for row in rows[:50]]
+    return {"docs": await vdb.get_async_redis().scard(vdb._id_set(ws)), "texts": standin.inputs,
+            "time": elapsed, "distinct": await top10_distinct(ws, queries), "live": len(rows)}
+
+
+async def bench(n, rounds, standin):
+    await cleanup()
+    try:
+        return (await run(NAIVE, naive, n, rounds, standin),
+                await run(DEDUP, incremental, n, rounds, standin))
+    finally:
+        await cleanup()
+        await vdb.close_async()
+
+
+def main(n, rounds, latency):
+    standin = EmbeddingStandin(latency=latency)
+    vdb._async_openai = standin.async_client()
+    embedding_cache._get_redis = embedding_cache._get_aredis = lambda: None   # memory tier only
+    vdb.VECTOR_INDEX = "local"
+    context_index.INDEX_TRANSACTIONS = True     # opt-in in the app
+    results = asyncio.run(bench(n, rounds, standin))
+
+    live = results[0]["live"]
+    print(f"{n} transactions, {rounds} refreshes (5% modified, 2% removed each), {live} live at the end, "
+          f"embeddings latency {latency * 1000:.0f} ms")
+    for name, row in zip(("naive", "context_index"), results):
+        print(f"{name:>14}: {row['docs']:7d} docs stored ({row['docs'] / live:.2f} per live transaction)   "
+              f"{row['texts']:7d} texts embedded   {row['time']:6.1f} s   "
+              f"top-10 holds {row['distinct']:.1f} distinct transactions")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name not in args:
+            return default
+        i = args.index(name)
+        value = float(args[i + 1])
+        del args[i:i + 2]
+        return value
+
+    rounds = int(option("--refreshes", 5))
+    latency = option("--embed-ms", 100) / 1000
+    main(int(args[0]) if args else 2000, rounds, latency)
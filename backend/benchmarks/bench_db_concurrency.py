@@ -0,0 +1,76 @@
+# benchmarks/bench_db_concurrency.py
+"""
+Blocking .execute() vs app.db.execute under concurrent requests
+Simulates N async handlers that each make one slow Supabase round trip and
+measures total wall time plus the worst event-loop stall seen by a ticker.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_concurrency [requests] [latency_ms]
+"""
+
+import asyncio
+import sys
+import time
+
+from app import db
+
+
+class SlowQuery:
+    """Stands in for a built supabase query; .execute() blocks like a network round trip"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return {"data": []}
+
+
+async def ticker(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the longest gap between ticks, i.e. the worst event-loop stall"""
+    worst, last = 0.0, time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst = max(worst, now - last - interval)
+        last = now
+    return worst
+
+
+async def scenario(handler, n: int, latency: float):
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    await asyncio.sleep(0)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(handler(SlowQuery(latency)) for _ in range(n)))
+    wall = time.perf_counter() - t0
+    stop.set()
+    return wall, await tick
+
+
+async def blocking_handler(query):
+    return query.execute()          # what the handlers used to do
+
+
+async def offloaded_handler(query):
+    return await db.execute(query)
+
+
+async def main(n: int, latency: float):
+    print(f"{n} concurrent requests, {latency*1000:.0f} ms per round trip, "
+          f"DB_MAX_WORKERS={db.DB_MAX_WORKERS}")
+    for name, handler in [("blocking", blocking_handler), ("app.db", offloaded_handler)]:
+        wall, stall = await scenario(handler, n, latency)
+        print(f"{name:>9}: wall {wall*1000:8.1f} ms | worst loop stall {stall*1000:8.1f} ms")
+
+    blocking_wall, _ = await scenario(blocking_handler, n, latency)
+    offloaded_wall, stall = await scenario(offloaded_handler, n, latency)
+    assert offloaded_wall < blocking_wall / 2, "offloaded queries still serialize"
+    assert stall < latency, "event loop was blocked by a query"
+    print("ok: requests overlap and the event loop stays responsive")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(n, latency_ms / 1000))
@@ -0,0 +1,100 @@
+# benchmarks/bench_embedding_cache.py
+"""
+Embedding cache: hit rate, API calls and latency on a repetitive workload
+Draws texts from a Zipf distribution over a fixed vocabulary of merchant
+descriptions and canned questions (the way add/search traffic repeats), and
+embeds them in batches through VectorDB._get_embeddings three ways: no cache,
+a cold cache, and the same workload again with only the Redis tier warm
+(memory cleared, as after a restart). Uses the embeddings stand-in and a
+local Redis; benchmark keys are removed afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_cache [requests] [--distinct 2000] [--embed-ms 100]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app import embedding_cache, vector_db as vdb
+from benchmarks.embedding_standin import EmbeddingStandin, sample_texts
+
+MODEL = "bench-embedding-cache"
+BATCH = 32
+
+
+def workload(n, distinct, seed=9):
+    vocab = sample_texts(distinct, seed=seed)
+    ranks = np.random.default_rng(seed).zipf(1.3, n) % distinct
+    texts = [vocab[r] for r in ranks]
+    return [texts[i:i + BATCH] for i in range(0, n, BATCH)], vocab
+
+
+def run(db, batches):
+    t0 = time.perf_counter()
+    for batch in batches:
+        db._get_embeddings(batch)
+    return time.perf_counter() - t0
+
+
+def main(n, distinct, latency):
+    standin = EmbeddingStandin(latency=latency)
+    vdb._openai = standin.client()
+    vdb.EMBEDDING_MODEL = MODEL
+    db = vdb.vector_db
+    batches, vocab = workload(n, distinct)
+    r = embedding_cache._get_redis()
+
+    def reset():
+        embedding_cache.memory.clear()
+        embedding_cache.memory.hits = embedding_cache.memory.misses = 0
+        embedding_cache._counts.update(redis_hits=0, embedded=0)
+        standin.requests = standin.inputs = 0
+
+    def cleanup():
+        keys = [embedding_cache.KEY_PREFIX + embedding_cache.cache_key(MODEL, t) for t in vocab]
+        for i in range(0, len(keys), 1000):
+            r.unlink(*keys[i:i + 1000])
+
+    rows = []
+    cleanup()
+    try:
+        # No cache: every text goes to the API, duplicates included (the previous behaviour)
+        reset()
+        t0 = time.perf_counter()
+        for batch in batches:
+            db._embed_api(batch)
+        t = time.perf_counter() - t0
+        rows.append(("no cache", t, standin.requests, standin.inputs, None))
+
+        reset()
+        t = run(db, batches)
+        rows.append(("cold cache", t, standin.requests, standin.inputs, embedding_cache.stats()))
+
+        reset()   # memory tier empty, Redis tier warm (restart / another instance)
+        t = run(db, batches)
+        rows.append(("redis tier only", t, standin.requests, standin.inputs, embedding_cache.stats()))
+    finally:
+        cleanup()
+
+    print(f"{n} texts in batches of {BATCH}, {distinct} distinct (Zipf), embeddings latency {latency * 1000:.0f} ms")
+    for name, t, requests, inputs, st in rows:
+        rate = f"hit rate {st['hit_rate']:.1%} (memory {st['memory']['hits']}, redis {st['redis_hits']})" if st else ""
+        print(f"{name:>16}: {t:6.2f} s  {requests:5d} API requests  {inputs:6d} texts embedded  {rate}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name not in args:
+            return default
+        i = args.index(name)
+        value = float(args[i + 1])
+        del args[i:i + 2]
+        return value
+
+    distinct = int(option("--distinct", 2000))
+    latency = option("--embed-ms", 100) / 1000
+    main(int(args[0]) if args else 20_000, distinct, latency)
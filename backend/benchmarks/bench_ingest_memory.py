@@ -0,0 +1,158 @@
+# benchmarks/bench_ingest_memory.py
+"""
+Peak memory and wall time of Plaid ingestion: buffered vs streaming
+Serves a synthetic item from the local Plaid stand-in (in-process, over an
+ASGI transport with a simulated per-page latency) and writes into a no-op Supabase client with a fixed
+per-request latency. "buffered" is the previous behaviour: pull every page,
+build one row list with the full raw JSON, one upsert. "streaming" is
+plaid._sync_item: next page prefetched and transformed while earlier pages'
+batches are written, anomaly scoring one page behind, one rollup update per sync.
+Wall time comes from an untraced run; peak memory from a second run under
+tracemalloc (which slows allocation-heavy code several-fold), measured after
+the stand-in's own ledger is built.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ingest_memory [txns ...] [--latency-ms 20] [--plaid-ms 250]
+"""
+
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+from app import db, plaid, rollups
+from benchmarks import plaid_standin
+
+
+class SlowTransport(httpx.AsyncBaseTransport):
+    """ASGI transport to the stand-in plus a fixed Plaid round-trip latency"""
+
+    def __init__(self, latency: float):
+        self.inner = httpx.ASGITransport(app=plaid_standin.app)
+        self.latency = latency
+
+    async def handle_async_request(self, request):
+        await asyncio.sleep(self.latency)
+        return await self.inner.handle_async_request(request)
+
+
+class _Result:
+    data: list = []
+
+
+class NullQuery:
+    """Accepts any PostgREST builder chain; execute() sleeps like a round trip"""
+
+    def __init__(self, sb):
+        self.sb = sb
+
+    def __getattr__(self, name):
+        return lambda *a, **kw: self
+
+    def execute(self):
+        time.sleep(self.sb.latency)
+        self.sb.requests += 1
+        return _Result()
+
+
+class NullSupabase:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+
+    def table(self, name):
+        return NullQuery(self)
+
+    def rpc(self, name, params):
+        return NullQuery(self)
+
+
+async def buffered(config, item, note):
+    """Old path: every page in memory, one row list, one upsert"""
+    added, cursor = [], item.get("cursor")
+    while True:
+        payload = {"client_id": "x", "secret": "x", "access_token": item["access_token"],
+                   "count": plaid.SYNC_PAGE_SIZE}
+        if cursor:
+            payload["cursor"] = cursor
+        page = await plaid._post("/transactions/sync", payload, config)
+        added += page["added"] + page["modified"]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    rows = [{**plaid._transform(t, item["workspace_id"], note), "raw": t} for t in added]
+    sb, ws = db.get_client(), item["workspace_id"]
+    await db.run(lambda: rollups.apply(sb, ws, rows, plaid._store_transactions(sb, ws, rows)))
+    return {"added": len(added)}
+
+
+async def measure(fn, config, item):
+    """(peak MB, wall seconds): timed untraced, then run again under tracemalloc for the peak"""
+    gc.collect()
+    t0 = time.perf_counter()
+    await fn(config, item, "bench")
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    await fn(config, item, "bench")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (peak - base) / 2**20, elapsed
+
+
+async def main(sizes, latency, plaid_latency):
+    plaid._http = httpx.AsyncClient(transport=SlowTransport(plaid_latency))
+    config = {"base": "http://standin", "client_id": "x", "secret": "x"}
+    db._client = NullSupabase(latency)
+
+    import builtins
+    quiet = builtins.print
+    builtins.print = lambda *a, **kw: None   # ingestion logs per batch
+    results = []
+    try:
+        for n in sizes:
+            item_id = plaid_standin._new_item(n)
+            token = f"access-standin-{item_id}"
+            plaid_standin._tokens[token] = item_id
+            item = {"item_id": item_id, "workspace_id": "bench", "access_token": token, "cursor": None}
+            row = [n]
+            for fn in (buffered, plaid._sync_item):
+                for raw_mode in ("full", "compact"):
+                    if fn is buffered and raw_mode == "compact":
+                        continue
+                    plaid.PLAID_RAW = raw_mode
+                    row.append(await measure(fn, config, item))
+            results.append(row)
+            del plaid_standin._items[item_id]
+    finally:
+        builtins.print = quiet
+        await plaid._http.aclose()
+
+    print(f"latency per Supabase request: {latency * 1000:.0f} ms, per Plaid page: "
+          f"{plaid_latency * 1000:.0f} ms, batch size {plaid.INGEST_BATCH_SIZE}, "
+          f"write-ahead {plaid.WRITE_AHEAD} pages")
+    print(f"{'txns':>8}  {'buffered':>18}  {'streaming':>18}  {'streaming+compact':>18}")
+    for n, *cols in results:
+        cells = [f"{mb:7.1f} MB {s:6.2f} s" for mb, s in cols]
+        print(f"{n:>8}  " + "  ".join(f"{c:>18}" for c in cells))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name not in args:
+            return default
+        i = args.index(name)
+        value = float(args[i + 1]) / 1000
+        del args[i:i + 2]
+        return value
+
+    latency = option("--latency-ms", 0.02)
+    plaid_latency = option("--plaid-ms", 0.25)
+    sizes = [int(a) for a in args] or [2_000, 10_000, 50_000]
+    asyncio.run(main(sizes, latency, plaid_latency))
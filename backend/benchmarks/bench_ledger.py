@@ -0,0 +1,84 @@
+# benchmarks/bench_ledger.py
+"""
+Row-dict loops vs the columnar Ledger
+Folds synthetic rows into rollup month buckets (revenue, expense, count and
+per-category expense) both ways, as the rollup writer and rebuild do.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ledger [10000 100000 1000000]
+"""
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from app.ledger import Ledger
+
+CATEGORIES = ["SaaS", "Payroll", "Marketing", "Travel", "Office", "Meals", None]
+
+
+def make_rows(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    start = date.today() - timedelta(days=365)
+    return [{
+        "ts": (start + timedelta(days=rnd.randrange(365))).isoformat(),
+        "amount": round(rnd.uniform(-2500, 1500), 2),
+        "category": rnd.choice(CATEGORIES),
+        "merchant": f"Merchant {rnd.randrange(500)}",
+    } for _ in range(n)]
+
+
+def loop_version(rows):
+    """Per-row month/category buckets, as the rollups were folded before the Ledger"""
+    buckets = {}
+    for t in rows:
+        amt = float(t["amount"])
+        b = buckets.setdefault(str(t["ts"])[:7], {"revenue": 0.0, "expense": 0.0, "txn_count": 0,
+                                                  "categories": {}})
+        b["txn_count"] += 1
+        if amt >= 0:
+            b["revenue"] += amt
+        else:
+            b["expense"] += -amt
+            c = b["categories"].setdefault(t.get("category") or "Other", {"expense": 0.0, "count": 0})
+            c["expense"] += -amt
+            c["count"] += 1
+    return buckets
+
+
+def ledger_version(rows):
+    t0 = time.perf_counter()
+    led = Ledger.from_rows(rows)
+    t1 = time.perf_counter()
+    buckets = led.month_buckets()
+    return buckets, t1 - t0, time.perf_counter() - t1
+
+
+def best_of(fn, repeat):
+    best, best_out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        if best is None or dt < best:
+            best, best_out = dt, out
+    return best, best_out
+
+
+def main(sizes):
+    print(f"{'rows':>9} | {'loop ms':>9} | {'ledger ms':>9} | {'build ms':>9} | {'compute ms':>10} | speedup")
+    for n in sizes:
+        rows = make_rows(n)
+        repeat = 5 if n <= 100_000 else 2
+        loop_s, loop_out = best_of(lambda: loop_version(rows), repeat)
+        led_s, (led_out, build_s, compute_s) = best_of(lambda: ledger_version(rows), repeat)
+        assert loop_out.keys() == led_out.keys() and all(
+            loop_out[m]["txn_count"] == led_out[m]["txn_count"]
+            and abs(loop_out[m]["expense"] - led_out[m]["expense"]) < 0.01 for m in loop_out), "buckets differ"
+        print(f"{n:>9} | {loop_s*1000:>9.1f} | {led_s*1000:>9.1f} | {build_s*1000:>9.1f} | "
+              f"{compute_s*1000:>10.1f} | {loop_s/led_s:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
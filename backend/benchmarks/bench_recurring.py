@@ -0,0 +1,125 @@
+# benchmarks/bench_recurring.py
+"""
+Recurring-charge detection: per-merchant Python loop vs sort-and-group NumPy
+Builds a synthetic ledger of subscriptions (monthly, biweekly, annual, with
+jittered days, noisy merchant names and occasional price changes) buried in
+one-off spend, then runs both detectors on the same fetched-row dicts and
+checks they agree. Both timings are end to end from the rows, so the NumPy
+side includes pulling its columns out of them.
+
+Usage (from backend/):
+    python -m benchmarks.bench_recurring [100000 1000000]
+"""
+
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from app import recurring
+from app.merchant_memo import normalize_merchant
+
+AS_OF = date(2026, 6, 30)
+
+
+def _word(i: int) -> str:
+    """Digit-free merchant name (normalize_merchant drops tokens with digits)"""
+    letters = ""
+    while True:
+        letters += "abcdefghijklmnopqrstuvwxyz"[i % 26]
+        i //= 26
+        if not i:
+            return letters.capitalize()
+
+
+def make_rows(n: int, seed: int = 11):
+    rnd = random.Random(seed)
+    start = AS_OF - timedelta(days=recurring.LOOKBACK_DAYS)
+    rows, subs = [], 0
+    # Subscriptions: ~5% of rows
+    while len(rows) < n // 20:
+        period = rnd.choice([7, 14, 30, 30, 30, 91])
+        amount = round(rnd.uniform(10, 5000), 2)
+        name = f"{_word(subs)} {rnd.choice(['Inc', 'LLC', 'SaaS', 'Cloud'])}"
+        day = start + timedelta(days=rnd.randrange(period))
+        bump = rnd.random() < 0.2
+        while day <= AS_OF:
+            late = rnd.random() < 0.3
+            rows.append({
+                "ts": (day + timedelta(days=rnd.randint(-1, 1))).isoformat(),
+                "amount": -(amount * (1.15 if bump and late and day > AS_OF - timedelta(days=60) else 1.0)),
+                "category": "SaaS",
+                "merchant": f"{name} {rnd.randrange(10**6)}" if rnd.random() < 0.5 else name,
+            })
+            day += timedelta(days=period)
+        subs += 1
+    # One-off spend and revenue
+    while len(rows) < n:
+        rows.append({
+            "ts": (start + timedelta(days=rnd.randrange(recurring.LOOKBACK_DAYS))).isoformat(),
+            "amount": round(rnd.uniform(-2500, 1500), 2),
+            "category": rnd.choice(["Travel", "Meals", "Office", "Marketing", None]),
+            "merchant": f"Shop {_word(rnd.randrange(50_000))}",
+        })
+    rnd.shuffle(rows)
+    return rows
+
+
+def loop_version(rows):
+    """Group with a dict of lists and compute the same statistics per merchant in Python"""
+    by_merchant = {}
+    for t in rows:
+        amt = float(t["amount"])
+        key = normalize_merchant(t.get("merchant"))
+        if amt >= 0 or not key:
+            continue
+        by_merchant.setdefault(key, {}).setdefault(str(t["ts"])[:10], 0.0)
+        by_merchant[key][str(t["ts"])[:10]] -= amt
+    found = []
+    for key, days in by_merchant.items():
+        if len(days) < recurring.MIN_OCCURRENCES:
+            continue
+        ds = sorted(days)
+        ords = [date.fromisoformat(d).toordinal() for d in ds]
+        gaps = [b - a for a, b in zip(ords, ords[1:])]
+        med = sorted(gaps)[(len(gaps) - 1) // 2]
+        name, period, tol = min(recurring.CADENCES, key=lambda c: abs(med - c[1]))
+        if abs(med - period) > tol:
+            continue
+        regularity = sum(abs(g - period) <= tol for g in gaps) / len(gaps)
+        amounts = [days[d] for d in ds]
+        mid = sorted(amounts)[(len(amounts) - 1) // 2]
+        spread = statistics.fmean(abs(a - mid) for a in amounts) / max(mid, 0.01)
+        if regularity >= recurring.MIN_REGULARITY and spread <= recurring.MAX_SPREAD:
+            found.append(key)
+    return found
+
+
+def best_of(fn, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def main(sizes):
+    for n in sizes:
+        rows = make_rows(n)
+        repeat = 3 if n <= 100_000 else 2
+        t_loop, loop = best_of(lambda: loop_version(rows), repeat)
+        t_vec, found = best_of(lambda: recurring.detect(rows, AS_OF), repeat)
+
+        vec = {r["merchant_key"] for r in found}
+        agree = "yes" if vec == set(loop) else f"NO ({len(vec ^ set(loop))} differ)"
+        print(f"{n:>9} rows  loop {t_loop * 1000:8.0f} ms   numpy {t_vec * 1000:8.0f} ms"
+              f"   ({t_loop / t_vec:4.1f}x end to end)"
+              f"   recurring={len(found)} price changes={sum(r['price_change'] for r in found)}"
+              f"   agree={agree}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100_000, 1_000_000])
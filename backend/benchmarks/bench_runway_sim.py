@@ -0,0 +1,90 @@
+# benchmarks/bench_runway_sim.py
+"""
+Monte Carlo runway: per-path Python loop vs app.runway.simulate
+Fits a SpendModel to synthetic monthly rollups (12 expense categories plus
+revenue, 9 months of history) and times the simulation at several path
+counts over a 36-month horizon. The loop baseline samples the same lognormals
+with `random.lognormvariate`, one month and category at a time, and is only
+run up to 10k paths.
+
+Usage (from backend/):
+    python -m benchmarks.bench_runway_sim [1000 10000 100000]
+"""
+
+import math
+import random
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+from app import runway
+
+HORIZON = 36
+CASH = 900_000.0
+TARGET_MS = 100
+
+
+def make_rollups(categories: int = 12, months: int = 9, seed: int = 5):
+    rnd = random.Random(seed)
+    levels = {f"Category {chr(65 + j)}": rnd.uniform(1_000, 15_000) for j in range(categories)}
+    return [{
+        "month": f"2026-{m:02d}",
+        "revenue": round(rnd.gauss(40_000, 6_000), 2),
+        "expense": 0,
+        "categories": {c: {"expense": round(max(rnd.gauss(v, 0.2 * v), 0), 2), "count": 10}
+                       for c, v in levels.items()},
+    } for m in range(1, months + 1)]
+
+
+def loop_version(model, cash, factors, paths, horizon, seed=0):
+    """One path at a time, one draw per month and category"""
+    rnd = random.Random(seed)
+    params = [(float(m), float(s)) for m, s in zip(*runway._lognormal_params(model.expense))]
+    rev = [float(x[0]) for x in runway._lognormal_params(model.revenue[:, None])]
+    out = []
+    for _ in range(paths):
+        balance, months = cash, float(horizon)
+        for t in range(horizon):
+            burn = sum(f * rnd.lognormvariate(m, s) for (m, s), f in zip(params, factors) if math.isfinite(m))
+            burn -= rnd.lognormvariate(*rev)
+            if balance - burn < 0:
+                months = t + min(max(balance / burn, 0), 1)
+                break
+            balance -= burn
+        out.append(months)
+    return np.array(out)
+
+
+def main(sizes):
+    model = runway.SpendModel.from_rollups(make_rollups(), today=date(2026, 10, 15))
+    factors, _ = model.cut_factors([{"category": "Category A", "delta_pct": -30}])
+    net = float(model.expense.mean(axis=0) @ factors - model.revenue.mean())
+    print(f"{len(model.categories)} categories, {len(model)} months of history, horizon {HORIZON} months, "
+          f"mean-burn runway {CASH / net:.1f} months")
+
+    runway.simulate(model, CASH, factors, paths=100, horizon=HORIZON)   # warm-up
+    for n in sizes:
+        timings = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            sim = runway.simulate(model, CASH, factors, paths=n, horizon=HORIZON)
+            timings.append(time.perf_counter() - t0)
+        t_vec = min(timings)
+        pct = runway.percentiles(sim, HORIZON)
+        line = (f"{n:>8} paths  numpy {t_vec * 1000:7.1f} ms   p10/p50/p90 "
+                f"{pct['p10']}/{pct['p50']}/{pct['p90']}")
+        if n <= 10_000:
+            t0 = time.perf_counter()
+            ref = loop_version(model, CASH, factors, n, HORIZON)
+            t_loop = time.perf_counter() - t0
+            line += (f"   loop {t_loop * 1000:8.0f} ms ({t_loop / t_vec:5.0f}x)   loop p50 "
+                     f"{np.percentile(ref, 50):.1f}")
+        if n == 10_000:
+            line += f"   under {TARGET_MS} ms: {'yes' if t_vec * 1000 < TARGET_MS else 'NO'}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
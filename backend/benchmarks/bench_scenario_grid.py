@@ -0,0 +1,78 @@
+# benchmarks/bench_scenario_grid.py
+"""
+Scenario grid: one what_if per scenario vs one vectorized grid pass
+"per scenario" repeats what a /agent/what_if call does for each grid cell:
+fit the spend model from the rollups, project burn/runway, simulate. "grid"
+is /agent/what_if/grid: one fit, one project() over all scenarios, one
+simulate_grid() with shared draws. Compute only; the endpoint also saves one
+snapshot fetch and one LLM round trip per scenario, which the last columns count.
+
+Usage (from backend/):
+    python -m benchmarks.bench_scenario_grid [10 50 200] [--paths 2000]
+"""
+
+import itertools
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+from app import runway
+from benchmarks.bench_runway_sim import make_rollups
+
+TODAY = date(2026, 10, 15)
+BURN, CASH = 35_000.0, 900_000.0
+
+
+def make_grid(n: int):
+    raises = [0, 250_000, 500_000, 1_000_000, 2_000_000]
+    cuts = [[]] + [[{"category": f"Category {chr(65 + j)}", "delta_pct": -p}] for j in range(12) for p in (10, 25, 50)]
+    growth = [0, 10, 25, 50]
+    return list(itertools.islice(itertools.product(raises, cuts, growth), n))
+
+
+def per_scenario(rows, grid, paths):
+    out = []
+    for raise_amount, cuts, growth in grid:
+        model = runway.SpendModel.from_rollups(rows, TODAY)
+        factors, _ = model.cut_factors(cuts)
+        proj = runway.project(BURN, CASH, *model.recent(rows), [raise_amount], [factors], [1 + growth / 100])
+        sim = runway.simulate(model, float(proj["cash"][0]), factors, 1 + growth / 100, paths)
+        out.append(np.median(sim))
+    return np.array(out)
+
+
+def grid_pass(rows, grid, paths):
+    model = runway.SpendModel.from_rollups(rows, TODAY)
+    factors = np.array([model.cut_factors(c)[0] for _, c, _ in grid])
+    revenue_factor = np.array([1 + g / 100 for _, _, g in grid])
+    proj = runway.project(BURN, CASH, *model.recent(rows), [a for a, _, _ in grid], factors, revenue_factor)
+    return np.median(runway.simulate_grid(model, proj["cash"], factors, revenue_factor, paths), axis=1)
+
+
+def main(sizes, paths):
+    rows = make_rollups()
+    print(f"{paths} paths x 36 months per scenario")
+    print(f"{'scenarios':>9}  {'per scenario':>12}  {'grid':>9}  {'speedup':>7}  "
+          f"{'round trips (fetch+LLM)':>24}  max |p50 diff|")
+    for n in sizes:
+        grid = make_grid(n)
+        t0 = time.perf_counter()
+        loop = per_scenario(rows, grid, paths)
+        t_loop = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        vec = grid_pass(rows, grid, paths)
+        t_grid = time.perf_counter() - t0
+        print(f"{n:>9}  {t_loop * 1000:9.0f} ms  {t_grid * 1000:6.0f} ms  {t_loop / t_grid:6.1f}x  "
+              f"{f'{2 * n} -> 2':>24}  {np.abs(loop - vec).max():.2f} months")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    paths = 2000
+    if "--paths" in args:
+        i = args.index("--paths")
+        paths = int(args[i + 1])
+        del args[i:i + 2]
+    main([int(a) for a in args] or [10, 50, 200], paths)
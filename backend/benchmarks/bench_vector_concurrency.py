@@ -0,0 +1,152 @@
+# benchmarks/bench_vector_concurrency.py
+"""
+VectorDB retrieval under concurrent requests: sync client vs pooled async client
+Indexes N stand-in documents into one workspace of a real Redis, then runs
+concurrent retrievals from the event loop, the way request handlers do:
+VectorDB.search (the synchronous client, called inline) and VectorDB.asearch
+with async pools of 1..64 connections. Redis is reached through a local TCP
+proxy that adds a fixed round-trip time (--rtt-ms) so network latency is
+visible on localhost. Query embeddings are pre-warmed in the in-memory
+embedding cache, so only Redis and the index are measured. Benchmark keys
+are removed afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_concurrency [docs] [--queries 2000] [--concurrency 64] [--rtt-ms 2]
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import redis
+
+from app import embedding_cache, vector_db as vdb
+from benchmarks.embedding_standin import EmbeddingStandin, sample_texts
+
+WORKSPACE = "bench-concurrency"
+
+
+def start_latency_proxy(rtt: float) -> int:
+    """TCP proxy to REDIS_HOST:REDIS_PORT delaying each direction by rtt/2; returns its port"""
+    upstream = (os.environ.get("REDIS_HOST", "localhost"), int(os.environ.get("REDIS_PORT", 6379)))
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    port = []
+
+    async def pump(reader, writer):
+        try:
+            while data := await reader.read(65536):
+                loop.call_later(rtt / 2, writer.write, data)
+        finally:
+            loop.call_later(rtt / 2, writer.close)
+
+    async def connection(client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection(*upstream)
+        await asyncio.gather(pump(client_reader, server_writer), pump(server_reader, client_writer),
+                             return_exceptions=True)
+
+    async def serve():
+        server = await asyncio.start_server(connection, "127.0.0.1", 0)
+        port.append(server.sockets[0].getsockname()[1])
+        started.set()
+
+    threading.Thread(target=lambda: (loop.run_until_complete(serve()), loop.run_forever()), daemon=True).start()
+    started.wait()
+    return port[0]
+
+
+def cleanup():
+    keys = [f"vec:{d}" for d in vdb.redis_client.smembers(vdb._id_set(WORKSPACE))]
+    keys += [vdb._id_set(WORKSPACE), vdb._version_key(WORKSPACE)]
+    for i in range(0, len(keys), 1000):
+        vdb.redis_client.unlink(*keys[i:i + 1000])
+
+
+async def drive(search, probes, queries, concurrency):
+    """`queries` searches from `concurrency` concurrent callers; returns (elapsed, per-query latencies)"""
+    latencies = []
+
+    async def caller(worker):
+        for q in range(worker, queries, concurrency):
+            t0 = time.perf_counter()
+            await search(probes[q % len(probes)])
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(caller(w) for w in range(concurrency)))
+    return time.perf_counter() - t0, np.array(latencies)
+
+
+async def bench(db, probes, queries, concurrency, pools):
+    rows = []
+
+    async def sync_search(q):
+        return db.search(q, WORKSPACE, top_k=5, score_threshold=0)
+
+    async def async_search(q):
+        return await db.asearch(q, WORKSPACE, top_k=5, score_threshold=0)
+
+    await sync_search(probes[0])   # load the in-process index once, outside the timings
+    vdb.REDIS_POOL_TIMEOUT = 120     # a 1-connection pool under 64 callers queues for a long time
+    rows.append(("sync client", "-", *await drive(sync_search, probes, queries, concurrency)))
+    for size in pools:
+        await vdb.close_async()
+        vdb.REDIS_POOL_SIZE = size
+        await async_search(probes[0])
+        rows.append(("async pool", size, *await drive(async_search, probes, queries, concurrency)))
+    await vdb.close_async()
+    return rows
+
+
+def main(n, queries, concurrency, rtt):
+    vdb._openai = EmbeddingStandin(latency=0, per_input=0).client()
+    embedding_cache._get_redis = embedding_cache._get_aredis = lambda: None   # memory tier only
+    db = vdb.vector_db
+    vdb.VECTOR_INDEX = "local"    # measure the in-process index even on Redis Stack
+    texts = sample_texts(n)
+    probes = [texts[i] for i in np.random.default_rng(2).choice(n, 200, replace=False)]
+
+    cleanup()
+    try:
+        db.add_documents(WORKSPACE, [{"content": t, "metadata": {"type": "transaction"}} for t in texts])
+        db._get_embeddings(probes)   # query embeddings now served from memory
+
+        port = start_latency_proxy(rtt)
+        os.environ["REDIS_PORT"] = str(port)
+        direct = vdb.redis_client, vdb.redis_bytes
+        vdb.redis_client = redis.Redis(port=port, decode_responses=True)
+        vdb.redis_bytes = redis.Redis(port=port)
+        try:
+            rows = asyncio.run(bench(db, probes, queries, concurrency, [1, 4, 16, 64]))
+        finally:
+            vdb.redis_client, vdb.redis_bytes = direct
+    finally:
+        cleanup()
+
+    print(f"{n} documents, {queries} searches from {concurrency} concurrent callers, Redis RTT {rtt * 1000:.1f} ms")
+    base = queries / rows[0][2]
+    for name, size, elapsed, lat in rows:
+        qps = queries / elapsed
+        print(f"{name:>12} connections={size!s:>3}: {qps:8.0f} searches/s   "
+              f"p50 {np.percentile(lat, 50) * 1000:7.1f} ms   p99 {np.percentile(lat, 99) * 1000:7.1f} ms   "
+              f"({qps / base:.1f}x)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name not in args:
+            return default
+        i = args.index(name)
+        value = float(args[i + 1])
+        del args[i:i + 2]
+        return value
+
+    queries = int(option("--queries", 2000))
+    concurrency = int(option("--concurrency", 64))
+    rtt = option("--rtt-ms", 2) / 1000
+    main(int(args[0]) if args else 500, queries, concurrency, rtt)
@@ -0,0 +1,76 @@
+# benchmarks/bench_vector_ingest.py
+"""
+VectorDB ingestion throughput: add_document per doc vs add_documents
+Writes into a real Redis (REDIS_HOST/REDIS_PORT, plain Redis is enough) and
+embeds through the local embeddings stand-in with a fixed per-request
+latency. Reports documents/second, embeddings requests and Redis round trips.
+Benchmark keys (vec:bench-ingest:*) are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_ingest [docs] [--embed-ms 100] [--batch 128] [--concurrency 4]
+"""
+
+import sys
+import time
+
+from app import vector_db as vdb
+from benchmarks.embedding_standin import EmbeddingStandin, sample_texts
+
+WORKSPACE = "bench-ingest"
+
+
+def cleanup():
+    keys = list(vdb.redis_client.scan_iter(f"vec:{WORKSPACE}:*", count=1000))
+    for i in range(0, len(keys), 1000):
+        vdb.redis_client.unlink(*keys[i:i + 1000])
+
+
+def main(n, latency, batch, concurrency):
+    standin = EmbeddingStandin(latency=latency)
+    vdb._openai = standin.client()
+    db = vdb.vector_db
+    texts = sample_texts(n)
+    docs = [{"content": t, "metadata": {"type": "transaction"}} for t in texts]
+    serial_n = min(n, 200)   # the serial path is slow; time a slice and report the rate
+
+    cleanup()
+    try:
+        t0 = time.perf_counter()
+        for d in docs[:serial_n]:
+            db.add_document(WORKSPACE, d["content"], d["metadata"])
+        t_serial = time.perf_counter() - t0
+        serial_requests = standin.requests
+        cleanup()
+
+        standin.requests = 0
+        t0 = time.perf_counter()
+        ids = db.add_documents(WORKSPACE, docs, batch_size=batch, concurrency=concurrency)
+        t_bulk = time.perf_counter() - t0
+        stored = sum(1 for _ in vdb.redis_client.scan_iter(f"vec:{WORKSPACE}:*", count=1000))
+    finally:
+        cleanup()
+
+    batches = -(-n // batch)
+    print(f"embeddings latency {latency * 1000:.0f} ms/request, batch {batch}, concurrency {concurrency}")
+    print(f"add_document  : {serial_n:>6} docs {t_serial:7.2f} s  {serial_n / t_serial:8.1f} docs/s  "
+          f"{serial_requests} embedding requests, {serial_n} Redis round trips")
+    print(f"add_documents : {n:>6} docs {t_bulk:7.2f} s  {n / t_bulk:8.1f} docs/s  "
+          f"{standin.requests} embedding requests, {batches} Redis round trips   "
+          f"({(n / t_bulk) / (serial_n / t_serial):.0f}x)   stored={stored == len(ids) == n}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name not in args:
+            return default
+        i = args.index(name)
+        value = float(args[i + 1])
+        del args[i:i + 2]
+        return value
+
+    latency = option("--embed-ms", 100) / 1000
+    batch = int(option("--batch", vdb.EMBED_BATCH_SIZE))
+    concurrency = int(option("--concurrency", vdb.EMBED_CONCURRENCY))
+    main(int(args[0]) if args else 5000, latency, batch, concurrency)
@@ -0,0 +1,132 @@
+# benchmarks/bench_vector_quantization.py
+"""
+Quantized vector storage: Redis memory, recall and latency vs float32
+Indexes N stand-in documents once per VECTOR_STORAGE mode (float32, float16,
+int8) into a real Redis and reports:
+  - memory: MEMORY USAGE of the document hashes (bytes/doc and total)
+  - in-process index: load time, query latency and recall@10 of
+    VectorDB.search (full-precision query vs every dequantized vector)
+  - KNN path: recall@10 when candidates are ranked the way the RediSearch
+    index ranks them (quantized query vs quantized documents), alone and
+    after query-side rescoring of RESCORE_FACTOR x 10 candidates (full-precision
+    query vs their dequantized vectors). Local Redis has
+    no search module, so this ranking is reproduced with NumPy.
+Recall is measured against exact float32 top-10 for unseen query texts.
+Benchmark keys are removed afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_quantization [docs] [--queries 200]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app import embedding_cache, vector_db as vdb
+from app.vector_index import dequantize, normalize, quantize, rescore
+from benchmarks.embedding_standin import EmbeddingStandin, embed, sample_texts
+
+K = 10
+MODES = ["float32", "float16", "int8"]
+
+
+def workspace(mode):
+    return f"bench-quant-{mode}"
+
+
+def cleanup(mode):
+    ws = workspace(mode)
+    keys = [f"vec:{d}" for d in vdb.redis_client.smembers(vdb._id_set(ws))]
+    keys += [vdb._id_set(ws), vdb._version_key(ws)]
+    for i in range(0, len(keys), 1000):
+        vdb.redis_client.unlink(*keys[i:i + 1000])
+
+
+def top_k(matrix, queries, k=K):
+    scores = queries @ matrix.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def recall(found, truth):
+    return np.mean([len(f & t) / K for f, t in zip(found, truth)])
+
+
+def memory_usage(mode):
+    ids = list(vdb.redis_client.smembers(vdb._id_set(workspace(mode))))
+    pipe = vdb.redis_client.pipeline(transaction=False)
+    for doc_id in ids:
+        pipe.memory_usage(f"vec:{doc_id}", samples=0)
+    return sum(pipe.execute())
+
+
+def roundtrip(matrix, mode):
+    """Vectors as the index holds them after storage"""
+    out = []
+    for v in matrix:
+        blob, scale = quantize(v, mode)
+        out.append(dequantize(blob, matrix.shape[1], scale))
+    return np.stack(out)
+
+
+def main(n, queries):
+    vdb._openai = EmbeddingStandin(latency=0, per_input=0).client()
+    embedding_cache._get_redis = embedding_cache._get_aredis = lambda: None   # memory tier only
+    vdb.VECTOR_INDEX = "local"
+    texts = sample_texts(n)
+    probes = sample_texts(queries, seed=11)
+    docs = normalize(np.stack([embed(t) for t in texts]))
+    qs = normalize(np.stack([embed(t) for t in probes]))
+    truth = top_k(docs, qs)
+
+    rows = []
+    try:
+        for mode in MODES:
+            cleanup(mode)
+            db = vdb.VectorDB(storage=mode)
+            ids = db.add_documents(workspace(mode), [{"content": t, "metadata": {"type": "transaction"}} for t in texts])
+            position = {doc_id: i for i, doc_id in enumerate(ids)}
+            used = memory_usage(mode)
+
+            t0 = time.perf_counter()
+            db.search(probes[0], workspace(mode), top_k=K, score_threshold=-1)
+            t_load = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            results = [db.search(p, workspace(mode), top_k=K, score_threshold=-1) for p in probes]
+            t_query = (time.perf_counter() - t0) / queries
+            local = recall([{position[d["id"]] for d in r} for r in results], truth)
+
+            # KNN ranking as the server computes it: quantized query against quantized documents
+            stored = normalize(roundtrip(docs, mode))
+            knn = top_k(stored, normalize(roundtrip(qs, mode)), K * vdb.RESCORE_FACTOR)
+            knn_only = recall(top_k(stored, normalize(roundtrip(qs, mode))), truth)
+            t0 = time.perf_counter()
+            rescored = []
+            for q, candidates in zip(qs, knn):
+                candidates = np.fromiter(candidates, dtype=np.int64)
+                order, _ = rescore(q, stored[candidates], K)
+                rescored.append(set(candidates[order]))
+            t_rescore = (time.perf_counter() - t0) / queries
+            rows.append((mode, used, t_load, t_query, local, knn_only, recall(rescored, truth), t_rescore))
+    finally:
+        for mode in MODES:
+            cleanup(mode)
+
+    print(f"{n} documents, {queries} unseen queries, recall@{K} vs exact float32, "
+          f"rescoring {K * vdb.RESCORE_FACTOR} candidates")
+    base = rows[0][1]
+    for mode, used, t_load, t_query, local, knn_only, knn_rescored, t_rescore in rows:
+        print(f"{mode:>8}: {used / n:6.0f} B/doc {used / 2**20:7.1f} MB ({base / used:.1f}x less)   "
+              f"local load {t_load * 1000:6.0f} ms  query {t_query * 1000:5.2f} ms  recall {local:.3f}   "
+              f"KNN recall {knn_only:.3f} -> rescored {knn_rescored:.3f} (+{t_rescore * 1e6:.0f} us)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    queries = 200
+    if "--queries" in args:
+        i = args.index("--queries")
+        queries = int(args[i + 1])
+        del args[i:i + 2]
+    main(int(args[0]) if args else 10_000, queries)
@@ -0,0 +1,100 @@
+# benchmarks/bench_vector_search.py
+"""
+VectorDB search: in-process index vs scanning every hash
+Indexes N stand-in documents into one workspace of a real Redis (plain Redis
+is enough), then answers queries two ways: the previous approach, which
+fetches every hash of the workspace and scores it in Python, and
+VectorDB.search on the in-process index (first query includes loading it).
+Queries are stored texts, so top-1 recall should be 100%. The RediSearch KNN
+path needs the search module and is not measured here. Benchmark keys are
+removed afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_search [docs] [--queries 50]
+"""
+
+import json
+import sys
+import time
+
+import numpy as np
+
+from app import embedding_cache, vector_db as vdb
+from benchmarks.embedding_standin import EmbeddingStandin, sample_texts
+
+WORKSPACE = "bench-search"
+
+
+def cleanup():
+    keys = [f"vec:{d}" for d in vdb.redis_client.smembers(vdb._id_set(WORKSPACE))]
+    keys += [vdb._id_set(WORKSPACE), vdb._version_key(WORKSPACE)]
+    for i in range(0, len(keys), 1000):
+        vdb.redis_client.unlink(*keys[i:i + 1000])
+
+
+def scan_search(query_embedding, top_k):
+    """Fetch every document of the workspace and score it client-side"""
+    keys = [b"vec:" + d for d in vdb.redis_bytes.smembers(vdb._id_set(WORKSPACE))]
+    pipe = vdb.redis_bytes.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    scored = []
+    for key, doc in zip(keys, pipe.execute()):
+        v = np.frombuffer(doc[b"embedding"], dtype=np.float32)
+        score = float(v @ query_embedding / (np.linalg.norm(v) * np.linalg.norm(query_embedding)))
+        scored.append((score, key.decode()[4:], doc[b"content"].decode(), json.loads(doc[b"metadata"])))
+    scored.sort(key=lambda s: -s[0])
+    return [{"id": i, "content": c, "metadata": m, "score": s} for s, i, c, m in scored[:top_k]]
+
+
+def main(n, queries):
+    vdb._openai = EmbeddingStandin(latency=0, per_input=0).client()
+    embedding_cache._get_redis = lambda: None    # keep the benchmark out of the shared embedding cache
+    db = vdb.vector_db
+    vdb.VECTOR_INDEX = "local"    # measure the in-process index even on Redis Stack
+    texts = sample_texts(n)
+    docs = [{"content": t, "metadata": {"type": "transaction" if i % 2 else "insight"}}
+            for i, t in enumerate(texts)]
+    probes = [texts[i] for i in np.random.default_rng(1).choice(n, queries, replace=False)]
+
+    cleanup()
+    try:
+        t0 = time.perf_counter()
+        db.add_documents(WORKSPACE, docs)
+        t_add = time.perf_counter() - t0
+
+        probe_vectors = db._get_embeddings(probes)
+        scan_n = min(queries, 5)   # scanning is slow; time a few queries
+        t0 = time.perf_counter()
+        scan_hits = sum(scan_search(v, 5)[0]["content"] == p for v, p in zip(probe_vectors[:scan_n], probes))
+        t_scan = (time.perf_counter() - t0) / scan_n
+
+        t0 = time.perf_counter()
+        db.search(probes[0], WORKSPACE, top_k=5, score_threshold=0)
+        t_load = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        local_hits = sum(db.search(p, WORKSPACE, top_k=5, score_threshold=0)[0]["content"] == p for p in probes)
+        t_local = (time.perf_counter() - t0) / queries
+        t0 = time.perf_counter()
+        typed = [db.search(p, WORKSPACE, top_k=5, score_threshold=0, doc_type="insight") for p in probes]
+        t_typed = (time.perf_counter() - t0) / queries
+        typed_ok = all(d["metadata"]["type"] == "insight" for r in typed for d in r)
+    finally:
+        cleanup()
+
+    print(f"{n} documents, dim {vdb.vector_db.embedding_dim}, indexed in {t_add:.1f} s")
+    print(f"scan all hashes  : {t_scan * 1000:9.1f} ms/query   top-1 recall {scan_hits}/{scan_n}")
+    print(f"local index load : {t_load * 1000:9.1f} ms (first query)")
+    print(f"local index      : {t_local * 1000:9.2f} ms/query   top-1 recall {local_hits}/{queries}   "
+          f"({t_scan / t_local:.0f}x)")
+    print(f"  + type filter  : {t_typed * 1000:9.2f} ms/query   types respected={typed_ok}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    queries = 50
+    if "--queries" in args:
+        i = args.index("--queries")
+        queries = int(args[i + 1])
+        del args[i:i + 2]
+    main(int(args[0]) if args else 20_000, queries)
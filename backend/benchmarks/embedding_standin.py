@@ -0,0 +1,100 @@
+# benchmarks/embedding_standin.py
+"""
+Local stand-in for the OpenAI embeddings endpoint
+Answers POST /v1/embeddings through an httpx transport with a configurable
+round-trip latency, so VectorDB can be benchmarked without an API key or
+network noise. Vectors are deterministic bag-of-words embeddings (sum of a
+fixed random vector per token, normalized): texts that share words are
+similar, which keeps nearest-neighbour results meaningful.
+
+    standin = EmbeddingStandin(latency=0.1)
+    vector_db._openai = standin.client()
+"""
+
+import asyncio
+import base64
+import json
+import re
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import List
+
+import httpx
+import numpy as np
+import openai
+
+DIM = 1536
+
+
+@lru_cache(maxsize=100_000)
+def _token_vector(token: str) -> np.ndarray:
+    return np.random.default_rng(zlib.crc32(token.encode())).standard_normal(DIM).astype(np.float32)
+
+
+def embed(text: str) -> np.ndarray:
+    v = np.zeros(DIM, np.float32)
+    for token in re.findall(r"[a-z0-9]+", text.lower()) or [text]:
+        v += _token_vector(token)
+    return v / max(float(np.linalg.norm(v)), 1e-9)
+
+
+class EmbeddingStandin:
+    """Embeddings API double: latency + per-input cost, request/input counters"""
+
+    def __init__(self, latency: float = 0.1, per_input: float = 0.0002):
+        self.latency = latency
+        self.per_input = per_input
+        self.requests = 0
+        self.inputs = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, request: httpx.Request):
+        body = json.loads(request.content)
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        with self._lock:
+            self.requests += 1
+            self.inputs += len(texts)
+        as_b64 = body.get("encoding_format") == "base64"
+        data = [{
+            "object": "embedding",
+            "index": i,
+            "embedding": base64.b64encode(embed(t).tobytes()).decode() if as_b64 else embed(t).tolist(),
+        } for i, t in enumerate(texts)]
+        return httpx.Response(200, json={
+            "object": "list", "data": data, "model": body["model"],
+            "usage": {"prompt_tokens": len(texts), "total_tokens": len(texts)},
+        }), len(texts)
+
+    def _delay(self, texts: int) -> float:
+        return self.latency + self.per_input * texts
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        response, n = self._respond(request)
+        time.sleep(self._delay(n))
+        return response
+
+    async def async_handler(self, request: httpx.Request) -> httpx.Response:
+        response, n = self._respond(request)
+        await asyncio.sleep(self._delay(n))
+        return response
+
+    def client(self) -> openai.OpenAI:
+        return openai.OpenAI(api_key="standin", base_url="http://embeddings.standin/v1", max_retries=0,
+                             http_client=httpx.Client(transport=httpx.MockTransport(self.handler)))
+
+    def async_client(self) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(api_key="standin", base_url="http://embeddings.standin/v1", max_retries=0,
+                                  http_client=httpx.AsyncClient(transport=httpx.MockTransport(self.async_handler)))
+
+
+def sample_texts(n: int, seed: int = 3) -> List[str]:
+    """Transaction-like context strings (merchant, category, amount, date)"""
+    rnd = np.random.default_rng(seed)
+    merchants = ["Amazon Web Services", "Gusto Payroll", "Notion Labs", "Delta Air Lines", "WeWork",
+                 "Google Ads", "Uber", "Slack", "Stripe Payout", "Figma", "Linear", "Datadog"]
+    categories = ["SaaS", "Payroll", "Travel", "Rent", "Marketing", "Revenue", "Meals", "Infrastructure"]
+    return [f"{merchants[rnd.integers(len(merchants))]} {categories[rnd.integers(len(categories))]} "
+            f"${rnd.uniform(5, 20000):.2f} on 2026-{rnd.integers(1, 13):02d}-{rnd.integers(1, 29):02d} "
+            f"ref {i}" for i in range(n)]
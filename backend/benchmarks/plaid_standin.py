@@ -0,0 +1,161 @@
+# benchmarks/plaid_standin.py
+"""
+Local Plaid stand-in
+Implements just enough of the Plaid API for the ingestion paths in app/plaid.py
+(sandbox token creation, token exchange, webhook, link token and
+/transactions/sync) against a deterministic synthetic ledger, so sync can be
+exercised and benchmarked without Plaid credentials or network access.
+
+Each item keeps an append-only change log; a sync cursor is an offset into it.
+POST /standin/mutate appends added/modified/removed events so incremental
+syncs have something to pick up.
+
+Usage (from backend/):
+    PLAID_STANDIN_TXNS=5000 uvicorn benchmarks.plaid_standin:app --port 9100
+    PLAID_BASE_URL=http://localhost:9100 PLAID_CLIENT_ID=x PLAID_SECRET=x uvicorn app.main:app
+"""
+
+import os
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+INITIAL_TXNS = int(os.environ.get("PLAID_STANDIN_TXNS", 1200))
+
+MERCHANTS = [
+    ("AWS", "Service", 180.0), ("Gusto Payroll", "Transfer", 14000.0),
+    ("Google Ads", "Service", 650.0), ("United Airlines", "Travel", 420.0),
+    ("WeWork", "Payment", 3200.0), ("Slack", "Service", 12.5),
+    ("Uber 063015 SF**POOL**", "Travel", 8.5), ("Starbucks", "Food and Drink", 6.3),
+    ("Stripe Payout", "Transfer", -5200.0), ("Apple Store", "Shops", 2100.0),
+]
+
+app = FastAPI(title="Plaid stand-in")
+
+_items: Dict[str, Dict] = {}      # item_id -> {"log": [(kind, txn)], "live": {txn_id: txn}, "rng", "next"}
+_tokens: Dict[str, str] = {}      # access_token / public_token -> item_id
+_fail_next: Dict[str, bool] = {}  # item_id -> next paginated sync returns MUTATION_DURING_PAGINATION
+
+
+def _txn(rng: random.Random, n: int, item_id: str) -> Dict:
+    name, cat, base = MERCHANTS[rng.randrange(len(MERCHANTS))]
+    day = date(2024, 1, 1) + timedelta(days=rng.randrange(640))
+    return {
+        "transaction_id": f"{item_id}-txn-{n:07d}",
+        "account_id": f"{item_id}-acct",
+        "amount": round(base * rng.uniform(0.8, 1.2), 2),
+        "date": day.isoformat(),
+        "name": name,
+        "merchant_name": name.split()[0],
+        "category": [cat],
+        "pending": False,
+        "iso_currency_code": "USD",
+        "payment_channel": "online",
+        "location": {"city": None, "region": None, "country": "US"},
+    }
+
+
+def _new_item(n_txns: int) -> str:
+    item_id = f"item-{len(_items) + 1}"
+    rng = random.Random(len(_items) + 1)
+    item = {"log": [], "live": {}, "rng": rng, "next": 0}
+    _items[item_id] = item
+    _append(item_id, added=n_txns)
+    return item_id
+
+
+def _append(item_id: str, added: int = 0, modified: int = 0, removed: int = 0) -> None:
+    item = _items[item_id]
+    rng = item["rng"]
+    for txn_id in rng.sample(sorted(item["live"]), min(modified, len(item["live"]))):
+        txn = {**item["live"][txn_id], "amount": round(item["live"][txn_id]["amount"] * 1.1, 2)}
+        item["live"][txn_id] = txn
+        item["log"].append(("modified", txn))
+    for txn_id in rng.sample(sorted(item["live"]), min(removed, len(item["live"]))):
+        del item["live"][txn_id]
+        item["log"].append(("removed", {"transaction_id": txn_id}))
+    for _ in range(added):
+        txn = _txn(rng, item["next"], item_id)
+        item["next"] += 1
+        item["live"][txn["transaction_id"]] = txn
+        item["log"].append(("added", txn))
+
+
+def _error(code: str, status: int = 400) -> JSONResponse:
+    return JSONResponse({"error_type": "TRANSACTIONS_ERROR", "error_code": code,
+                         "error_message": code.lower().replace("_", " ")}, status_code=status)
+
+
+@app.post("/sandbox/public_token/create")
+async def public_token_create(body: Dict):
+    item_id = _new_item(INITIAL_TXNS)
+    token = f"public-standin-{item_id}"
+    _tokens[token] = item_id
+    return {"public_token": token, "request_id": "standin"}
+
+
+@app.post("/item/public_token/exchange")
+async def public_token_exchange(body: Dict):
+    item_id = _tokens.get(body.get("public_token", ""))
+    if item_id is None:
+        # Link tokens from a real frontend never reach the stand-in; give them a fresh item
+        item_id = _new_item(INITIAL_TXNS)
+    token = f"access-standin-{item_id}"
+    _tokens[token] = item_id
+    return {"access_token": token, "item_id": item_id, "request_id": "standin"}
+
+
+@app.post("/sandbox/item/fire_webhook")
+async def fire_webhook(body: Dict):
+    return {"webhook_fired": True, "request_id": "standin"}
+
+
+@app.post("/link/token/create")
+async def link_token_create(body: Dict):
+    return {"link_token": "link-standin-token", "request_id": "standin"}
+
+
+@app.post("/transactions/sync")
+async def transactions_sync(body: Dict):
+    item_id = _tokens.get(body.get("access_token", ""))
+    if item_id is None:
+        return _error("INVALID_ACCESS_TOKEN")
+    log = _items[item_id]["log"]
+    start = int(body.get("cursor") or 0)
+    if start and _fail_next.pop(item_id, False):
+        return _error("TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION")
+    count = min(int(body.get("count", 100)), 500)
+    page = log[start:start + count]
+    # JSONResponse directly: fastapi's jsonable_encoder would dominate page latency
+    return JSONResponse({
+        "added": [t for kind, t in page if kind == "added"],
+        "modified": [t for kind, t in page if kind == "modified"],
+        "removed": [t for kind, t in page if kind == "removed"],
+        "next_cursor": str(start + len(page)),
+        "has_more": start + len(page) < len(log),
+        "request_id": "standin",
+    })
+
+
+class MutateReq(BaseModel):
+    item_id: Optional[str] = None   # default: every item
+    added: int = 0
+    modified: int = 0
+    removed: int = 0
+    fail_next_page: bool = False    # simulate TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION
+
+
+@app.post("/standin/mutate")
+async def mutate(req: MutateReq):
+    """Append changes to an item's log (test hook, not part of the Plaid API)"""
+    targets: List[str] = [req.item_id] if req.item_id else list(_items)
+    for item_id in targets:
+        _append(item_id, req.added, req.modified, req.removed)
+        if req.fail_next_page:
+            _fail_next[item_id] = True
+    return {item_id: {"log": len(_items[item_id]["log"]), "live": len(_items[item_id]["live"])}
+            for item_id in targets}
@@ -24,10 +24,29 @@ function ConnectContent() {
     onSuccess: async (public_token) => {
       setLoading(true);
       try {
-        await axios.post(`${process.env.NEXT_PUBLIC_API_URL}/plaid/exchange`, {
+        const { data } = await axios.post(`${process.env.NEXT_PUBLIC_API_URL}/plaid/exchange`, {
           public_token,
           workspace_id,
         });
+        // Ingestion runs as a background job; wait for it before opening the dashboard.
+        // A 404 means the poll reached an instance that can't see the job (yet): keep
+        // polling, and open the dashboard anyway if it stays unknown. A job stuck
+        // queued or running (e.g. a restart mid-sync) opens it after 5 minutes at most.
+        const deadline = Date.now() + 5 * 60 * 1000;
+        let unknown = 0;
+        while (Date.now() < deadline) {
+          try {
+            const { data: job } = await axios.get(
+              `${process.env.NEXT_PUBLIC_API_URL}/plaid/jobs/${data.job_id}`
+            );
+            if (job.status === "succeeded") break;
+            if (job.status === "failed") throw new Error(job.error);
+          } catch (e) {
+            if (!axios.isAxiosError(e) || e.response?.status !== 404) throw e;
+            if (++unknown >= 30) break;
+          }
+          await new Promise((resolve) => setTimeout(resolve, 1000));
+        }
         router.push(`/dashboard?workspace_id=${workspace_id}&name=${encodeURIComponent(name)}`);
       } catch (error) {
         console.error("Error exchanging token:", error);